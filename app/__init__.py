@@ -54,9 +54,60 @@ def create_app(config_class=config):  # Changed from Config to config
     app.register_blueprint(auth_bp, url_prefix='/auth') 
     app.register_blueprint(main_bp)
 
+    # Dashboard metrics cache (invalidated from after_commit hooks)
+    from .dashboard_metrics import dashboard_cache
+    dashboard_cache.init_app(app)
+
+    # Cached total counts for paginated list pages
+    from .pagination import count_cache
+    count_cache.init_app(app)
+
+    # Inventory rollups (after_flush hook is registered on import)
+    from .rollups import rebuild_rollups_command, ensure_rollups_populated
+    app.cli.add_command(rebuild_rollups_command)
+
+    # Denormalized-column hooks (registered on import) and additive schema upgrades
+    from .model_events import reconcile_room_counts_command
+    from .schema import upgrade_schema, upgrade_schema_command
+    app.cli.add_command(reconcile_room_counts_command)
+    app.cli.add_command(upgrade_schema_command)
+
+    # EXPLAIN-based check that the hot queries still use their indexes
+    from .query_plans import check_query_plans_command
+    app.cli.add_command(check_query_plans_command)
+
+    # Full-text search index (after_flush hook is registered on import)
+    from .search import rebuild_search_index_command, ensure_search_index
+    app.cli.add_command(rebuild_search_index_command)
+
+    # Trigram / n-gram substring index for '%term%' filters
+    from .substring import rebuild_substring_index_command, ensure_substring_index
+    app.cli.add_command(rebuild_substring_index_command)
+
+    # Background export jobs (process pool) and expiry of their files
+    from .export_jobs import export_jobs, purge_exports_command
+    export_jobs.init_app(app)
+    app.cli.add_command(purge_exports_command)
+
+    # Export files kept on disk for repeat downloads (version bumped from after_commit hooks)
+    from .export_cache import export_cache
+    export_cache.init_app(app)
+
+    # Old vs fast PDF renderer timings
+    from .pdf_render import benchmark_pdf_command
+    app.cli.add_command(benchmark_pdf_command)
+
+    # Capturer presence heartbeats (buffered in memory, flushed in batches)
+    from .presence import presence
+    presence.init_app(app)
+
     with app.app_context():
-        # Create database tables if they do not exist
+        # Create database tables if they do not exist, then add any new columns/indexes
         db.create_all()
+        upgrade_schema()
+        ensure_rollups_populated()
+        ensure_search_index()
+        ensure_substring_index()
 
         # Super Admin Setup Check - runs on EVERY request
         @app.before_request
@@ -0,0 +1,198 @@
+"""
+Small result cache with pluggable backends.
+
+* ``MemoryCacheBackend`` – in-process LRU with per-entry TTL (single worker).
+* ``SQLiteCacheBackend`` – a shared SQLite file, so several gunicorn workers
+  see the same entries and the same invalidations.
+
+``ResultCache`` groups entries under a namespace; ``invalidate()`` drops the
+whole namespace at once. Backends are chosen from app config in
+``init_app()`` (``<PREFIX>_BACKEND`` = ``memory`` | ``sqlite`` | ``none``).
+``invalidate_on_commit()`` ties a cache to the models whose commits make it stale.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from itertools import chain
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+class NullCacheBackend:
+    """Backend that never stores anything (caching disabled)."""
+
+    def get(self, namespace, key):
+        return None
+
+    def set(self, namespace, key, value, ttl):
+        pass
+
+    def clear(self, namespace):
+        pass
+
+
+class MemoryCacheBackend:
+    """Thread-safe in-process LRU cache with per-entry expiry."""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, namespace, key):
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[(namespace, key)]
+                return None
+            self._entries.move_to_end((namespace, key))
+            return value
+
+    def set(self, namespace, key, value, ttl):
+        with self._lock:
+            self._entries[(namespace, key)] = (time.time() + ttl, value)
+            self._entries.move_to_end((namespace, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self, namespace):
+        with self._lock:
+            for entry_key in [k for k in self._entries if k[0] == namespace]:
+                del self._entries[entry_key]
+
+
+class SQLiteCacheBackend:
+    """Cache stored in a SQLite file shared by every worker process on the host."""
+
+    def __init__(self, path, max_entries=1024):
+        self.path = path
+        self.max_entries = max_entries
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache_entry ('
+                ' namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL,'
+                ' expires_at REAL NOT NULL, accessed_at REAL NOT NULL,'
+                ' PRIMARY KEY (namespace, key))'
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def get(self, namespace, key):
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    'SELECT value, expires_at FROM cache_entry WHERE namespace = ? AND key = ?',
+                    (namespace, key)
+                ).fetchone()
+                if row is None:
+                    return None
+                if row[1] < now:
+                    conn.execute('DELETE FROM cache_entry WHERE namespace = ? AND key = ?', (namespace, key))
+                    return None
+                conn.execute('UPDATE cache_entry SET accessed_at = ? WHERE namespace = ? AND key = ?',
+                             (now, namespace, key))
+                return pickle.loads(row[0])
+        except sqlite3.Error:
+            # A locked or corrupt cache file must never break the page
+            return None
+
+    def set(self, namespace, key, value, ttl):
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO cache_entry (namespace, key, value, expires_at, accessed_at)'
+                    ' VALUES (?, ?, ?, ?, ?)',
+                    (namespace, key, pickle.dumps(value), now + ttl, now)
+                )
+                conn.execute(
+                    'DELETE FROM cache_entry WHERE rowid IN ('
+                    ' SELECT rowid FROM cache_entry ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)',
+                    (self.max_entries,)
+                )
+        except sqlite3.Error:
+            pass
+
+    def clear(self, namespace):
+        try:
+            with self._connect() as conn:
+                conn.execute('DELETE FROM cache_entry WHERE namespace = ?', (namespace,))
+        except sqlite3.Error:
+            pass
+
+
+def make_backend(app, prefix):
+    """Build the backend configured under ``<prefix>_BACKEND`` / ``_PATH`` / ``_MAX_ENTRIES``."""
+    kind = app.config.get(f'{prefix}_BACKEND', 'memory')
+    max_entries = app.config.get(f'{prefix}_MAX_ENTRIES', 256)
+    if kind == 'sqlite':
+        path = app.config.get(f'{prefix}_PATH') or os.path.join(app.instance_path, f'{prefix.lower()}.sqlite')
+        return SQLiteCacheBackend(path, max_entries=max_entries)
+    if kind == 'memory':
+        return MemoryCacheBackend(max_entries=max_entries)
+    return NullCacheBackend()
+
+
+class ResultCache:
+    """Namespaced get-or-compute cache; backend and TTL are taken from app config."""
+
+    def __init__(self, namespace, config_prefix):
+        self.namespace = namespace
+        self.config_prefix = config_prefix
+        self.backend = NullCacheBackend()
+        self.ttl = 60
+
+    def init_app(self, app):
+        self.backend = make_backend(app, self.config_prefix)
+        self.ttl = app.config.get(f'{self.config_prefix}_TTL', 60)
+
+    @staticmethod
+    def make_key(*parts):
+        return ':'.join(str(p) for p in parts)
+
+    def get_or_compute(self, key, compute, ttl=None):
+        value = self.backend.get(self.namespace, key)
+        if value is None:
+            value = compute()
+            self.backend.set(self.namespace, key, value, ttl or self.ttl)
+        return value
+
+    def invalidate(self):
+        self.backend.clear(self.namespace)
+
+
+def invalidate_on_commit(cache, models):
+    """Drop ``cache`` after any committed flush that inserted, updated or deleted one of ``models``."""
+    flag = f'{cache.namespace}_stale'
+
+    @event.listens_for(Session, 'after_flush')
+    def _flag_changes(session, flush_context):
+        if any(isinstance(obj, models) for obj in chain(session.new, session.dirty, session.deleted)):
+            session.info[flag] = True
+
+    @event.listens_for(Session, 'after_commit')
+    def _invalidate(session):
+        if session.info.pop(flag, False):
+            cache.invalidate()
+
+    @event.listens_for(Session, 'after_rollback')
+    def _discard_flag(session):
+        session.info.pop(flag, None)
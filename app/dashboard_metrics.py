@@ -0,0 +1,232 @@
+"""
+Dashboard metrics engine.
+
+Every number on the admin dashboard is computed in a fixed number of
+queries instead of one ``count()``/``sum()`` round-trip per widget:
+
+* status, value and category/campus totals are read from the
+  ``inventory_rollup`` table (see rollups.py);
+* activity, data-quality, depreciation and age figures (age buckets use
+  exact procurement-date cut-offs) come from a single conditional-aggregate
+  (``SUM(CASE ...)``) pass over ``item``;
+* room totals come from one query on ``room``.
+
+Results are cached per (role, campus scope, day) in ``dashboard_cache`` and
+dropped on any commit that touched Item, Room or DataCapturer rows.
+"""
+from dataclasses import dataclass, field, asdict
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func, case, or_, select
+
+from .models import db, Item, Room, Campus, DataCapturer, ItemStatus, InventoryRollup
+from .cache import ResultCache, invalidate_on_commit
+from .depreciation import years_owned, depreciation_amount
+
+
+dashboard_cache = ResultCache('dashboard', 'DASHBOARD_CACHE')
+
+# Commits touching these models make cached dashboards stale
+CACHE_WATCHED_MODELS = (Item, Room, DataCapturer)
+
+
+@dataclass
+class DashboardMetrics:
+    """Typed container for all dashboard widget values."""
+    # --- Financial ---
+    total_cost: float = 0.0
+    accumulated_depreciation: float = 0.0
+    net_book_value: float = 0.0
+    fully_depreciated_value: float = 0.0
+    at_risk_value: float = 0.0
+    replacement_needed_value: float = 0.0
+    stolen_value: float = 0.0
+
+    # --- Status ---
+    total_active_items: int = 0
+    inactive_items: int = 0
+    needs_repair_count: int = 0
+    stolen_items: int = 0
+    disposed_items: int = 0
+
+    # --- Age ---
+    fully_depreciated_count: int = 0
+    at_risk_count: int = 0
+    replacement_needed_count: int = 0
+    avg_asset_age: float = 0.0
+
+    # --- Activity ---
+    items_today: int = 0
+    items_last_30_days: int = 0
+    active_capturers_count: int = 0
+
+    # --- Data Quality ---
+    items_no_serial: int = 0
+    items_no_cost: int = 0
+    items_no_location: int = 0
+    total_rooms: int = 0
+    empty_rooms: int = 0
+
+    # --- Breakdowns: {label: {'count': int, 'value': float}} ---
+    category_data: dict = field(default_factory=dict)
+    campus_data: dict = field(default_factory=dict)
+
+    def to_context(self):
+        """Flatten into template keyword arguments."""
+        return asdict(self)
+
+
+def _age_boundaries(today):
+    """Procurement-date cut-offs used by the age buckets."""
+    return {
+        'five_years_ago': today - timedelta(days=5 * 365 + 30),
+        'four_years_ago': today - timedelta(days=4 * 365 + 30),
+        'three_years_ago': today - timedelta(days=3 * 365 + 30),
+    }
+
+
+def _count_if(condition):
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+def _sum_if(condition, value):
+    return func.coalesce(func.sum(case((condition, value), else_=0)), 0)
+
+
+def _scoped(stmt, campus_ids):
+    """Restrict an Item statement to the given campuses (None = no restriction)."""
+    if campus_ids is None:
+        return stmt
+    return stmt.where(Item.campus_id.in_(campus_ids))
+
+
+def get_dashboard_metrics(campus_ids=None, today=None, extra=None):
+    """
+    Cached ``compute_dashboard_metrics``. ``extra`` is an optional
+    ``{name: callable}`` of further scope-dependent values (e.g. the capture
+    trend) that are cached alongside the metrics.
+    Returns ``(metrics, {name: value})``.
+    """
+    today = today or date.today()
+    role = 'super' if campus_ids is None else 'admin'
+    scope = 'all' if campus_ids is None else ','.join(str(c) for c in sorted(campus_ids))
+    key = ResultCache.make_key(role, scope, today.isoformat(), *sorted(extra or {}))
+
+    def compute():
+        metrics = compute_dashboard_metrics(campus_ids, today)
+        return metrics, {name: fn() for name, fn in (extra or {}).items()}
+
+    return dashboard_cache.get_or_compute(key, compute)
+
+
+def compute_dashboard_metrics(campus_ids=None, today=None):
+    """
+    Compute all dashboard metrics for the given campus scope.
+    ``campus_ids=None`` means system-wide (Super Admin).
+    """
+    today = today or date.today()
+    metrics = DashboardMetrics()
+    _apply_rollup_totals(metrics, campus_ids, today)
+    _apply_item_scan(metrics, campus_ids, today)
+    _apply_room_counts(metrics, campus_ids)
+    metrics.net_book_value = metrics.total_cost - metrics.accumulated_depreciation
+    return metrics
+
+
+def _apply_rollup_totals(metrics, campus_ids, today):
+    """Status, value and category/campus totals from ``inventory_rollup``."""
+    stmt = (
+        select(
+            Campus.name,
+            InventoryRollup.category,
+            InventoryRollup.status,
+            func.sum(InventoryRollup.item_count),
+            func.coalesce(func.sum(InventoryRollup.total_cost), 0),
+        )
+        .join(Campus, InventoryRollup.campus_id == Campus.campus_id)
+        .group_by(Campus.name, InventoryRollup.category, InventoryRollup.status)
+    )
+    if campus_ids is not None:
+        stmt = stmt.where(InventoryRollup.campus_id.in_(campus_ids))
+
+    status_counters = {
+        ItemStatus.ACTIVE: 'total_active_items',
+        ItemStatus.INACTIVE: 'inactive_items',
+        ItemStatus.NEEDS_REPAIR: 'needs_repair_count',
+        ItemStatus.STOLEN: 'stolen_items',
+        ItemStatus.DISPOSED: 'disposed_items',
+    }
+
+    for campus_name, category, status, count, value in db.session.execute(stmt):
+        count = int(count or 0)
+        value = float(value or 0)
+
+        metrics.total_cost += value
+        attr = status_counters[status]
+        setattr(metrics, attr, getattr(metrics, attr) + count)
+        if status == ItemStatus.STOLEN:
+            metrics.stolen_value += value
+
+        for bucket, label in ((metrics.campus_data, campus_name),
+                              (metrics.category_data, category.value if category else 'Unknown')):
+            entry = bucket.setdefault(label, {'count': 0, 'value': 0.0})
+            entry['count'] += count
+            entry['value'] += value
+
+
+def _apply_item_scan(metrics, campus_ids, today):
+    """Widgets that depend on per-item columns, computed in one conditional-aggregate scan."""
+    today_start = datetime.combine(today, datetime.min.time())
+    thirty_days_ago = today - timedelta(days=30)
+
+    age_in_years = years_owned(Item.Procured_date, as_of=today)
+
+    recent = Item.capture_date >= thirty_days_ago
+
+    # Age buckets by exact procurement date, not by the rollups' procurement month
+    b = _age_boundaries(today)
+    cost = func.coalesce(Item.cost, 0)
+    age_buckets = {
+        'fully_depreciated': Item.Procured_date <= b['five_years_ago'],
+        'at_risk': (Item.Procured_date > b['five_years_ago']) & (Item.Procured_date <= b['four_years_ago']),
+        'replacement_needed': (Item.Procured_date > b['four_years_ago']) & (Item.Procured_date <= b['three_years_ago']),
+    }
+
+    columns = [
+        func.coalesce(func.sum(depreciation_amount(as_of=today)), 0).label('accumulated_depreciation'),
+        _count_if(Item.capture_date >= today_start).label('items_today'),
+        _count_if(recent).label('items_last_30_days'),
+        func.count(func.distinct(case((recent, Item.data_capturer_id)))).label('active_capturers_count'),
+        _count_if(or_(Item.serial_number.is_(None), Item.serial_number == '')).label('items_no_serial'),
+        _count_if(or_(Item.cost.is_(None), Item.cost == 0)).label('items_no_cost'),
+        _count_if(Item.room_id.is_(None)).label('items_no_location'),
+        func.avg(case((Item.Procured_date.isnot(None), age_in_years))).label('avg_asset_age'),
+    ]
+    for name, condition in age_buckets.items():
+        columns.append(_count_if(condition).label(f'{name}_count'))
+        columns.append(_sum_if(condition, cost).label(f'{name}_value'))
+    row = db.session.execute(_scoped(select(*columns).select_from(Item), campus_ids)).one()
+
+    for key, value in row._mapping.items():
+        if key == 'avg_asset_age':
+            metrics.avg_asset_age = round(float(value), 1) if value else 0.0
+        elif isinstance(getattr(metrics, key), float):
+            setattr(metrics, key, float(value or 0))
+        else:
+            setattr(metrics, key, int(value or 0))
+
+
+def _apply_room_counts(metrics, campus_ids):
+    """Active rooms, and active rooms with no items according to their item counter."""
+    stmt = select(
+        func.count(Room.room_id),
+        _count_if(Room.item_count == 0),
+    ).where(Room.is_active == True)
+    if campus_ids is not None:
+        stmt = stmt.where(Room.campus_id.in_(campus_ids))
+    metrics.total_rooms, metrics.empty_rooms = (int(v or 0) for v in db.session.execute(stmt).one())
+
+
+# ==================== Cache invalidation ====================
+
+invalidate_on_commit(dashboard_cache, CACHE_WATCHED_MODELS)
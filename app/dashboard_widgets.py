@@ -0,0 +1,188 @@
+"""
+JSON payloads for the admin dashboard widgets.
+
+The dashboard page renders as an empty shell and fetches each widget group
+from ``/admin/api/dashboard/<widget>`` in parallel. ``WIDGETS`` maps a widget
+name to its payload builder and the browser cache lifetime (seconds) sent
+with it: cheap, fast-moving widgets are re-fetched often, expensive or
+slow-moving ones are cached longer.
+
+Builders take the current admin and today's date and return a JSON-ready
+dict. Cost figures are only included for the Super Admin.
+"""
+from decimal import Decimal
+
+from sqlalchemy import desc
+from sqlalchemy.orm import joinedload
+
+from .models import Item, Room, DataCapturer, ItemStatus
+from .cache import ResultCache
+from .dashboard_metrics import dashboard_cache, get_dashboard_metrics
+from .timeseries import time_series
+from .presence import online_capturers_count
+from .loaders import item_row_loaders
+
+
+def _campus_scope(admin):
+    """None (= every campus) for the Super Admin, otherwise the admin's campus ids."""
+    return None if admin.is_super_admin else [c.campus_id for c in admin.campuses]
+
+
+def _metrics(admin, today):
+    metrics, _ = get_dashboard_metrics(campus_ids=_campus_scope(admin), today=today)
+    return metrics
+
+
+def _breakdown(data, with_value):
+    if with_value:
+        return data
+    return {label: entry['count'] for label, entry in data.items()}
+
+
+# ==================== Widget builders ====================
+
+def financial_widget(admin, today):
+    """Cost, net book value and value-at-risk figures (Super Admin only)."""
+    m = _metrics(admin, today)
+    return {
+        'total_cost': m.total_cost,
+        'net_book_value': m.net_book_value,
+        'net_book_value_pct': round(m.net_book_value / m.total_cost * 100, 1) if m.total_cost > 0 else 0,
+        'accumulated_depreciation': m.accumulated_depreciation,
+        'fully_depreciated_value': m.fully_depreciated_value,
+        'fully_depreciated_count': m.fully_depreciated_count,
+        'at_risk_value': m.at_risk_value,
+        'replacement_needed_value': m.replacement_needed_value,
+        'replacement_needed_count': m.replacement_needed_count,
+        'stolen_value': m.stolen_value,
+        'stolen_items': m.stolen_items,
+    }
+
+
+def operational_widget(admin, today):
+    """Status counts, capture activity, age buckets and campus/category breakdowns."""
+    m = _metrics(admin, today)
+    if admin.is_super_admin:
+        total_capturers = DataCapturer.query.count()
+        online = online_capturers_count()
+    else:
+        total_capturers = len(admin.data_capturers)
+        online = online_capturers_count(admin_id=admin.admin_id)
+    return {
+        'total_active_items': m.total_active_items,
+        'inactive_items': m.inactive_items,
+        'needs_repair_count': m.needs_repair_count,
+        'stolen_items': m.stolen_items,
+        'disposed_items': m.disposed_items,
+        'avg_asset_age': m.avg_asset_age,
+        'fully_depreciated_count': m.fully_depreciated_count,
+        'at_risk_count': m.at_risk_count,
+        'replacement_needed_count': m.replacement_needed_count,
+        'items_today': m.items_today,
+        'items_last_30_days': m.items_last_30_days,
+        'active_capturers_count': m.active_capturers_count,
+        'total_capturers': total_capturers,
+        'online_capturers_count': online,
+        'offline_capturers_count': max(total_capturers - online, 0),
+        'campus_data': _breakdown(m.campus_data, admin.is_super_admin),
+        'category_data': _breakdown(m.category_data, admin.is_super_admin),
+    }
+
+
+def data_quality_widget(admin, today):
+    """Missing serials/costs/locations and empty rooms."""
+    m = _metrics(admin, today)
+    return {
+        'items_no_serial': m.items_no_serial,
+        'items_no_cost': m.items_no_cost,
+        'items_no_location': m.items_no_location,
+        'empty_rooms': m.empty_rooms,
+        'total_rooms': m.total_rooms,
+    }
+
+
+def trends_widget(admin, today):
+    """Monthly capture counts for the last six months (cached with the dashboard metrics)."""
+    campus_ids = _campus_scope(admin)
+    scope = 'all' if campus_ids is None else ','.join(str(c) for c in sorted(campus_ids))
+
+    def compute():
+        series = time_series('capture_date', 'month', periods=6, end=today, campus_ids=campus_ids)
+        return [{'month': p['label'], 'count': p['count']} for p in series]
+
+    key = ResultCache.make_key('trends', scope, today.isoformat())
+    return {'monthly_captures': dashboard_cache.get_or_compute(key, compute)}
+
+
+def top_items_widget(admin, today):
+    """The five most valuable active items (cost shown to the Super Admin only)."""
+    query = Item.query.options(
+        joinedload(Item.room).joinedload(Room.campus)
+    ).filter(
+        Item.cost.isnot(None),
+        Item.cost > Decimal("0"),
+        Item.status == ItemStatus.ACTIVE
+    )
+    campus_ids = _campus_scope(admin)
+    if campus_ids is not None:
+        query = query.filter(Item.campus_id.in_(campus_ids))
+
+    items = []
+    for item in query.order_by(desc(Item.cost)).limit(5).all():
+        row = {
+            'asset_number': item.asset_number,
+            'name': item.name,
+            'location': f'{item.room.campus.name} - {item.room.name}',
+            'age_years': round((today - item.Procured_date).days / 365.25, 1) if item.Procured_date else None,
+        }
+        if admin.is_super_admin:
+            row['cost'] = float(item.cost)
+        items.append(row)
+    return {'items': items}
+
+
+def recent_items_widget(admin, today):
+    """The latest captures in scope."""
+    query = Item.query.options(*item_row_loaders())
+    campus_ids = _campus_scope(admin)
+    if campus_ids is not None:
+        query = query.filter(Item.campus_id.in_(campus_ids))
+
+    return {'items': [
+        {
+            'asset_number': item.asset_number,
+            'name': item.name,
+            'location': f'{item.room.campus.name} / {item.room.name}',
+            'captured_by': item.data_capturer.full_name if item.data_capturer else 'System',
+            'capture_date': item.capture_date.strftime('%Y-%m-%d %H:%M') if item.capture_date else None,
+        }
+        for item in query.order_by(Item.capture_date.desc()).limit(5).all()
+    ]}
+
+
+# name -> (builder, browser max-age in seconds, super-admin only)
+WIDGETS = {
+    'financial': (financial_widget, 300, True),
+    'operational': (operational_widget, 60, False),
+    'data-quality': (data_quality_widget, 300, False),
+    'trends': (trends_widget, 600, False),
+    'top-items': (top_items_widget, 300, False),
+    'recent-items': (recent_items_widget, 30, False),
+}
+
+
+class UnknownDashboardWidget(Exception):
+    """No such widget, or one the admin may not see."""
+
+
+def build_dashboard_widget(name, admin, today):
+    """
+    Return ``(payload, max_age)`` for a widget; raises ``UnknownDashboardWidget``
+    for unknown or forbidden widgets. Errors inside a builder propagate.
+    """
+    if name not in WIDGETS:
+        raise UnknownDashboardWidget(name)
+    builder, max_age, super_only = WIDGETS[name]
+    if super_only and not admin.is_super_admin:
+        raise UnknownDashboardWidget(name)
+    return builder(admin, today), max_age
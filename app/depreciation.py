@@ -0,0 +1,86 @@
+"""
+Straight-line depreciation shared by the dashboards, reports and exports.
+
+Assets depreciate at ``ANNUAL_RATE`` of cost per year over
+``USEFUL_LIFE_YEARS`` and are then fully depreciated.
+
+``years_owned`` and ``depreciation_amount`` are SQL expressions that
+compile to ``julianday`` on SQLite and to plain date arithmetic on
+PostgreSQL, so dashboard aggregates and the export/report "Net Book Value"
+column are computed inside the database on either backend.
+"""
+from datetime import date
+
+from sqlalchemy import Float, Date, case, and_, literal
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+
+from .models import Item
+
+
+USEFUL_LIFE_YEARS = 5.0
+ANNUAL_RATE = 1.0 / USEFUL_LIFE_YEARS
+DAYS_PER_YEAR = 365.25
+
+
+class days_since(FunctionElement):
+    """
+    Whole days between a DATE column and a reference date (today by default).
+    Compiled per dialect below.
+    """
+    type = Float()
+    inherit_cache = True
+    name = 'days_since'
+
+
+@compiles(days_since)
+def _days_since_default(element, compiler, **kw):
+    column, as_of = list(element.clauses)
+    return '(CAST(%s AS DATE) - CAST(%s AS DATE))' % (
+        compiler.process(as_of, **kw), compiler.process(column, **kw))
+
+
+@compiles(days_since, 'sqlite')
+def _days_since_sqlite(element, compiler, **kw):
+    column, as_of = list(element.clauses)
+    return '(julianday(%s) - julianday(%s))' % (
+        compiler.process(as_of, **kw), compiler.process(column, **kw))
+
+
+@compiles(days_since, 'postgresql')
+def _days_since_postgresql(element, compiler, **kw):
+    column, as_of = list(element.clauses)
+    return "date_part('day', CAST(%s AS TIMESTAMP) - CAST(%s AS TIMESTAMP))" % (
+        compiler.process(as_of, **kw), compiler.process(column, **kw))
+
+
+def _as_of_clause(as_of):
+    if as_of is None:
+        as_of = date.today()
+    return literal(as_of, Date)
+
+
+def years_owned(column=None, as_of=None):
+    """SQL expression: fractional years between ``column`` (default Item.Procured_date) and ``as_of``."""
+    column = Item.Procured_date if column is None else column
+    return days_since(column, _as_of_clause(as_of)) / DAYS_PER_YEAR
+
+
+def depreciation_amount(cost=None, procured=None, as_of=None):
+    """
+    SQL expression: accumulated depreciation of one item, capped at its cost.
+    NULL cost or date, or a non-positive cost, depreciate to 0.
+    """
+    cost = Item.cost if cost is None else cost
+    procured = Item.Procured_date if procured is None else procured
+    years = years_owned(procured, as_of)
+    capped_years = case(
+        (years > USEFUL_LIFE_YEARS, literal(USEFUL_LIFE_YEARS)),
+        (years < 0, literal(0.0)),
+        else_=years,
+    )
+    return case(
+        (and_(procured.isnot(None), cost.isnot(None), cost > 0), cost * capped_years * ANNUAL_RATE),
+        else_=0,
+    )
+
@@ -0,0 +1,264 @@
+"""
+On-disk cache of finished export files.
+
+Admins download the same report (same campus, same dates) several times a
+day. Every export file built in a request — and every background job's
+file — is kept in ``EXPORT_CACHE_DIR`` under a key hashing everything that
+decides its contents: format, columns, summaries and options plus the
+normalized filter and the caller's scope (``InventoryFilter.cache_key()``).
+A repeat download of the same key is sent straight from disk with an
+``ETag`` and ``Last-Modified``, so the browser can also revalidate it and
+get a 304.
+
+A file is only valid for the data it was built from. A data-version
+watermark is bumped after every commit touching Item, Room, Campus or
+DataCapturer (``invalidate_on_commit``), and each file records the version
+read *before* its rows were queried, so a commit during the build leaves
+it outdated rather than wrong. The index (keys, versions, sizes, access
+times) is a SQLite file in the cache directory shared by every worker
+process. When the files exceed ``EXPORT_CACHE_MAX_BYTES``, outdated files go
+first, then the least recently downloaded. ``EXPORT_CACHE_MAX_BYTES = 0``
+turns the cache off.
+"""
+import hashlib
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from flask import current_app, has_app_context, send_file
+
+from .cache import ResultCache, invalidate_on_commit
+from .models import Item, Room, Campus, DataCapturer
+
+
+@dataclass
+class CachedExport:
+    """A cached export file and when it was built."""
+    path: str
+    size: int
+    created_at: float
+
+    @property
+    def etag(self):
+        # The file name is key + data version; a rebuild of the same key gets a new time
+        return f"{os.path.basename(self.path)}-{int(self.created_at * 1000)}"
+
+
+class ExportCache:
+    """Size-bounded LRU of export files with a shared data-version watermark."""
+
+    namespace = 'export-files'
+
+    def __init__(self):
+        self.directory = None
+        self.max_bytes = 0
+
+    def init_app(self, app):
+        self.directory = None
+        self.max_bytes = app.config.get('EXPORT_CACHE_MAX_BYTES', 512 * 1024 * 1024)
+        if self.max_bytes <= 0:
+            return
+        directory = app.config.get('EXPORT_CACHE_DIR') or os.path.join(app.instance_path, 'export_cache')
+        try:
+            os.makedirs(directory, exist_ok=True)
+            with self._connect(directory) as conn:
+                conn.execute(
+                    'CREATE TABLE IF NOT EXISTS export_file ('
+                    ' key TEXT NOT NULL, version INTEGER NOT NULL, file TEXT NOT NULL,'
+                    ' size INTEGER NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL,'
+                    ' PRIMARY KEY (key, version))'
+                )
+                conn.execute('CREATE TABLE IF NOT EXISTS data_version (id INTEGER PRIMARY KEY, version INTEGER NOT NULL)')
+                conn.execute('INSERT OR IGNORE INTO data_version (id, version) VALUES (1, 0)')
+        except (OSError, sqlite3.Error) as e:
+            app.logger.warning(f"Export cache disabled: {e}")
+            return
+        self.directory = directory
+
+    @property
+    def enabled(self):
+        return self.directory is not None
+
+    @contextmanager
+    def _connect(self, directory=None):
+        conn = sqlite3.connect(os.path.join(directory or self.directory, 'index.sqlite'),
+                               timeout=5, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    # ----- Keys and versions -----
+
+    @staticmethod
+    def make_key(fmt, columns, filters, summaries=(), **options):
+        """Hex digest naming one export: format, columns, summaries, options, filter and scope."""
+        raw = ResultCache.make_key(fmt, ','.join(columns or ()), ','.join(summaries),
+                                   *sorted(options.items()), filters.cache_key('export'))
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def version(self):
+        """The current data version, or None when it cannot be read (nothing is cached then)."""
+        if not self.enabled:
+            return None
+        try:
+            with self._connect() as conn:
+                return conn.execute('SELECT version FROM data_version WHERE id = 1').fetchone()[0]
+        except sqlite3.Error:
+            return None
+
+    def invalidate(self):
+        """Bump the data version; every file cached so far becomes outdated."""
+        if not self.enabled:
+            return
+        try:
+            with self._connect() as conn:
+                conn.execute('UPDATE data_version SET version = version + 1 WHERE id = 1')
+        except sqlite3.Error as e:
+            # Outdated files could be served; drop the whole index rather than risk that
+            if has_app_context():
+                current_app.logger.error(f"Export cache version bump failed, clearing cache: {e}")
+            self.clear()
+
+    # ----- Files -----
+
+    def get(self, key):
+        """The file cached for ``key`` from the current data version, or None."""
+        if not self.enabled:
+            return None
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    'SELECT f.file, f.size, f.created_at FROM export_file f'
+                    ' JOIN data_version v ON v.id = 1 AND f.version = v.version WHERE f.key = ?',
+                    (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                path = os.path.join(self.directory, row[0])
+                if not os.path.exists(path):
+                    return None
+                conn.execute('UPDATE export_file SET accessed_at = ? WHERE key = ? AND file = ?',
+                             (time.time(), key, row[0]))
+        except sqlite3.Error:
+            return None
+        return CachedExport(path, row[1], row[2])
+
+    def put(self, key, version, path, copy=False):
+        """
+        Cache the finished file at ``path`` (built from data ``version``) as
+        ``key``: it is moved into the cache, or copied when ``copy``. Returns
+        the ``CachedExport``, or None when nothing was cached and ``path`` is
+        left as it was.
+        """
+        if not self.enabled or version is None:
+            return None
+        size = os.path.getsize(path)
+        if size > self.max_bytes:
+            return None
+        name = f"{key}.{version}"
+        target = os.path.join(self.directory, name)
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO export_file (key, version, file, size, created_at, accessed_at)'
+                    ' VALUES (?, ?, ?, ?, ?, ?)',
+                    (key, version, name, size, now, now)
+                )
+        except sqlite3.Error:
+            return None
+
+        # Into a temporary name first, so a concurrent download never sees half a file
+        fd, partial = tempfile.mkstemp(dir=self.directory, suffix='.part')
+        os.close(fd)
+        try:
+            (shutil.copyfile if copy else shutil.move)(path, partial)
+            os.replace(partial, target)
+        except OSError:
+            if os.path.exists(partial):
+                os.remove(partial)
+            self._forget(key, version)
+            return None
+        self._evict()
+        return CachedExport(target, size, now)
+
+    def tee(self, key, version, chunks):
+        """Pass a byte stream through, caching it as ``key`` once it has been sent in full."""
+        if not self.enabled or version is None:
+            yield from chunks
+            return
+        fd, path = tempfile.mkstemp(dir=self.directory, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    yield chunk
+            self.put(key, version, path)
+        finally:
+            # Client went away, or the file was not cached
+            if os.path.exists(path):
+                os.remove(path)
+
+    def clear(self):
+        """Remove every cached file."""
+        if not self.enabled:
+            return
+        try:
+            with self._connect() as conn:
+                files = [row[0] for row in conn.execute('SELECT file FROM export_file')]
+                conn.execute('DELETE FROM export_file')
+        except sqlite3.Error:
+            files = [name for name in os.listdir(self.directory) if not name.startswith('index.sqlite')]
+        for name in files:
+            _remove(os.path.join(self.directory, name))
+
+    def _forget(self, key, version):
+        try:
+            with self._connect() as conn:
+                conn.execute('DELETE FROM export_file WHERE key = ? AND version = ?', (key, version))
+        except sqlite3.Error:
+            pass
+
+    def _evict(self):
+        # Outdated versions can never be served again, so they go first; then least recently used
+        try:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    'SELECT f.key, f.version, f.file, f.size, f.version = v.version FROM export_file f'
+                    ' JOIN data_version v ON v.id = 1'
+                    ' ORDER BY f.version = v.version, f.accessed_at'
+                ).fetchall()
+                total = sum(row[3] for row in rows)
+                for key, version, name, size, current in rows:
+                    if current and total <= self.max_bytes:
+                        break
+                    conn.execute('DELETE FROM export_file WHERE key = ? AND version = ?', (key, version))
+                    _remove(os.path.join(self.directory, name))
+                    total -= size
+        except sqlite3.Error:
+            pass
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+export_cache = ExportCache()
+invalidate_on_commit(export_cache, (Item, Room, Campus, DataCapturer))
+
+
+def send_cached_export(cached, download_name, mimetype):
+    """Send a cached export with ETag / Last-Modified; a matching conditional request gets a 304."""
+    response = send_file(cached.path, as_attachment=True, download_name=download_name, mimetype=mimetype,
+                         conditional=True, etag=cached.etag, last_modified=cached.created_at)
+    # Scoped to the admin who asked for it: browsers may keep it, shared proxies may not
+    response.cache_control.private = True
+    return response
@@ -0,0 +1,313 @@
+"""
+Background inventory export jobs.
+
+Exports larger than ``REPORT_EXPORT_JOB_THRESHOLD`` rows are not built in the
+request. ``enqueue_export()`` records an ``InventoryExport`` (status QUEUED)
+holding the serialized filter, scope and columns, and hands its id to a
+process pool — no broker, just ``concurrent.futures`` with
+``EXPORT_JOB_WORKERS`` worker processes started with ``spawn``. Each worker
+builds a bare app from the web app's config — the database and the export
+settings only, so it gets its own engine and connections but none of the web
+app's start-up work (schema upgrade, index builds, timers) — and runs
+``run_export()``:
+
+* the filter is rebuilt with ``InventoryFilter.from_args()``;
+* rows are fetched with ``export_batches()`` (separate keyset queries, no
+  long-lived cursor) and ``row_count`` is committed after every batch, which
+  is what the progress endpoint polls;
+* the file is written to ``EXPORT_DIR`` and the job is marked DONE with its
+  path, row count and duration — or FAILED with the error;
+* a copy goes into the export cache (``export_cache.py``), so the next
+  request for the same export of unchanged data downloads it immediately
+  instead of queueing another job.
+
+While a job runs, a thread in its worker refreshes ``heartbeat_at`` every
+``HEARTBEAT_INTERVAL`` seconds, however long the export takes.
+
+Finished files are downloadable until ``EXPORT_JOB_TTL`` seconds after
+completion. ``purge_expired_exports()`` (``flask purge-exports``, also run
+whenever a job is queued) deletes older files and marks them EXPIRED. It
+also fails jobs a restart left behind: RUNNING jobs whose heartbeat is
+older than ``EXPORT_JOB_STALE_AFTER`` seconds, and jobs still QUEUED a
+full TTL after they were requested.
+"""
+import json
+import multiprocessing
+import os
+import pickle
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+import click
+from flask import Flask
+from flask.cli import with_appcontext
+from sqlalchemy import and_, func, or_
+
+from .export_cache import export_cache
+from .exports import EXPORT_FORMATS, export_batches, export_summaries, write_export
+from .inventory_filter import InventoryFilter
+from .models import db, InventoryExport, ExportStatus
+
+
+HEARTBEAT_INTERVAL = 30   # seconds between heartbeats of a running job
+
+
+# ==================== Runner ====================
+
+class ExportJobRunner:
+    """Lazily started process pool that runs queued exports."""
+
+    def __init__(self):
+        self.workers = 2
+        self.export_dir = None
+        self.ttl = 86400
+        self.stale_after = 300
+        self.pdf_workers = 1
+        self._config = {}
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.workers = app.config.get('EXPORT_JOB_WORKERS', 2)
+        self.export_dir = app.config.get('EXPORT_DIR') or os.path.join(app.instance_path, 'exports')
+        self.ttl = app.config.get('EXPORT_JOB_TTL', 86400)
+        self.stale_after = app.config.get('EXPORT_JOB_STALE_AFTER', 300)
+        self.pdf_workers = app.config.get('PDF_RENDER_WORKERS', 1)
+        # Workers get the same settings (uppercase keys that pickle)
+        self._config = {}
+        for key, value in app.config.items():
+            if key.isupper():
+                try:
+                    pickle.dumps(value)
+                except Exception:
+                    continue
+                self._config[key] = value
+
+    def submit(self, export_id):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                    initargs=(self._config,),
+                )
+        return self._executor.submit(_run_in_worker, export_id)
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+export_jobs = ExportJobRunner()
+
+_worker_app = None
+
+
+def create_worker_app(config):
+    """Bare app for a worker process: config, database and the export job/cache settings."""
+    app = Flask(__package__)
+    app.config.from_mapping(config)
+    db.init_app(app)
+    export_jobs.init_app(app)
+    export_cache.init_app(app)
+    return app
+
+
+def _init_worker(config):
+    global _worker_app
+    _worker_app = create_worker_app(config)
+
+
+def _run_in_worker(export_id):
+    with _worker_app.app_context():
+        run_export(export_id)
+
+
+# ==================== Jobs ====================
+
+def enqueue_export(fmt, columns, filters, admin_id=None, summaries=('status',)):
+    """Record an export job for ``filters`` and queue it; returns the ``InventoryExport``."""
+    purge_expired_exports()
+    export = InventoryExport(
+        export_format=EXPORT_FORMATS[fmt][0],
+        status=ExportStatus.QUEUED,
+        admin_id=admin_id,
+        row_count=0,
+        parameters=json.dumps({
+            'format': fmt,
+            'columns': list(columns),
+            'summaries': list(summaries),
+            'filters': filters.to_args(),
+            'campus_ids': list(filters.campus_ids) if filters.campus_ids is not None else None,
+            'data_capturer_id': filters.data_capturer_id,
+            'total': filters.summary().total,
+        }),
+    )
+    db.session.add(export)
+    db.session.commit()
+    export_jobs.submit(export.export_id)
+    return export
+
+
+def run_export(export_id):
+    """Build the file for one queued export (runs in a worker process)."""
+    export = db.session.get(InventoryExport, export_id)
+    if export is None or export.status != ExportStatus.QUEUED:
+        return
+    started = time.monotonic()
+    export.status = ExportStatus.RUNNING
+    export.started_at = export.heartbeat_at = datetime.utcnow()
+    db.session.commit()
+    stop_heartbeat = _start_heartbeat(export_id)
+    data_version = export_cache.version()
+
+    params = json.loads(export.parameters)
+    fmt, columns = params['format'], params['columns']
+    path = os.path.join(export_jobs.export_dir, f"export_{export_id}.{EXPORT_FORMATS[fmt][1]}")
+    try:
+        filters = InventoryFilter.from_args(params['filters'], campus_ids=params['campus_ids'],
+                                          data_capturer_id=params['data_capturer_id'])
+        summary_keys = params.get('summaries', ['status'])
+        summaries = export_summaries(filters, summary_keys)
+        os.makedirs(export_jobs.export_dir, exist_ok=True)
+        write_export(fmt, columns, _rows_with_progress(export, filters, columns), summaries, path,
+                     pdf_workers=export_jobs.pdf_workers)
+    except Exception as e:
+        db.session.rollback()
+        export.status = ExportStatus.FAILED
+        export.error = str(e) or e.__class__.__name__
+    else:
+        export.status = ExportStatus.DONE
+        export.file_path = path
+        # Same key as the export_items() request for this export
+        export_cache.put(export_cache.make_key(fmt, columns, filters, summary_keys, summary_only=False, gzip=False),
+                         data_version, path, copy=True)
+    stop_heartbeat()
+    export.duration = time.monotonic() - started
+    export.completed_at = datetime.utcnow()
+    db.session.commit()
+
+
+def _start_heartbeat(export_id):
+    """Refresh the job's ``heartbeat_at`` from a thread until the returned function is called."""
+    engine, table = db.engine, InventoryExport.__table__
+    stopped = threading.Event()
+
+    def beat():
+        while not stopped.wait(HEARTBEAT_INTERVAL):
+            try:
+                # Own connection: the job's session is busy fetching and committing progress
+                with engine.begin() as connection:
+                    connection.execute(table.update()
+                                       .where(table.c.export_id == export_id)
+                                       .values(heartbeat_at=datetime.utcnow()))
+            except Exception:
+                pass
+
+    thread = threading.Thread(target=beat, daemon=True)
+    thread.start()
+
+    def stop():
+        stopped.set()
+        thread.join()
+    return stop
+
+
+def _rows_with_progress(export, filters, columns):
+    written = 0
+    for rows in export_batches(filters, columns):
+        yield from rows
+        written += len(rows)
+        export.row_count = written
+        db.session.commit()
+
+
+def export_progress(export):
+    """JSON-ready status of a job for the polling endpoint."""
+    params = json.loads(export.parameters or '{}')
+    total = params.get('total') or 0
+    done = export.row_count or 0
+    return {
+        'id': export.export_id,
+        'status': export.status.name.lower() if export.status else None,
+        'format': params.get('format'),
+        'row_count': done,
+        'total': total,
+        'percent': 100 if export.status == ExportStatus.DONE else min(99, done * 100 // total) if total else 0,
+        'duration': round(export.duration, 1) if export.duration is not None else None,
+        'error': export.error,
+    }
+
+
+def export_available(export):
+    return export.status == ExportStatus.DONE and bool(export.file_path) and os.path.exists(export.file_path)
+
+
+def available_for():
+    """How long finished files stay downloadable, e.g. ``'a day'`` or ``'6 hours'``."""
+    ttl = export_jobs.ttl
+    for seconds, unit in ((86400, 'day'), (3600, 'hour')):
+        if ttl >= seconds and ttl % seconds == 0:
+            break
+    else:
+        seconds, unit = 60, 'minute'
+    count = max(1, round(ttl / seconds))
+    if count == 1:
+        return 'an hour' if unit == 'hour' else f'a {unit}'
+    return f'{count} {unit}s'
+
+
+def export_download(export):
+    """``(download name, mimetype)`` of a finished export."""
+    _, extension, mimetype = EXPORT_FORMATS[json.loads(export.parameters)['format']]
+    return f"DUT_Inventory_{export.export_date.strftime('%Y%m%d_%H%M')}.{extension}", mimetype
+
+
+# ==================== Expiry ====================
+
+def purge_expired_exports(now=None):
+    """Delete files of jobs finished more than ``EXPORT_JOB_TTL`` seconds ago. Returns how many expired."""
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(seconds=export_jobs.ttl)
+    expired = db.session.scalars(
+        db.select(InventoryExport).where(
+            InventoryExport.status == ExportStatus.DONE,
+            InventoryExport.completed_at < cutoff,
+        )
+    ).all()
+    for export in expired:
+        if export.file_path and os.path.exists(export.file_path):
+            os.remove(export.file_path)
+        export.status = ExportStatus.EXPIRED
+        export.file_path = None
+
+    # Jobs a restart left behind never finish: running ones stop beating, queued
+    # ones (the queue lived in the restarted process) never start
+    stale = db.session.scalars(
+        db.select(InventoryExport).where(or_(
+            and_(InventoryExport.status == ExportStatus.RUNNING,
+                 func.coalesce(InventoryExport.heartbeat_at, InventoryExport.export_date)
+                 < now - timedelta(seconds=export_jobs.stale_after)),
+            and_(InventoryExport.status == ExportStatus.QUEUED, InventoryExport.export_date < cutoff),
+        ))
+    ).all()
+    for export in stale:
+        export.status = ExportStatus.FAILED
+        export.error = 'Export did not finish (worker stopped).'
+
+    if expired or stale:
+        db.session.commit()
+    return len(expired)
+
+
+@click.command('purge-exports')
+@with_appcontext
+def purge_exports_command():
+    """Delete expired export files and fail abandoned export jobs."""
+    count = purge_expired_exports()
+    click.echo(f'Expired {count} export file(s).')
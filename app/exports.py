@@ -0,0 +1,528 @@
+"""
+Streaming inventory exports.
+
+Every export format (xlsx, csv/tsv, pdf) reads the filtered items as plain
+column tuples, never as ORM objects: ``export_rows()`` runs one SELECT of exactly the requested export
+columns over the joined item / room / campus / capturer tables (the
+``InventoryFilter`` statement) and fetches it ``EXPORT_BATCH`` rows at a
+time — a server-side cursor on PostgreSQL — so only one batch is in memory.
+
+Every export column is declared once in ``EXPORT_COLUMNS`` with its SQL
+expression and a converter from the database value to the exported value.
+Writers resolve the converter (and e.g. the cell format) per column before
+the first row instead of inspecting the column name for every cell.
+
+``write_xlsx()`` writes the workbook in xlsxwriter's ``constant_memory``
+mode to a temporary file, so peak memory stays the same for 1k or 1M rows;
+``send_export_file()`` sends that file and deletes it afterwards.
+
+``stream_delimited()`` needs no file at all: CSV/TSV is encoded and sent
+(optionally gzip-compressed) chunk by chunk while the rows are still being
+fetched, so the download starts immediately.
+
+``write_export()`` writes any format to a file instead; background export
+jobs (``export_jobs.py``) use it with ``export_batches()``. Finished files
+and streams are kept in the export cache (``export_cache.py``) so a repeat
+download of unchanged data is sent from disk.
+
+Summary sheets/tables (``SUMMARY_GROUPS``: by item & status, and optionally
+by campus, room or category, each with counts and total cost) are GROUP BY
+queries over the same filter, so they never load detail rows. Passing
+``rows=None`` to a writer produces a summary-only export.
+"""
+import csv
+import io
+import os
+import tempfile
+import zlib
+from datetime import datetime
+from dataclasses import dataclass, field
+from functools import partial
+
+import xlsxwriter
+from flask import Response, send_file, stream_with_context
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A3, landscape
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import cm
+from reportlab.lib.enums import TA_CENTER
+from sqlalchemy import case, func
+
+from .depreciation import depreciation_amount
+from .models import db, Item, Room, Campus, DataCapturer, ExportFormat
+from .pdf_render import render_listing, summary_cells, summary_total, summary_widths
+
+
+EXPORT_BATCH = 2000
+NAVY = '#001F3F'
+
+
+# ==================== Columns ====================
+
+def _text(value):
+    return value or ""
+
+
+def _enum(value):
+    return value.value if value else ""
+
+
+def _money(value):
+    return float(value) if value else 0.0
+
+
+def _rounded_money(value):
+    return round(float(value), 2) if value else 0.0
+
+
+def _date(value):
+    return value.strftime("%Y-%m-%d") if value else ""
+
+
+def _allocated_date(value):
+    return value.strftime("%Y-%m-%d") if value else "Not Allocated"
+
+
+def _net_book_value():
+    return case((Item.cost > 0, Item.cost - depreciation_amount()), else_=0)
+
+
+# label -> (SQL expression factory, converter). Factories are called per
+# export, so date-dependent columns (net book value) use today's date.
+EXPORT_COLUMNS = {
+    "Asset No.": (lambda: Item.asset_number, _text),
+    "Serial No.": (lambda: Item.serial_number, _text),
+    "Name": (lambda: Item.name, _text),
+    "Brand": (lambda: Item.brand, _text),
+    "Color": (lambda: Item.color, _text),
+    "Capacity/Specs": (lambda: Item.capacity, _text),
+    "Category": (lambda: Item.category, _enum),
+    "Cost (R)": (lambda: Item.cost, _money),
+    "Net Book Value (R)": (_net_book_value, _rounded_money),
+    "Status": (lambda: Item.status, _enum),
+    "Captured By": (lambda: DataCapturer.full_name, _text),
+    "Room": (lambda: Room.name, _text),
+    "Campus": (lambda: Campus.name, _text),
+    "Room Staff": (lambda: Room.staff_name, _text),
+    "Staff ID": (lambda: Room.staff_number, _text),
+    "Procured Date": (lambda: Item.Procured_date, _date),
+    "Allocated Date": (lambda: Item.allocated_date, _allocated_date),
+    "Captured Date": (lambda: Item.capture_date, _date),
+}
+
+DEFAULT_COLUMNS = [
+    "Asset No.", "Serial No.", "Name", "Brand", "Color",
+    "Capacity/Specs", "Category", "Cost (R)", "Status",
+    "Room", "Campus", "Room Staff", "Staff ID",
+    "Procured Date", "Allocated Date", "Captured Date",
+]
+
+
+def export_columns(requested):
+    """The requested column labels that exist (in request order), or the defaults."""
+    columns = [label for label in requested if label in EXPORT_COLUMNS]
+    return columns or list(DEFAULT_COLUMNS)
+
+
+def export_rows(filters, columns, batch=EXPORT_BATCH):
+    """Yield one list of converted values per matching item, fetched ``batch`` rows at a time."""
+    expressions = [EXPORT_COLUMNS[label][0]().label(f'c{i}') for i, label in enumerate(columns)]
+    converters = [EXPORT_COLUMNS[label][1] for label in columns]
+    result = db.session.execute(filters.statement(*expressions), execution_options={'yield_per': batch})
+    for row in result:
+        yield [convert(value) for convert, value in zip(converters, row)]
+
+
+def export_batches(filters, columns, batch=EXPORT_BATCH):
+    """
+    Yield the converted rows as lists of up to ``batch`` rows in ``item_id``
+    order. Each batch is its own keyset query (``item_id > last``), so no
+    cursor stays open between batches — for background
+    exports that run for minutes alongside normal writes.
+    """
+    expressions = [Item.item_id] + [EXPORT_COLUMNS[label][0]().label(f'c{i}') for i, label in enumerate(columns)]
+    converters = [EXPORT_COLUMNS[label][1] for label in columns]
+    last_id = 0
+    while True:
+        after = last_id
+        stmt = filters.statement(*expressions)
+        stmt += lambda s: s.where(Item.item_id > after).order_by(Item.item_id).limit(batch)
+        rows = db.session.execute(stmt).all()
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        yield [[convert(value) for convert, value in zip(converters, row[1:])] for row in rows]
+        if len(rows) < batch:
+            return
+
+
+# ==================== Summaries ====================
+
+@dataclass
+class SummaryTable:
+    """One grouped summary of the exported items (a sheet in Excel, a table in PDF)."""
+    title: str
+    sheet: str
+    headers: list
+    rows: list = field(default_factory=list)   # group values..., count, total cost
+
+
+# key -> (title, sheet name, [(header, SQL expression factory, converter)])
+SUMMARY_GROUPS = {
+    'status': ("SUMMARY BY ITEM & STATUS", "Summary",
+               [("Item Name", lambda: Item.name, _text), ("Status", lambda: Item.status, _enum)]),
+    'campus': ("SUMMARY BY CAMPUS", "By Campus",
+               [("Campus", lambda: Campus.name, _text)]),
+    'room': ("SUMMARY BY ROOM", "By Room",
+             [("Campus", lambda: Campus.name, _text), ("Room", lambda: Room.name, _text)]),
+    'category': ("SUMMARY BY CATEGORY", "By Category",
+                 [("Category", lambda: Item.category, _enum)]),
+}
+
+
+def export_summary_keys(requested):
+    """The item & status summary plus any other requested ``SUMMARY_GROUPS``, in declaration order."""
+    return [key for key in SUMMARY_GROUPS if key == 'status' or key in requested]
+
+
+def export_summary(filters, key):
+    """``SummaryTable`` of the matching items grouped by ``SUMMARY_GROUPS[key]``, aggregated in SQL."""
+    title, sheet, groups = SUMMARY_GROUPS[key]
+    expressions = [factory() for _, factory, _ in groups]
+    converters = [convert for _, _, convert in groups]
+    stmt = filters.statement(*expressions, func.count(), func.sum(Item.cost))
+    stmt += lambda s: s.group_by(*expressions).order_by(*expressions)
+
+    table = SummaryTable(title, sheet, [header for header, _, _ in groups] + ["Total Count", "Total Cost (R)"])
+    for row in db.session.execute(stmt):
+        values = [convert(value) for convert, value in zip(converters, row)]
+        table.rows.append(values + [row[-2], _money(row[-1])])
+    return table
+
+
+def export_summaries(filters, keys=('status',)):
+    return [export_summary(filters, key) for key in keys]
+
+
+# ==================== Excel ====================
+
+def _write_text(sheet, row, col, value, cell_format):
+    if value == "":
+        sheet.write_blank(row, col, None, cell_format)
+    else:
+        sheet.write_string(row, col, value, cell_format)
+
+
+def _write_number(sheet, row, col, value, cell_format):
+    sheet.write_number(row, col, value, cell_format)
+
+
+def _cell_writers(workbook, columns):
+    """One ``write(sheet, row, col, value)`` per column, with its format bound."""
+    money_fmt = workbook.add_format({'num_format': 'R#,##0.00', 'border': 1})
+    date_fmt = workbook.add_format({'num_format': 'yyyy-mm-dd', 'border': 1})
+    cell_fmt = workbook.add_format({'border': 1})
+
+    writers = []
+    for label in columns:
+        convert = EXPORT_COLUMNS[label][1]
+        if convert in (_money, _rounded_money):
+            writers.append(partial(_write_number, cell_format=money_fmt))
+        elif convert in (_date, _allocated_date):
+            writers.append(partial(_write_text, cell_format=date_fmt))
+        else:
+            writers.append(partial(_write_text, cell_format=cell_fmt))
+    return writers
+
+
+def _write_workbook(workbook, columns, rows, summaries):
+    header_fmt = workbook.add_format({
+        'bg_color': NAVY, 'font_color': 'white', 'bold': True, 'border': 1,
+        'align': 'center', 'valign': 'vcenter', 'text_wrap': True
+    })
+
+    # Inventory Sheet (rows must be written in order in constant_memory mode)
+    if rows is not None:
+        sheet = workbook.add_worksheet("Inventory")
+        sheet.freeze_panes(1, 0)
+        sheet.set_column(0, len(columns) - 1, 20)
+        for c, label in enumerate(columns):
+            sheet.write_string(0, c, label, header_fmt)
+        writers = list(enumerate(_cell_writers(workbook, columns)))
+        for r, row in enumerate(rows, start=1):
+            for c, write in writers:
+                write(sheet, r, c, row[c])
+
+    # Summary Sheets
+
+    for summary in summaries:
+        _write_summary_sheet(workbook, summary, header_fmt)
+
+
+def _write_summary_sheet(workbook, summary, header_fmt):
+    s = workbook.add_worksheet(summary.sheet)
+    keys = len(summary.headers) - 2
+    s.set_column(0, 0, 50 if keys == 1 or summary.sheet == "Summary" else 30)
+    if keys > 1:
+        s.set_column(1, keys - 1, 20)
+    s.set_column(keys, keys, 18)
+    s.set_column(keys + 1, keys + 1, 20)
+    s.merge_range(0, 0, 0, keys + 1, summary.title,
+                  workbook.add_format({'bold': True, 'size': 18, 'align': 'center', 'font_color': NAVY}))
+    money_fmt = workbook.add_format({'num_format': 'R#,##0.00'})
+    for c, h in enumerate(summary.headers):
+        s.write(4, c, h, header_fmt)
+    for r, row in enumerate(summary.rows, start=5):
+        for c, value in enumerate(row[:-1]):
+            s.write(r, c, value)
+        s.write_number(r, keys + 1, row[-1], money_fmt)
+
+
+def _build_xlsx(path, columns, rows, summaries):
+    workbook = xlsxwriter.Workbook(path, {'constant_memory': True})
+    try:
+        _write_workbook(workbook, columns, rows, summaries)
+    finally:
+        workbook.close()
+
+
+def write_xlsx(columns, rows, summaries, path=None):
+    """
+    Write the Inventory sheet (none when ``rows`` is None: summary only) and
+    one sheet per ``SummaryTable`` to an .xlsx file (a temporary one by
+    default); returns its path.
+    """
+    return _write_file(path, '.xlsx', partial(_build_xlsx, columns=columns, rows=rows, summaries=summaries))
+
+
+# ==================== PDF ====================
+
+def _build_pdf_platypus(path, columns, rows, summaries):
+    # The original Paragraph-per-cell layout; kept as the reference for `flask benchmark-pdf`
+    doc = SimpleDocTemplate(
+        path,
+        pagesize=landscape(A3),
+        topMargin=1.5*cm,
+        bottomMargin=1.5*cm,
+        leftMargin=1*cm,
+        rightMargin=1*cm
+    )
+
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(name='BigTitle', parent=styles['Title'], fontSize=26, textColor=colors.HexColor(NAVY), alignment=TA_CENTER, spaceAfter=30))
+    styles.add(ParagraphStyle(name='Heading', parent=styles['Heading2'], fontSize=18, textColor=colors.HexColor(NAVY), spaceAfter=15))
+    styles.add(ParagraphStyle(name='SumCell', fontSize=12, alignment=TA_CENTER, leading=14))
+    styles.add(ParagraphStyle(name='Hdr', fontSize=9, fontName='Helvetica-Bold', textColor=colors.white, alignment=TA_CENTER, leading=10, wordWrap='CJK'))
+    styles.add(ParagraphStyle(name='Cell', fontSize=9, alignment=TA_CENTER, leading=10))
+
+    elements = []
+    elements.append(Paragraph("DUT INVENTORY REPORT", styles["BigTitle"]))
+    elements.append(Paragraph(f"Generated: {datetime.now().strftime('%d %B %Y at %H:%M')} • Total Items: {summary_total(rows, summaries)}", styles["Normal"]))
+    elements.append(Spacer(1, 1*cm))
+
+    # Summary Tables
+    for summary in summaries:
+        elements.append(Paragraph(summary.title, styles["Heading"]))
+        sum_data = [[Paragraph(f"<b>{h}</b>", styles["SumCell"]) for h in summary.headers]]
+        for row in summary_cells(summary):
+            sum_data.append([Paragraph(v, styles["SumCell"]) for v in row])
+
+        sum_table = Table(sum_data, colWidths=summary_widths(summary))
+        sum_table.setStyle(TableStyle([
+            ('BACKGROUND', (0,0), (-1,0), colors.HexColor(NAVY)),
+            ('TEXTCOLOR', (0,0), (-1,0), colors.white),
+            ('ALIGN', (0,0), (-1,-1), 'CENTER'),
+            ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
+            ('GRID', (0,0), (-1,-1), 0.8, colors.black),
+            ('ROWBACKGROUNDS', (1,0), (-1,-1), [colors.white, colors.HexColor('#f0f4f8')])
+        ]))
+        elements.append(sum_table)
+        elements.append(Spacer(1, 1*cm))
+
+    if rows is None:
+        doc.build(elements)
+        return
+    elements.append(PageBreak())
+
+    # Detailed Table
+    elements.append(Paragraph("DETAILED INVENTORY LISTING", styles["Heading"]))
+    detail_data = [[Paragraph(col, styles["Hdr"]) for col in columns]]
+    for row in rows:
+        detail_data.append([Paragraph(str(v) if v else "-", styles["Cell"]) for v in row])
+
+    # Auto-adjust column width
+    max_width = 37.0  # total width in cm
+    col_width = max_width / len(columns)
+    col_widths = [col_width * cm for _ in columns]
+
+    detail_table = Table(detail_data, colWidths=col_widths, repeatRows=1)
+    detail_table.setStyle(TableStyle([
+        ('BACKGROUND', (0,0), (-1,0), colors.HexColor(NAVY)),
+        ('TEXTCOLOR', (0,0), (-1,0), colors.white),
+        ('ALIGN', (0,0), (-1,-1), 'CENTER'),
+        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
+        ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
+        ('ROWBACKGROUNDS', (1,0), (-1,-1), [colors.white, colors.HexColor('#f8f9fa')])
+    ]))
+    elements.append(detail_table)
+
+    doc.build(elements)
+
+
+def _build_pdf(path, columns, rows, summaries, workers):
+    # Money and plain dates always fit on one line, so their cells are never measured for wrapping
+    no_wrap = [label for label in columns or () if EXPORT_COLUMNS[label][1] in (_money, _rounded_money, _date)]
+    render_listing(path, columns, rows, summaries, no_wrap, workers)
+
+
+def write_pdf(columns, rows, summaries, path=None, workers=1, renderer='fast'):
+    """
+    Write the summary tables and detailed listing (none when ``rows`` is
+    None: summary only) to a PDF file (a temporary one by default); returns
+    its path. ``renderer='platypus'`` uses the original table layout;
+    ``workers`` > 1 lays out the fast renderer's row chunks in parallel.
+    """
+    if renderer == 'platypus':
+        build = partial(_build_pdf_platypus, columns=columns, rows=rows, summaries=summaries)
+    else:
+        build = partial(_build_pdf, columns=columns, rows=rows, summaries=summaries, workers=workers)
+    return _write_file(path, '.pdf', build)
+
+
+# ==================== CSV / TSV ====================
+
+# export format -> csv module dialect
+DELIMITED_DIALECTS = {'csv': 'excel', 'tsv': 'excel-tab'}
+
+
+def _drain(buffer):
+    data = buffer.getvalue().encode('utf-8')
+    buffer.seek(0)
+    buffer.truncate()
+    return data
+
+
+def delimited_chunks(columns, rows, dialect='excel', chunk_rows=EXPORT_BATCH):
+    """UTF-8 encoded header + rows, yielded ``chunk_rows`` rows at a time."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, dialect=dialect)
+    writer.writerow(columns)
+    yield _drain(buffer)   # the header goes out before the first row is fetched
+    for i, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if i % chunk_rows == 0:
+            yield _drain(buffer)
+    yield _drain(buffer)
+
+
+def summary_chunks(summaries, dialect='excel'):
+    """UTF-8 encoded ``SummaryTable``s one after another: title, header and rows, then a blank line."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, dialect=dialect)
+    for summary in summaries:
+        writer.writerow([summary.title])
+        writer.writerow(summary.headers)
+        writer.writerows(summary.rows)
+        writer.writerow([])
+        yield _drain(buffer)
+
+
+def _delimited_body(fmt, columns, rows, summaries):
+    # rows=None: summary-only export
+    if rows is None:
+        return summary_chunks(summaries, DELIMITED_DIALECTS[fmt])
+    return delimited_chunks(columns, rows, DELIMITED_DIALECTS[fmt])
+
+
+def gzip_chunks(chunks, level=6):
+    """Compress a byte stream into one gzip member as it is produced."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_delimited(fmt, columns, rows, download_name, compress=False, summaries=(), tee=None):
+    """
+    Streamed CSV/TSV attachment response (``.gz`` when ``compress``); the
+    summaries when ``rows`` is None. ``tee`` wraps the encoded byte stream,
+    e.g. to keep a copy in the export cache.
+    """
+    body = _delimited_body(fmt, columns, rows, summaries)
+    mimetype = 'text/csv' if fmt == 'csv' else 'text/tab-separated-values'
+    if compress:
+        body = gzip_chunks(body)
+        download_name += '.gz'
+        mimetype = 'application/gzip'
+    if tee is not None:
+        body = tee(body)
+    response = Response(stream_with_context(body), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{download_name}"'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def _build_delimited(path, fmt, columns, rows, summaries, compress):
+    body = _delimited_body(fmt, columns, rows, summaries)
+    if compress:
+        body = gzip_chunks(body)
+    with open(path, 'wb') as f:
+        for chunk in body:
+            f.write(chunk)
+
+
+def write_delimited(fmt, columns, rows, path=None, compress=False, summaries=()):
+    """Write CSV/TSV (gzip-compressed when ``compress``) to a file; returns its path."""
+    suffix = f'.{fmt}.gz' if compress else f'.{fmt}'
+    return _write_file(path, suffix, partial(_build_delimited, fmt=fmt, columns=columns, rows=rows,
+                                             summaries=summaries, compress=compress))
+
+
+# ==================== Files ====================
+
+# export format -> (ExportFormat, file extension, mimetype)
+EXPORT_FORMATS = {
+    'xlsx': (ExportFormat.EXCEL, 'xlsx',
+             'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'pdf': (ExportFormat.PDF, 'pdf', 'application/pdf'),
+    'csv': (ExportFormat.CSV, 'csv', 'text/csv'),
+    'tsv': (ExportFormat.CSV, 'tsv', 'text/tab-separated-values'),
+}
+
+
+def _write_file(path, suffix, write):
+    # write(path) into the given file or a new temporary one; no partial file is left on failure
+    if path is None:
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        os.close(fd)
+    try:
+        write(path)
+    except Exception:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+    return path
+
+
+def write_export(fmt, columns, rows, summaries, path=None, pdf_workers=1):
+    """
+    Write an export of any format in ``EXPORT_FORMATS`` to a file; returns
+    its path. ``rows=None`` writes the summaries only.
+    """
+    if fmt == 'xlsx':
+        return write_xlsx(columns, rows, summaries, path)
+    if fmt == 'pdf':
+        return write_pdf(columns, None if rows is None else list(rows), summaries, path, workers=pdf_workers)
+    return write_delimited(fmt, columns, rows, path, summaries=summaries)
+
+
+# ==================== Sending ====================
+
+def send_export_file(path, download_name, mimetype):
+    """Send a finished export file as an attachment and delete it once sent."""
+    response = send_file(path, as_attachment=True, download_name=download_name, mimetype=mimetype)
+    response.call_on_close(partial(os.remove, path))
+    return response
@@ -0,0 +1,285 @@
+"""
+One inventory filter shared by the inventory view, report, exports and the
+capturer's item list.
+
+``InventoryFilter.from_args(request.args, ...)`` parses the query string once
+(``FILTER_ARGS`` declares every accepted argument, its parser and the message
+shown when it is invalid), and the filter then produces:
+
+* ``statement()`` – a ``lambda_stmt`` selecting the matching items (or any
+  columns) with room, campus and capturer joined. Each criterion is a
+  separate lambda, so SQLAlchemy caches the built statement per combination
+  of filters and only re-binds the values;
+* ``count_statement()`` – ``count(*)`` of the same rows;
+* ``summary()`` – per-status and per-category counts and the total cost of
+  every matching row (one grouped query, cached like the list counts);
+* ``to_args()`` / ``cache_key()`` – the normalized filter state, for links
+  and for caching results per filter.
+
+Status and category accept the enum name (``needs_repair``) or its value
+(``Needs Repair``), case-insensitively.
+"""
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from functools import partial
+
+from sqlalchemy import lambda_stmt, select, func, or_
+
+from .cache import ResultCache
+from .loaders import joined_item_row_loaders
+from .models import db, Item, Room, Campus, DataCapturer, ItemStatus, ItemCategory
+from .pagination import count_cache
+from .search import search_hits
+from .substring import contains
+
+
+# ==================== Parsers ====================
+
+def _parse_text(raw):
+    return raw
+
+
+def _parse_int(raw):
+    return int(raw)
+
+
+def _parse_enum(enum_class, raw):
+    for member in enum_class:
+        if raw.lower() in (member.name.lower(), member.value.lower()):
+            return member
+    raise KeyError(raw)
+
+
+def _parse_decimal(raw):
+    return Decimal(raw)
+
+
+def _parse_date(raw):
+    return datetime.strptime(raw, '%Y-%m-%d').date()
+
+
+# query-string argument -> (parser, message flashed when it does not parse)
+FILTER_ARGS = {
+    'campus_id': (_parse_int, 'Invalid campus filter.'),
+    'room_id': (_parse_int, 'Invalid room filter.'),
+    'status': (partial(_parse_enum, ItemStatus), 'Invalid status filter.'),
+    'category': (partial(_parse_enum, ItemCategory), 'Invalid category selected.'),
+    'staff': (_parse_text, None),
+    'capturer': (_parse_text, None),
+    'asset_number': (_parse_text, None),
+    'item_name': (_parse_text, None),
+    'min_cost': (_parse_decimal, 'Invalid minimum cost.'),
+    'max_cost': (_parse_decimal, 'Invalid maximum cost.'),
+    'date_from': (_parse_date, "Invalid 'From' procurement date."),
+    'date_to': (_parse_date, "Invalid 'To' procurement date."),
+    'alloc_from': (_parse_date, "Invalid 'Allocated From' date."),
+    'alloc_to': (_parse_date, "Invalid 'Allocated To' date."),
+    'q': (_parse_text, None),
+}
+
+
+def _format_arg(value):
+    if isinstance(value, (ItemStatus, ItemCategory)):
+        return value.name.lower()
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+# ==================== Summary ====================
+
+@dataclass
+class InventorySummary:
+    """Totals over every item matching a filter, not just the page shown."""
+    total: int = 0
+    total_value: Decimal = Decimal(0)
+    by_status: dict = field(default_factory=dict)      # ItemStatus name -> count
+    by_category: dict = field(default_factory=dict)    # ItemCategory name -> count
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build from ``(status, category, count, sum(cost))`` groups."""
+        summary = cls()
+        for status, category, count, value in rows:
+            summary.total += count
+            summary.total_value += value or 0
+            summary.by_status[status.name] = summary.by_status.get(status.name, 0) + count
+            summary.by_category[category.name] = summary.by_category.get(category.name, 0) + count
+        return summary
+
+
+# ==================== Filter ====================
+
+@dataclass
+class InventoryFilter:
+    """Parsed inventory filters plus the caller's scope (campuses / capturer)."""
+    campus_id: int = None
+    room_id: int = None
+    status: ItemStatus = None
+    category: ItemCategory = None
+    staff: str = None
+    capturer: str = None
+    asset_number: str = None
+    item_name: str = None
+    min_cost: Decimal = None
+    max_cost: Decimal = None
+    date_from: date = None
+    date_to: date = None
+    alloc_from: date = None
+    alloc_to: date = None
+    q: str = None
+
+    # Scope, set by the route rather than the query string
+    campus_ids: tuple = None          # None = every campus
+    data_capturer_id: int = None
+
+    errors: list = field(default_factory=list, compare=False, repr=False)
+    _hits: object = field(default=None, compare=False, repr=False)
+
+    @classmethod
+    def from_args(cls, args, campus_ids=None, data_capturer_id=None, excluded_statuses=()):
+        """
+        Parse ``args`` (e.g. ``request.args``). Empty and ``all`` values are
+        ignored; unparseable values are skipped and reported in ``errors``.
+        A campus outside ``campus_ids`` and any status in
+        ``excluded_statuses`` are ignored.
+        """
+        flt = cls(
+            campus_ids=tuple(sorted(campus_ids)) if campus_ids is not None else None,
+            data_capturer_id=data_capturer_id,
+        )
+        for name, (parser, message) in FILTER_ARGS.items():
+            raw = (args.get(name) or '').strip()
+            if not raw or raw.lower() == 'all':
+                continue
+            try:
+                value = parser(raw)
+            except (ValueError, KeyError, InvalidOperation):
+                if message:
+                    flt.errors.append(message)
+                continue
+            setattr(flt, name, value)
+
+        if flt.campus_ids is not None and flt.campus_id not in flt.campus_ids:
+            flt.campus_id = None
+        if flt.status in excluded_statuses:
+            flt.status = None
+        return flt
+
+    # ----- State -----
+
+    def to_args(self):
+        """The active filters as normalized query-string values."""
+        return {
+            name: _format_arg(getattr(self, name))
+            for name in FILTER_ARGS
+            if getattr(self, name) is not None
+        }
+
+    @property
+    def has_filters(self):
+        return any(getattr(self, name) is not None for name in FILTER_ARGS)
+
+    def cache_key(self, namespace):
+        """A stable key for results of this filter within its scope."""
+        scope = 'all' if self.campus_ids is None else ','.join(str(c) for c in self.campus_ids)
+        return ResultCache.make_key(namespace, scope, self.data_capturer_id or '',
+                                    *sorted(self.to_args().items()))
+
+    @property
+    def hits(self):
+        """The full-text ``(item_id, score)`` subquery for ``q``, or None."""
+        if self._hits is None and self.q:
+            self._hits = search_hits(self.q)
+        return self._hits
+
+    # ----- Statements -----
+
+    def statement(self, *columns):
+        """
+        ``lambda_stmt`` selecting the matching items (with room, campus and
+        capturer eager-loaded from the joins), or ``columns`` when given.
+        """
+        if columns:
+            stmt = lambda_stmt(lambda: select(*columns).select_from(Item))
+        else:
+            stmt = lambda_stmt(lambda: select(Item).options(*joined_item_row_loaders()))
+        stmt += lambda s: s.join(Room, Item.room_id == Room.room_id) \
+            .join(Campus, Room.campus_id == Campus.campus_id) \
+            .outerjoin(DataCapturer, Item.data_capturer_id == DataCapturer.data_capturer_id)
+        return self._apply(stmt)
+
+    def count_statement(self):
+        return self.statement(func.count())
+
+    def summary_statement(self):
+        stmt = self.statement(Item.status, Item.category, func.count(), func.sum(Item.cost))
+        stmt += lambda s: s.group_by(Item.status, Item.category)
+        return stmt
+
+    def summary(self):
+        """``InventorySummary`` of the matching items, cached until the next Item/Room commit."""
+        def compute():
+            return InventorySummary.from_rows(db.session.execute(self.summary_statement()))
+        return count_cache.get_or_compute(self.cache_key('summary'), compute)
+
+    def _apply(self, stmt):
+        # Every value is copied to a local so each lambda closes over plain
+        # values/SQL elements, which SQLAlchemy tracks as bound parameters.
+        if self.campus_ids is not None:
+            campus_ids = list(self.campus_ids)
+            stmt += lambda s: s.where(Item.campus_id.in_(campus_ids))
+        if self.data_capturer_id is not None:
+            data_capturer_id = self.data_capturer_id
+            stmt += lambda s: s.where(Item.data_capturer_id == data_capturer_id)
+        if self.campus_id is not None:
+            campus_id = self.campus_id
+            stmt += lambda s: s.where(Item.campus_id == campus_id)
+        if self.room_id is not None:
+            room_id = self.room_id
+            stmt += lambda s: s.where(Item.room_id == room_id)
+        if self.status is not None:
+            status = self.status
+            stmt += lambda s: s.where(Item.status == status)
+        if self.category is not None:
+            category = self.category
+            stmt += lambda s: s.where(Item.category == category)
+
+        if self.staff:
+            staff_match = or_(contains(Room.staff_name, self.staff), contains(Room.staff_number, self.staff))
+            stmt += lambda s: s.where(staff_match)
+        if self.capturer:
+            capturer_match = or_(contains(DataCapturer.full_name, self.capturer),
+                                 contains(DataCapturer.student_number, self.capturer))
+            stmt += lambda s: s.where(capturer_match)
+        if self.asset_number:
+            asset_match = contains(Item.asset_number, self.asset_number)
+            stmt += lambda s: s.where(asset_match)
+        if self.item_name:
+            name_match = contains(Item.name, self.item_name)
+            stmt += lambda s: s.where(name_match)
+
+        if self.min_cost is not None:
+            min_cost = self.min_cost
+            stmt += lambda s: s.where(Item.cost >= min_cost)
+        if self.max_cost is not None:
+            max_cost = self.max_cost
+            stmt += lambda s: s.where(Item.cost <= max_cost)
+        if self.date_from is not None:
+            date_from = self.date_from
+            stmt += lambda s: s.where(Item.Procured_date >= date_from)
+        if self.date_to is not None:
+            date_to = self.date_to
+            stmt += lambda s: s.where(Item.Procured_date <= date_to)
+        if self.alloc_from is not None:
+            alloc_from = self.alloc_from
+            stmt += lambda s: s.where(Item.allocated_date >= alloc_from)
+        if self.alloc_to is not None:
+            alloc_to = self.alloc_to
+            stmt += lambda s: s.where(Item.allocated_date <= alloc_to)
+
+        hits = self.hits
+        if hits is not None:
+            stmt += lambda s: s.join(hits, hits.c.item_id == Item.item_id)
+        return stmt
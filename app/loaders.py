@@ -0,0 +1,37 @@
+"""
+Loader-option profiles for pages that list items.
+
+Item list templates show each row's room, campus, responsible staff and
+capturer. Without loader options every row lazy-loads ``item.room``,
+``item.room.campus`` and ``item.data_capturer`` (N+1 queries). Apply one of
+these profiles to the ``select(Item)`` instead:
+
+* ``item_row_loaders()`` – joined eager loads, for statements that select
+  ``Item`` on its own;
+* ``joined_item_row_loaders()`` – ``contains_eager``, for statements that
+  already JOIN room and campus and OUTER JOIN data_capturer (for filtering),
+  so the relationships are filled from those joins with no extra SQL.
+
+All three relationships are many-to-one, so joined loading adds columns, not
+rows, and works with LIMIT/keyset pagination. The capturer's
+``assigned_campuses`` (eager by default) is left lazy; list rows never show
+it. The profiles are functions because
+``Item.room`` is a backref that only exists once the mappers are configured.
+"""
+from sqlalchemy.orm import joinedload, contains_eager
+
+from .models import Item, Room, DataCapturer
+
+
+def item_row_loaders():
+    return (
+        joinedload(Item.room).joinedload(Room.campus),
+        joinedload(Item.data_capturer).lazyload(DataCapturer.assigned_campuses),
+    )
+
+
+def joined_item_row_loaders():
+    return (
+        contains_eager(Item.room).contains_eager(Room.campus),
+        contains_eager(Item.data_capturer).lazyload(DataCapturer.assigned_campuses),
+    )
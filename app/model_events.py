@@ -0,0 +1,178 @@
+"""
+ORM hooks that keep denormalized columns in sync.
+
+* ``Item.campus_id`` mirrors ``Room.campus_id`` of the item's room. It is set
+  when an item is captured or moved, and rewritten for every item in a room
+  when that room is moved to another campus.
+* ``Room.item_count`` / ``Room.active_item_count`` are adjusted by +/- deltas
+  for every item insert, delete, move and status change. Bulk statements
+  bypass the ORM, so anything that writes ``item`` rows in bulk must call
+  ``reconcile_room_counts()`` (also available as ``flask reconcile-room-counts``).
+
+These hooks, and the rollup hook in rollups.py, diff an item's values before
+and after the flush. Items moved through ``item.room = room`` get their
+``room_id`` before the diff, and the tracked columns always load their old
+value when set, even if it had expired on a previous commit.
+"""
+from collections import defaultdict
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import event, inspect, update, select, func, case, bindparam
+from sqlalchemy.orm import Session
+
+from .models import db, Item, Room, ItemStatus
+
+
+# Columns whose old value the flush hooks need (see rollups.ROLLUP_FIELDS)
+TRACKED_ITEM_FIELDS = ('room_id', 'status', 'category', 'Procured_date', 'cost')
+
+
+def _load_old_value(target, value, oldvalue, initiator):
+    # Registering with active_history=True is the point: the old value is
+    # loaded before it is replaced, so it shows up in the attribute history
+    pass
+
+
+for _name in TRACKED_ITEM_FIELDS:
+    event.listen(getattr(Item, _name), 'set', _load_old_value, active_history=True)
+
+
+def _room_campus_id(session, room_id):
+    room = session.get(Room, room_id)
+    return room.campus_id if room else None
+
+
+@event.listens_for(Session, 'before_flush')
+def _sync_item_room_id(session, flush_context, instances):
+    """Copy ``item.room`` onto ``item.room_id``, which the flush would only set on its own."""
+    with session.no_autoflush:
+        for obj in list(session.new) + list(session.dirty):
+            if not isinstance(obj, Item) or not inspect(obj).attrs.room.history.has_changes():
+                continue
+            # Read first: loads the committed room_id if it had expired
+            old_room_id, room = obj.room_id, obj.room
+            # A room added in this flush has no id yet; the flush fills it in
+            if room is not None and room.room_id is not None and old_room_id != room.room_id:
+                obj.room_id = room.room_id
+
+
+@event.listens_for(Session, 'before_flush')
+def _sync_item_campus(session, flush_context, instances):
+    """Copy the room's campus onto new and moved items."""
+    with session.no_autoflush:
+        for obj in session.new:
+            if isinstance(obj, Item) and obj.room_id is not None:
+                obj.campus_id = _room_campus_id(session, obj.room_id)
+
+        for obj in session.dirty:
+            if isinstance(obj, Item) and inspect(obj).attrs.room_id.history.has_changes():
+                obj.campus_id = _room_campus_id(session, obj.room_id)
+
+
+@event.listens_for(Session, 'after_flush')
+def _sync_room_items_campus(session, flush_context):
+    """A room moved to another campus takes all of its items with it."""
+    for obj in session.dirty:
+        if isinstance(obj, Room) and inspect(obj).attrs.campus_id.history.has_changes():
+            session.connection().execute(
+                update(Item.__table__)
+                .where(Item.__table__.c.room_id == obj.room_id)
+                .values(campus_id=obj.campus_id)
+            )
+
+
+# ==================== Room item counters ====================
+
+def _room_slot(item, use_old):
+    """(room_id, is_active) of an item, before or after the flush."""
+    state = inspect(item)
+    values = []
+    for name in ('room_id', 'status'):
+        history = state.attrs[name].history
+        values.append(history.deleted[0] if use_old and history.deleted else getattr(item, name))
+    room_id, status = values
+    return room_id, status == ItemStatus.ACTIVE
+
+
+def _add_count_delta(deltas, slot, sign):
+    room_id, is_active = slot
+    if room_id is None:
+        return
+    deltas[room_id][0] += sign
+    if is_active:
+        deltas[room_id][1] += sign
+
+
+@event.listens_for(Session, 'after_flush')
+def _maintain_room_counts(session, flush_context):
+    """Apply this flush's item inserts/moves/status changes/deletes to the room counters."""
+    deltas = defaultdict(lambda: [0, 0])
+
+    for obj in session.new:
+        if isinstance(obj, Item):
+            _add_count_delta(deltas, _room_slot(obj, use_old=False), +1)
+
+    for obj in session.dirty:
+        if isinstance(obj, Item):
+            old, new = _room_slot(obj, use_old=True), _room_slot(obj, use_old=False)
+            if old != new:
+                _add_count_delta(deltas, old, -1)
+                _add_count_delta(deltas, new, +1)
+
+    for obj in session.deleted:
+        if isinstance(obj, Item):
+            _add_count_delta(deltas, _room_slot(obj, use_old=True), -1)
+
+    changes = [
+        {'target_room_id': room_id, 'total_delta': total, 'active_delta': active}
+        for room_id, (total, active) in deltas.items() if total or active
+    ]
+    if not changes:
+        return
+
+    table = Room.__table__
+    session.connection().execute(
+        update(table)
+        .where(table.c.room_id == bindparam('target_room_id'))
+        .values(
+            item_count=table.c.item_count + bindparam('total_delta'),
+            active_item_count=table.c.active_item_count + bindparam('active_delta'),
+        ),
+        changes
+    )
+
+    # Rooms already loaded in this session must re-read their counters
+    for change in changes:
+        room = session.identity_map.get(session.identity_key(Room, change['target_room_id']))
+        if room is not None:
+            session.expire(room, ['item_count', 'active_item_count'])
+
+
+def reconcile_room_counts(connection=None):
+    """Recompute every room's counters from ``item`` in one UPDATE. Returns the number of rooms."""
+    rooms, items = Room.__table__, Item.__table__
+    total = (
+        select(func.count())
+        .where(items.c.room_id == rooms.c.room_id)
+        .scalar_subquery()
+    )
+    active = (
+        select(func.coalesce(func.sum(case((items.c.status == ItemStatus.ACTIVE, 1), else_=0)), 0))
+        .where(items.c.room_id == rooms.c.room_id)
+        .scalar_subquery()
+    )
+    stmt = update(rooms).values(item_count=total, active_item_count=active)
+    if connection is not None:
+        return connection.execute(stmt).rowcount
+    count = db.session.execute(stmt).rowcount
+    db.session.commit()
+    return count
+
+
+@click.command('reconcile-room-counts')
+@with_appcontext
+def reconcile_room_counts_command():
+    """Recompute Room.item_count / Room.active_item_count from the item table."""
+    count = reconcile_room_counts()
+    click.echo(f'Reconciled item counters for {count} rooms.')
@@ -38,6 +38,15 @@ class ExportFormat(enum.Enum):
     EXCEL = 'Excel'
 
 
+class ExportStatus(enum.Enum):
+    """Lifecycle of a background export job."""
+    QUEUED = 'Queued'
+    RUNNING = 'Running'
+    DONE = 'Done'
+    FAILED = 'Failed'
+    EXPIRED = 'Expired'
+
+
 # --- Association Tables for Many-to-Many Relationships ---
 
 admin_campus_association = db.Table('admin_campus_association',
@@ -109,6 +118,9 @@ class DataCapturer(db.Model, UserMixin):
 
     admin_id = db.Column(db.Integer, db.ForeignKey('admin.admin_id'), nullable=True) 
 
+    # Last heartbeat, written in batches by presence.py (drives the "online" count)
+    last_seen = db.Column(db.DateTime, nullable=True, index=True)
+
     items = db.relationship('Item', backref='data_capturer', lazy=True)
     exports = db.relationship('InventoryExport', backref='data_capturer', lazy=True)
     assigned_campuses = db.relationship('Campus', secondary=capturer_campus_association, lazy='subquery',
@@ -172,6 +184,15 @@ class Room(db.Model):
     is_active = db.Column(db.Boolean, default=True, nullable=False)
     deletion_reason = db.Column(db.Text, nullable=True)
 
+    # Denormalized counters, kept in sync by the ORM hooks in model_events.py
+    item_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    active_item_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    # Rooms of a campus and the case-insensitive duplicate room-name check
+    __table_args__ = (
+        db.Index('ix_room_campus_name_lower', 'campus_id', db.func.lower(name)),
+    )
+
     def __repr__(self):
         return f'<Room(ID={self.room_id}, Name={self.name}, Campus ID={self.campus_id})>'
 
@@ -199,10 +220,34 @@ class Item(db.Model):
 
     data_capturer_id = db.Column(db.Integer, db.ForeignKey('data_capturer.data_capturer_id'), nullable=True)
     room_id = db.Column(db.Integer, db.ForeignKey('room.room_id'), nullable=False)
+
+    # Denormalized copy of room.campus_id so campus-scoped queries need no Room join.
+    # Kept in sync by the ORM hooks in model_events.py.
+    campus_id = db.Column(db.Integer, db.ForeignKey('campus.campus_id'), nullable=True)
     
     disposed_by_admin_id = db.Column(db.Integer, db.ForeignKey('admin.admin_id'), nullable=True)
     disposed_by_admin = db.relationship('Admin', foreign_keys=[disposed_by_admin_id], backref='disposed_items')
 
+    # Hot query paths; added to existing databases by schema.upgrade_schema()
+    # and checked with `flask check-query-plans`.
+    __table_args__ = (
+        # Campus-scoped dashboard / list filters
+        db.Index('ix_item_campus_status', 'campus_id', 'status'),
+        db.Index('ix_item_campus_capture_date', 'campus_id', 'capture_date'),
+        db.Index('ix_item_campus_category', 'campus_id', 'category'),
+        # Unscoped (Super Admin) filters and sorts
+        db.Index('ix_item_status_cost', 'status', 'cost'),
+        db.Index('ix_item_capture_date', 'capture_date'),
+        db.Index('ix_item_procured_date', 'Procured_date'),
+        db.Index('ix_item_allocated_date', 'allocated_date'),
+        # Room contents and room counters
+        db.Index('ix_item_room_status', 'room_id', 'status'),
+        # A capturer's items, newest first (my_items)
+        db.Index('ix_item_capturer_capture_date', 'data_capturer_id', 'capture_date'),
+        # Case-insensitive duplicate asset-number checks
+        db.Index('ix_item_asset_number_lower', db.func.lower(asset_number)),
+    )
+
     def __repr__(self):
         return f'<Item(ID={self.item_id}, Name={self.name}, Status={self.status.value})>'
 
@@ -215,7 +260,19 @@ class InventoryExport(db.Model):
     export_format = db.Column(SQLAlchemyEnum(ExportFormat), nullable=False)
 
     data_capturer_id = db.Column(db.Integer, db.ForeignKey('data_capturer.data_capturer_id'), nullable=True)
-    
+
+    # Background export jobs (see export_jobs.py). Nullable so upgrade_schema can add them.
+    admin_id = db.Column(db.Integer, db.ForeignKey('admin.admin_id'), nullable=True)
+    status = db.Column(SQLAlchemyEnum(ExportStatus, native_enum=False, length=16), nullable=True)
+    parameters = db.Column(db.Text, nullable=True)         # JSON: format, columns, filters, scope
+    row_count = db.Column(db.Integer, nullable=True)       # rows written so far / in total
+    duration = db.Column(db.Float, nullable=True)          # seconds
+    file_path = db.Column(db.String(500), nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    completed_at = db.Column(db.DateTime, nullable=True)
+    started_at = db.Column(db.DateTime, nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)   # refreshed by the worker while RUNNING
+
     def __repr__(self):
         return f'<InventoryExport(ID={self.export_id}, Format={self.export_format.value}, Date={self.export_date.date()})>'
 
@@ -229,6 +286,39 @@ class ItemMovement(db.Model):
     to_room_id = db.Column(db.Integer, db.ForeignKey('room.room_id'), nullable=False)
     moved_by_id = db.Column(db.Integer, db.ForeignKey('data_capturer.data_capturer_id'), nullable=False)
     move_date = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
-    
+
+    __table_args__ = (
+        db.Index('ix_item_movement_item_date', 'item_id', 'move_date'),
+        db.Index('ix_item_movement_to_room_date', 'to_room_id', 'move_date'),
+        db.Index('ix_item_movement_move_date', 'move_date'),
+    )
+
+    def __repr__(self):
+        return f'<ItemMovement(ID={self.movement_id}, Item ID={self.item_id}, From={self.from_room_id}, To={self.to_room_id})>'
+
+
+class InventoryRollup(db.Model):
+    """
+    Pre-aggregated item counts and cost totals per
+    (campus, room, category, status, procurement month).
+    Maintained incrementally by the after_flush hook in rollups.py.
+    """
+    __tablename__ = 'inventory_rollup'
+    rollup_id = db.Column(db.Integer, primary_key=True)
+    campus_id = db.Column(db.Integer, db.ForeignKey('campus.campus_id'), nullable=False, index=True)
+    room_id = db.Column(db.Integer, db.ForeignKey('room.room_id'), nullable=False, index=True)
+    category = db.Column(SQLAlchemyEnum(ItemCategory), nullable=False)
+    status = db.Column(SQLAlchemyEnum(ItemStatus), nullable=False)
+    procured_month = db.Column(db.Date, nullable=False)  # First day of the procurement month
+
+    item_count = db.Column(db.Integer, default=0, nullable=False)
+    total_cost = db.Column(db.Numeric(14, 2), default=0, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('campus_id', 'room_id', 'category', 'status', 'procured_month',
+                            name='uq_inventory_rollup_key'),
+    )
+
     def __repr__(self):
-        return f'<ItemMovement(ID={self.movement_id}, Item ID={self.item_id}, From={self.from_room_id}, To={self.to_room_id})>'
\ No newline at end of file
+        return (f'<InventoryRollup(Campus={self.campus_id}, Room={self.room_id}, '
+                f'Status={self.status.value}, Month={self.procured_month}, Count={self.item_count})>')
\ No newline at end of file
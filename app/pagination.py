@@ -0,0 +1,180 @@
+"""
+Keyset (seek) pagination for large list pages.
+
+Instead of ``OFFSET``, each page continues from the sort-key values of the
+last row of the previous page (``WHERE (k1, k2, ...) > (:v1, :v2, ...)``),
+so page 2,000 costs the same as page 1 and rows never shift between pages.
+
+A sort is a list of ``(expression, descending)`` pairs ending with a unique
+column (the primary key), so the ordering is total. Expressions must never
+be NULL; wrap nullable columns in ``coalesce``. Cursors are the last/first
+row's key values, signed with the app secret so they cannot be tampered with.
+
+Statements may be plain selects or ``lambda_stmt`` chains (see
+``InventoryFilter``); paging criteria are appended as further lambdas so the
+compiled SQL stays cached.
+
+Total counts come from ``count_rows()``, which runs a separate ``count(*)``
+statement and caches it in ``count_cache`` until the next Item/Room commit.
+"""
+import enum
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal
+
+from flask import current_app
+from itsdangerous import BadSignature, URLSafeSerializer
+from sqlalchemy import and_, or_, lambda_stmt
+from sqlalchemy.sql.lambdas import StatementLambdaElement
+
+from .cache import ResultCache, invalidate_on_commit
+from .models import db, Item, Room, DataCapturer
+
+
+DEFAULT_PER_PAGE = 50
+MAX_PER_PAGE = 500
+
+count_cache = ResultCache('list-count', 'LIST_COUNT_CACHE')
+invalidate_on_commit(count_cache, (Item, Room, DataCapturer))
+
+
+@dataclass
+class KeysetPage:
+    """One page of results plus the cursors needed to move either way."""
+    items: list = field(default_factory=list)
+    per_page: int = DEFAULT_PER_PAGE
+    next_cursor: str = None
+    prev_cursor: str = None
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+
+# ==================== Cursor encoding ====================
+
+def _serializer():
+    return URLSafeSerializer(current_app.secret_key, salt='keyset-cursor')
+
+
+def _dump_value(value):
+    if isinstance(value, enum.Enum):
+        return ['e', value.name]
+    if isinstance(value, datetime):
+        return ['dt', value.isoformat()]
+    if isinstance(value, date):
+        return ['d', value.isoformat()]
+    if isinstance(value, Decimal):
+        return ['n', str(value)]
+    return ['v', value]
+
+
+def _load_value(tagged, expression):
+    tag, value = tagged
+    if tag == 'e':
+        return expression.type.enum_class[value]
+    if tag == 'dt':
+        return datetime.fromisoformat(value)
+    if tag == 'd':
+        return date.fromisoformat(value)
+    if tag == 'n':
+        return Decimal(value)
+    return value
+
+
+def encode_cursor(sort_name, values):
+    return _serializer().dumps([sort_name, [_dump_value(v) for v in values]])
+
+
+def decode_cursor(token, sort_name, keys):
+    """Return the key values stored in ``token``, or None if it is invalid or for another sort."""
+    if not token:
+        return None
+    try:
+        name, values = _serializer().loads(token)
+        if name != sort_name or len(values) != len(keys):
+            return None
+        return [_load_value(v, expr) for v, (expr, _) in zip(values, keys)]
+    except (BadSignature, ValueError, KeyError, TypeError):
+        return None
+
+
+# ==================== Paging ====================
+
+def _seek_condition(keys, values, forward):
+    """Rows strictly after (forward) or before the given key values in sort order."""
+    clauses = []
+    for i, (expression, descending) in enumerate(keys):
+        beyond = expression > values[i] if descending != forward else expression < values[i]
+        clauses.append(and_(*[keys[j][0] == values[j] for j in range(i)], beyond))
+    return or_(*clauses)
+
+
+def reverse_keys(keys):
+    return [(expression, not descending) for expression, descending in keys]
+
+
+def clamp_per_page(value, default=DEFAULT_PER_PAGE):
+    try:
+        return max(1, min(int(value), MAX_PER_PAGE))
+    except (TypeError, ValueError):
+        return default
+
+
+def _as_lambda(stmt):
+    if isinstance(stmt, StatementLambdaElement):
+        return stmt
+    return lambda_stmt(lambda: stmt)
+
+
+def keyset_paginate(stmt, sort_name, keys, per_page=DEFAULT_PER_PAGE, after=None, before=None):
+    """
+    Fetch one page of ``stmt`` (a single-entity select or lambda statement)
+    ordered by ``keys``. ``after`` / ``before`` are cursors from a previous
+    page; without either the first page is returned.
+    """
+    after_values = decode_cursor(after, sort_name, keys)
+    before_values = None if after_values else decode_cursor(before, sort_name, keys)
+    backwards = before_values is not None
+
+    order = reverse_keys(keys) if backwards else keys
+    labelled = [expression.label(f'_k{i}') for i, (expression, _) in enumerate(keys)]
+    ordering = [expression.desc() if descending else expression.asc() for expression, descending in order]
+    limit = per_page + 1
+    page_stmt = _as_lambda(stmt) + (lambda s: s.add_columns(*labelled).order_by(*ordering).limit(limit))
+    if after_values:
+        seek = _seek_condition(keys, after_values, forward=True)
+        page_stmt += lambda s: s.where(seek)
+    elif backwards:
+        seek = _seek_condition(keys, before_values, forward=False)
+        page_stmt += lambda s: s.where(seek)
+
+    rows = db.session.execute(page_stmt).all()
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    page = KeysetPage(items=[row[0] for row in rows], per_page=per_page)
+    if rows:
+        first_key, last_key = list(rows[0][1:]), list(rows[-1][1:])
+        # Paging backwards there is always a next page (the one we came from);
+        # paging forwards there is a previous page whenever we started from a cursor
+        has_next = True if backwards else more
+        has_prev = more if backwards else after_values is not None
+        if has_next:
+            page.next_cursor = encode_cursor(sort_name, last_key)
+        if has_prev:
+            page.prev_cursor = encode_cursor(sort_name, first_key)
+    return page
+
+
+def count_rows(count_stmt, cache_key):
+    """Run a ``count(*)`` statement, cached under ``cache_key`` until the data changes."""
+    def compute():
+        return db.session.execute(count_stmt).scalar() or 0
+    return count_cache.get_or_compute(cache_key, compute)
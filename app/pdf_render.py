@@ -0,0 +1,382 @@
+"""
+Fast-path PDF renderer for the inventory listing.
+
+The platypus build (one ``Paragraph`` per cell in one ``Table``) spends most
+of its time parsing markup and re-splitting the table at every page break,
+so it slows down more than linearly with the row count. ``render_listing()``
+draws the same report without platypus:
+
+* cells are plain strings; a cell is wrapped only when its column may need
+  it (money and plain-date columns never do) and it is wider than the
+  column. Widths of repeated values are measured once;
+* rows are laid out (lines and row heights) in chunks of ``PDF_CHUNK_ROWS``
+  and then cut into pages of fixed height;
+* each page is rendered on its own, straight to PDF operators (header,
+  row stripes, one grid path and one text object), ``PDF_CHUNK_PAGES``
+  pages per task.
+
+Layout chunks and page chunks depend on nothing outside themselves, so with
+``workers`` > 1 both run in a process pool. The rendered pages are merged in
+order into one canvas, so no PDF merge library is needed.
+
+``flask benchmark-pdf`` times this renderer against the platypus one.
+"""
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+
+import click
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A3, landscape
+from reportlab.lib.units import cm
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen.canvas import Canvas
+
+
+PDF_CHUNK_ROWS = 2000     # rows laid out per task
+PDF_CHUNK_PAGES = 20      # pages rendered per task
+
+PAGE_WIDTH, PAGE_HEIGHT = landscape(A3)
+TOP_MARGIN = BOTTOM_MARGIN = 1.5*cm
+SIDE_MARGIN = 1*cm
+CELL_PADDING = 3
+
+NAVY = colors.HexColor('#001F3F')
+
+
+class GridStyle:
+    """Fonts, widths and colours of one drawn table."""
+
+    def __init__(self, widths, font_size, leading, header_font='Helvetica-Bold',
+                 grid_width=0.5, grid_color=colors.grey, stripe=colors.HexColor('#f8f9fa')):
+        self.widths = widths
+        self.font = 'Helvetica'
+        self.header_font = header_font
+        self.font_size = font_size
+        self.leading = leading
+        self.grid_width = grid_width
+        self.grid_color = grid_color
+        self.stripe = stripe
+        self.width = sum(widths)
+        self.x = (PAGE_WIDTH - self.width) / 2   # centred like a platypus Table
+
+
+# ==================== Layout ====================
+
+def _split(text, font, size, avail):
+    """Word-wrap ``text`` to ``avail`` points, breaking words that are wider than a whole line."""
+    lines = []
+    for line in simpleSplit(text, font, size, avail):
+        while stringWidth(line, font, size) > avail and len(line) > 1:
+            cut = len(line) - 1
+            while cut > 1 and stringWidth(line[:cut], font, size) > avail:
+                cut -= 1
+            lines.append(line[:cut])
+            line = line[cut:]
+        lines.append(line)
+    return lines
+
+
+def layout_rows(rows, widths, wrap, font, size, leading):
+    """
+    Lay out ``rows`` (lists of strings) for columns of ``widths``; ``wrap``
+    says per column whether it may need more than one line. Returns
+    ``[(height, cells)]`` where ``cells`` is ``[[(line, width)]]``.
+    """
+    measured = {}   # repeated values (names, statuses, rooms) are measured once
+
+    def measure(text):
+        width = measured.get(text)
+        if width is None:
+            width = measured[text] = stringWidth(text, font, size)
+        return width
+
+    columns = [(w - 2 * CELL_PADDING, may_wrap) for w, may_wrap in zip(widths, wrap)]
+    laid_out = []
+    for row in rows:
+        cells, lines = [], 1
+        for text, (avail, may_wrap) in zip(row, columns):
+            width = measure(text)
+            if may_wrap and width > avail:
+                cell = [(line, measure(line)) for line in _split(text, font, size, avail)]
+                lines = max(lines, len(cell))
+            else:
+                cell = [(text, width)]
+            cells.append(cell)
+        laid_out.append((lines * leading + 2 * CELL_PADDING, cells))
+    return laid_out
+
+
+def _layout_chunk(args):
+    return layout_rows(*args)
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def layout_table(rows, style, wrap, workers=1, chunk_rows=PDF_CHUNK_ROWS):
+    """Lay out every row, ``chunk_rows`` at a time, in ``workers`` processes when > 1."""
+    jobs = ((chunk, style.widths, wrap, style.font, style.font_size, style.leading)
+            for chunk in _chunks(rows, chunk_rows))
+    laid_out = []
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for chunk in pool.map(_layout_chunk, jobs):
+                laid_out.extend(chunk)
+    else:
+        for job in jobs:
+            laid_out.extend(_layout_chunk(job))
+    return laid_out
+
+
+def paginate(laid_out, first_height, height):
+    """Split laid-out rows into pages: ``first_height`` points on the first page, ``height`` after."""
+    pages, page, used, avail = [], [], 0, first_height
+    for row in laid_out:
+        if page and used + row[0] > avail:
+            pages.append(page)
+            page, used, avail = [], 0, height
+        page.append(row)
+        used += row[0]
+    if page:
+        pages.append(page)
+    return pages
+
+
+# ==================== Drawing ====================
+
+# Text is written as PDF operators: cp1252 (WinAnsi, the standard fonts'
+# encoding) with the string-literal escapes; other bytes as octal escapes
+_PDF_ESCAPES = {i: chr(i) if 32 <= i < 127 else f'\\{i:03o}' for i in range(256)}
+_PDF_ESCAPES.update({ord('\\'): '\\\\', ord('('): '\\(', ord(')'): '\\)'})
+
+
+def _pdf_string(text):
+    return '(' + text.encode('cp1252', 'replace').decode('latin-1').translate(_PDF_ESCAPES) + ')'
+
+
+def _rgb(color):
+    return f'{color.red:.4f} {color.green:.4f} {color.blue:.4f}'
+
+
+def _text_ops(ops, style, lefts, row_top, row):
+    height, cells = row
+    for left, col_width, lines in zip(lefts, style.widths, cells):
+        # lines centred as a block, like VALIGN MIDDLE
+        baseline = row_top - (height - len(lines) * style.leading) / 2 - style.font_size
+        for line, line_width in lines:
+            ops.append(f'1 0 0 1 {left + (col_width - line_width) / 2:.2f} {baseline:.2f} Tm {_pdf_string(line)} Tj')
+            baseline -= style.leading
+
+
+def page_ops(style, top, header, rows):
+    """
+    PDF operators drawing the header row and ``rows`` (one page) from ``top``
+    down, as ``(graphics, header text, body text)``. The text parts select no
+    font: the caller sets the header and body fonts before each.
+    """
+    x0, x1 = style.x, style.x + style.width
+    lefts = [x0]
+    for w in style.widths[:-1]:
+        lefts.append(lefts[-1] + w)
+
+    # Backgrounds: navy header, striped body
+    y = top - header[0]
+    ops = ['q', f'{_rgb(NAVY)} rg', f'{x0:.2f} {y:.2f} {style.width:.2f} {header[0]:.2f} re f',
+           f'{_rgb(style.stripe)} rg']
+    bottoms = [y]
+    for i, (height, _) in enumerate(rows):
+        y -= height
+        bottoms.append(y)
+        if i % 2:
+            ops.append(f'{x0:.2f} {y:.2f} {style.width:.2f} {height:.2f} re f')
+
+    # Grid: one path for every line on the page
+    ops.append(f'{style.grid_width} w {_rgb(style.grid_color)} RG')
+    for line_y in [top] + bottoms:
+        ops.append(f'{x0:.2f} {line_y:.2f} m {x1:.2f} {line_y:.2f} l')
+    for line_x in lefts + [x1]:
+        ops.append(f'{line_x:.2f} {top:.2f} m {line_x:.2f} {bottoms[-1]:.2f} l')
+    ops.append('S Q')
+
+    # Text, centred in each cell: one text object for the header, one for the body
+    header_ops = ['q BT 1 1 1 rg']
+    _text_ops(header_ops, style, lefts, top, header)
+    header_ops.append('ET Q')
+    body_ops = ['q BT 0 0 0 rg']
+    for row_top, row in zip(bottoms, rows):
+        _text_ops(body_ops, style, lefts, row_top, row)
+    body_ops.append('ET Q')
+    return '\n'.join(ops), '\n'.join(header_ops), '\n'.join(body_ops)
+
+
+def _render_pages(args):
+    style, header, pages = args
+    return [page_ops(style, top, header, rows) for top, rows in pages]
+
+
+def render_pages(style, header, pages, workers=1, chunk_pages=PDF_CHUNK_PAGES):
+    """
+    PDF operators of every ``(top, rows)`` page, rendered ``chunk_pages``
+    pages at a time — in ``workers`` processes when > 1 — and returned in order.
+    """
+    jobs = [(style, header, pages[i:i + chunk_pages]) for i in range(0, len(pages), chunk_pages)]
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return [ops for chunk in pool.map(_render_pages, jobs) for ops in chunk]
+    return [ops for job in jobs for ops in _render_pages(job)]
+
+
+def _draw_heading(canvas, text, y, size=18):
+    canvas.setFont('Helvetica-Bold', size)
+    canvas.setFillColor(NAVY)
+    canvas.drawString(SIDE_MARGIN, y - size, text)
+    return y - size - 15
+
+
+def _draw_table(canvas, style, header, rows, wrap, top, workers=1):
+    """
+    Lay out and draw a table from ``top`` on the current page, continuing on
+    new pages; returns the y of its bottom edge on the last page.
+    """
+    header_row = layout_rows([header], style.widths, [True] * len(header),
+                             style.header_font, style.font_size, style.leading)[0]
+    laid_out = layout_table(rows, style, wrap, workers)
+    body_height = PAGE_HEIGHT - TOP_MARGIN - BOTTOM_MARGIN - header_row[0]
+    pages = paginate(laid_out, top - BOTTOM_MARGIN - header_row[0], body_height) or [[]]
+    tops = [top] + [PAGE_HEIGHT - TOP_MARGIN] * (len(pages) - 1)
+    for i, (graphics, header_text, body_text) in enumerate(
+            render_pages(style, header_row, list(zip(tops, pages)), workers)):
+        if i:
+            canvas.showPage()
+        canvas.addLiteral(graphics)
+        # setFont leaves the font in the graphics state for the literal text that follows
+        canvas.setFont(style.header_font, style.font_size, style.leading)
+        canvas.addLiteral(header_text)
+        canvas.setFont(style.font, style.font_size, style.leading)
+        canvas.addLiteral(body_text)
+    return tops[-1] - header_row[0] - sum(height for height, _ in pages[-1])
+
+
+def summary_widths(summary):
+    """Column widths of a ``SummaryTable``: its group columns, then count and total cost."""
+    keys = len(summary.headers) - 2
+    return ([12*cm, 8*cm] if keys == 2 else [20*cm / keys] * keys) + [6*cm, 6*cm]
+
+
+def summary_cells(summary):
+    return [[str(v) for v in row[:-1]] + [f"{row[-1]:,.2f}"] for row in summary.rows]
+
+
+def summary_total(rows, summaries):
+    """Items in the report: the detail rows, or the count of any summary when there are none."""
+    if rows is not None:
+        return len(rows)
+    return sum(row[-2] for row in summaries[0].rows) if summaries else 0
+
+
+def render_listing(path, columns, rows, summaries, no_wrap=(), workers=1):
+    """
+    Write the report (title, ``SummaryTable``s, detailed listing) to
+    ``path``. ``rows`` hold the exported values, or None for a summary-only
+    report; ``no_wrap`` names columns whose values always fit on one line.
+    """
+    if rows is not None:
+        rows = [[str(v) if v else "-" for v in row] for row in rows]
+    canvas = Canvas(path, pagesize=(PAGE_WIDTH, PAGE_HEIGHT), pageCompression=1)
+
+    # Title and summaries
+    y = PAGE_HEIGHT - TOP_MARGIN
+    canvas.setFont('Helvetica-Bold', 26)
+    canvas.setFillColor(NAVY)
+    canvas.drawCentredString(PAGE_WIDTH / 2, y - 26, "DUT INVENTORY REPORT")
+    y -= 26 + 30
+    canvas.setFont('Helvetica', 10)
+    canvas.setFillColor(colors.black)
+    canvas.drawString(SIDE_MARGIN, y - 10, f"Generated: {datetime.now().strftime('%d %B %Y at %H:%M')} "
+                                           f"• Total Items: {summary_total(rows, summaries)}")
+    y -= 12 + 1*cm
+    for summary in summaries:
+        if y - BOTTOM_MARGIN < 4*cm:   # no room for the heading and a few rows
+            canvas.showPage()
+            y = PAGE_HEIGHT - TOP_MARGIN
+        y = _draw_heading(canvas, summary.title, y)
+        summary_style = GridStyle(summary_widths(summary), 12, 14, grid_width=0.8, grid_color=colors.black,
+                                  stripe=colors.HexColor('#f0f4f8'))
+        wrap = [True] * (len(summary.headers) - 2) + [False, False]
+        y = _draw_table(canvas, summary_style, summary.headers, summary_cells(summary), wrap, y) - 1*cm
+
+    # Detailed listing
+    if rows is not None:
+        canvas.showPage()
+        y = _draw_heading(canvas, "DETAILED INVENTORY LISTING", PAGE_HEIGHT - TOP_MARGIN)
+        detail_style = GridStyle([37.0*cm / len(columns)] * len(columns), 9, 10)
+        _draw_table(canvas, detail_style, list(columns), rows,
+                    [label not in no_wrap for label in columns], y, workers)
+    canvas.showPage()
+    canvas.save()
+
+
+# ==================== Benchmark ====================
+
+def _sample_rows(count, seed=1):
+    rnd = random.Random(seed)
+    names = ['Laptop', 'Office Chair', 'Desk', 'Projector', 'Interactive Whiteboard and Stand']
+    statuses = ['Active', 'Inactive', 'Needs Repair', 'Disposed']
+    today = date.today()
+    rows = []
+    for i in range(count):
+        rows.append([
+            f'A{i:06d}', f'SN-{rnd.randrange(10**9)}', rnd.choice(names), 'Dell', 'Black',
+            rnd.choice(['8GB RAM, 256GB SSD', '', 'Steel frame, adjustable height, 5 castors']),
+            rnd.choice(['Teaching & Learning', 'Projects/Research', 'Administration']),
+            float(rnd.randrange(0, 50000)), rnd.choice(statuses),
+            rnd.choice(['Lab 1', 'Lecture Theatre 3', 'S4 Level 2 Postgraduate Research Laboratory']),
+            rnd.choice(['Steve Biko', 'Ritson', 'City']), 'Dr T. Staff', '10000001',
+            (today - timedelta(days=rnd.randrange(2000))).isoformat(),
+            (today - timedelta(days=rnd.randrange(365))).isoformat(),
+            (today - timedelta(days=rnd.randrange(400))).isoformat(),
+        ])
+    return rows
+
+
+@click.command('benchmark-pdf')
+@click.option('--rows', 'row_counts', default='1000,10000,50000', help='Comma-separated row counts.')
+@click.option('--workers', default=os.cpu_count() or 1, help='Layout processes for the parallel run.')
+@click.option('--skip-platypus-above', default=50000, help='Skip the old renderer above this many rows.')
+def benchmark_pdf_command(row_counts, workers, skip_platypus_above):
+    """Time the platypus PDF export against the fast renderer on generated rows."""
+    from .exports import DEFAULT_COLUMNS, SummaryTable, write_pdf
+
+    summary = [SummaryTable("SUMMARY BY ITEM & STATUS", "Summary", ["Item Name", "Status", "Total Count", "Total Cost (R)"],
+                            [['Laptop', 'Active', 1, 1000.0]])]
+    runs = [('platypus', lambda p, rows: write_pdf(DEFAULT_COLUMNS, rows, summary, p, renderer='platypus')),
+            ('fast', lambda p, rows: write_pdf(DEFAULT_COLUMNS, rows, summary, p)),
+            (f'fast x{workers}', lambda p, rows: write_pdf(DEFAULT_COLUMNS, rows, summary, p, workers))]
+    for count in (int(n) for n in row_counts.split(',')):
+        rows = _sample_rows(count)
+        for name, render in runs:
+            if name == 'platypus' and count > skip_platypus_above:
+                click.echo(f'{count:>7} rows  {name:<10} skipped')
+                continue
+            fd, path = tempfile.mkstemp(suffix='.pdf')
+            os.close(fd)
+            try:
+                started = time.perf_counter()
+                render(path, rows)
+                elapsed = time.perf_counter() - started
+                click.echo(f'{count:>7} rows  {name:<10} {elapsed:8.2f}s  {os.path.getsize(path) / 1e6:7.2f} MB')
+            finally:
+                os.remove(path)
@@ -0,0 +1,114 @@
+"""
+Data capturer presence tracking.
+
+Every authenticated capturer request records a heartbeat in an in-memory
+registry (a dict write, no SQL). The first heartbeat buffered after a flush
+starts a daemon timer that writes the registry to ``DataCapturer.last_seen``
+in one batched UPDATE ``PRESENCE_FLUSH_INTERVAL`` seconds later, so 200+
+capturers working at once cost one statement per interval per worker
+instead of one per request, and a heartbeat is at most one interval stale
+even when its worker gets no further traffic. A batch whose UPDATE fails
+goes back into the registry and is retried by the next flush.
+
+A capturer counts as online when ``last_seen`` falls within
+``PRESENCE_ONLINE_WINDOW`` seconds; ``online_capturers_count()`` answers that
+with a range lookup on the indexed ``last_seen`` column.
+"""
+import atexit
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import bindparam, func, select, update
+
+from .models import db, DataCapturer
+
+
+class PresenceRegistry:
+    """Per-process buffer of capturer heartbeats, flushed to the database in batches."""
+
+    def __init__(self):
+        self.flush_interval = 30
+        self.online_window = 300
+        self._pending = {}
+        self._timer = None
+        self._lock = threading.Lock()
+        self._app = None
+
+    def init_app(self, app):
+        self.flush_interval = app.config.get('PRESENCE_FLUSH_INTERVAL', 30)
+        self.online_window = app.config.get('PRESENCE_ONLINE_WINDOW', 300)
+        self._app = app
+        atexit.register(self._flush_at_exit)
+
+    def touch(self, capturer_id):
+        """Record a heartbeat; it is written by the next timed flush."""
+        with self._lock:
+            self._pending[capturer_id] = datetime.utcnow()
+            self._schedule_flush()
+
+    def _schedule_flush(self):
+        # Caller holds the lock
+        if self._timer is None and self._app is not None:
+            self._timer = threading.Timer(self.flush_interval, self._timed_flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _timed_flush(self):
+        with self._lock:
+            self._timer = None
+        try:
+            with self._app.app_context():
+                self.flush()
+        except Exception:
+            self._app.logger.exception('Presence flush failed')
+
+    def flush(self):
+        """Write all buffered heartbeats in a single executemany UPDATE. Returns the row count."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        table = DataCapturer.__table__
+        stmt = (
+            update(table)
+            .where(table.c.data_capturer_id == bindparam('capturer_id'))
+            .values(last_seen=bindparam('seen_at'))
+        )
+        # Own connection: never mixes with (or commits) the request's session
+        try:
+            with db.engine.begin() as connection:
+                connection.execute(stmt, [
+                    {'capturer_id': capturer_id, 'seen_at': seen_at}
+                    for capturer_id, seen_at in pending.items()
+                ])
+        except Exception:
+            self._requeue(pending)
+            raise
+        return len(pending)
+
+    def _requeue(self, pending):
+        """Put an unwritten batch back, keeping any newer heartbeat buffered since."""
+        with self._lock:
+            for capturer_id, seen_at in pending.items():
+                newer = self._pending.get(capturer_id)
+                if newer is None or newer < seen_at:
+                    self._pending[capturer_id] = seen_at
+            self._schedule_flush()
+
+    def _flush_at_exit(self):
+        if self._pending and self._app is not None:
+            with self._app.app_context():
+                self.flush()
+
+
+presence = PresenceRegistry()
+
+
+def online_capturers_count(admin_id=None):
+    """Capturers seen within the online window (optionally only those managed by ``admin_id``)."""
+    threshold = datetime.utcnow() - timedelta(seconds=presence.online_window)
+    stmt = select(func.count()).select_from(DataCapturer).where(DataCapturer.last_seen >= threshold)
+    if admin_id is not None:
+        stmt = stmt.where(DataCapturer.admin_id == admin_id)
+    return db.session.execute(stmt).scalar() or 0
@@ -0,0 +1,98 @@
+"""
+Query-count guard for list pages.
+
+A list page should run a fixed number of SQL statements however many rows
+it shows; a count that grows with the rows means a relationship is being
+lazy-loaded per row (N+1). ``@query_budget(n)`` counts every statement run
+while the view and its template execute (for a streamed page, until the
+last chunk of the body has been sent) and, when the count exceeds ``n``,
+logs a warning — or raises ``QueryBudgetExceeded`` when
+``QUERY_BUDGET_STRICT`` is set, which is how local runs catch a regression
+before it ships. ``tests/test_query_counts.py`` checks that each list page
+and export runs the same number of statements for N and 10N items.
+
+``count_queries()`` is the underlying context manager and can be used on its
+own, e.g. ``with count_queries() as counter: ...; counter.count``.
+"""
+from contextlib import contextmanager
+from functools import partial, wraps
+
+from flask import current_app, g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A view ran more SQL statements than its declared budget."""
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.statements = []
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    if not has_app_context():
+        return
+    for counter in g.get('_query_counters', ()):
+        counter.count += 1
+        counter.statements.append(statement)
+
+
+@contextmanager
+def count_queries():
+    """Count the SQL statements executed (in this app context) inside the block."""
+    counter = QueryCounter()
+    counters = g.setdefault('_query_counters', [])
+    counters.append(counter)
+    try:
+        yield counter
+    finally:
+        counters.remove(counter)
+
+
+def _check_budget(app, endpoint, limit, counter):
+    if counter.count <= limit:
+        return
+    message = f'{endpoint} ran {counter.count} queries (budget {limit}); likely a lazy load per row'
+    if app.config.get('QUERY_BUDGET_STRICT'):
+        raise QueryBudgetExceeded(message + '\n' + '\n'.join(counter.statements))
+    app.logger.warning(message)
+
+
+def _counted_body(body, counters, counter, check):
+    # Runs as the response is sent; only a body sent in full is checked
+    try:
+        yield from body
+    finally:
+        counters.remove(counter)
+    check(counter)
+
+
+def query_budget(limit):
+    """Decorator: a view may run at most ``limit`` statements, independent of the rows it lists."""
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            check = partial(_check_budget, current_app._get_current_object(), request.endpoint, limit)
+            counter = QueryCounter()
+            counters = g.setdefault('_query_counters', [])
+            counters.append(counter)
+            try:
+                response = view(*args, **kwargs)
+            except Exception:
+                counters.remove(counter)
+                raise
+            if getattr(response, 'is_streamed', False):
+                # A streamed page renders (and queries) after the view returns:
+                # keep counting until the last chunk has been sent
+                response.response = _counted_body(response.response, counters, counter, check)
+                return response
+            counters.remove(counter)
+            check(counter)
+            return response
+        wrapped.query_budget = limit
+        return wrapped
+    return decorator
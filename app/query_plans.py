@@ -0,0 +1,163 @@
+"""
+Query-plan check for the hot Item / ItemMovement / Room query paths.
+
+``HOT_QUERIES`` holds one representative statement per hot path (the same
+shape the routes, dashboard and capture screens run). ``check_query_plans()``
+EXPLAINs each one and reports any that would read a whole table instead of
+using an index — the regression to catch when an index from ``models.py``
+is dropped or a query changes shape.
+
+* SQLite – ``EXPLAIN QUERY PLAN``; a ``SCAN <table>`` step without ``USING
+  ... INDEX`` is a full scan.
+* PostgreSQL – ``EXPLAIN (FORMAT JSON)`` with ``enable_seqscan`` off (so a
+  small development table does not hide a missing index); any ``Seq Scan``
+  node is a full scan.
+
+tests/test_query_plans.py runs the check against the seeded test database;
+``flask check-query-plans`` prints the result and exits non-zero on a
+regression, for checking a real (e.g. freshly upgraded) database.
+"""
+import json
+import re
+from datetime import date, datetime
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import create_engine, select, func, text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.pool import NullPool
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from .models import db, Item, ItemMovement, Room, ItemStatus, ItemCategory
+
+
+CHECKED_TABLES = ('item', 'item_movement', 'room')
+
+
+class explain(Executable, ClauseElement):
+    """``EXPLAIN`` of a statement, compiled per dialect below."""
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(explain)
+def _explain_default(element, compiler, **kw):
+    return 'EXPLAIN ' + compiler.process(element.statement, **kw)
+
+
+@compiles(explain, 'sqlite')
+def _explain_sqlite(element, compiler, **kw):
+    return 'EXPLAIN QUERY PLAN ' + compiler.process(element.statement, **kw)
+
+
+@compiles(explain, 'postgresql')
+def _explain_postgresql(element, compiler, **kw):
+    return 'EXPLAIN (FORMAT JSON) ' + compiler.process(element.statement, **kw)
+
+
+# ==================== Hot queries ====================
+
+_SINCE = datetime(2024, 1, 1)
+
+# name -> statement builder (built lazily: Item.room etc. need configured mappers)
+HOT_QUERIES = {
+    'campus-scoped status filter': lambda: select(Item.item_id).where(
+        Item.campus_id.in_([1, 2]), Item.status == ItemStatus.ACTIVE),
+    'campus-scoped category filter': lambda: select(Item.item_id).where(
+        Item.campus_id == 1, Item.category == ItemCategory.TEACHING_LEARNING),
+    'campus captures since': lambda: select(func.count()).select_from(Item).where(
+        Item.campus_id == 1, Item.capture_date >= _SINCE),
+    'procured date range': lambda: select(Item.item_id).where(
+        Item.Procured_date.between(date(2020, 1, 1), date(2021, 1, 1))),
+    'allocated date range': lambda: select(Item.item_id).where(
+        Item.allocated_date >= date(2024, 1, 1)),
+    'most valuable active items': lambda: select(Item.item_id).where(
+        Item.status == ItemStatus.ACTIVE, Item.cost > 0).order_by(Item.cost.desc()).limit(5),
+    'latest captures': lambda: select(Item.item_id).order_by(Item.capture_date.desc()).limit(5),
+    'room contents by status': lambda: select(func.count()).select_from(Item).where(
+        Item.room_id == 1, Item.status == ItemStatus.ACTIVE),
+    'capturer items, newest first': lambda: select(Item.item_id).where(
+        Item.data_capturer_id == 1).order_by(Item.capture_date.desc()).limit(51),
+    'asset number duplicate check': lambda: select(Item.item_id).where(
+        func.lower(Item.asset_number) == 'a000001'),
+    'room name duplicate check': lambda: select(Room.room_id).where(
+        func.lower(Room.name) == 'lab 1', Room.campus_id == 1),
+    'item movement history': lambda: select(ItemMovement.movement_id).where(
+        ItemMovement.item_id == 1).order_by(ItemMovement.move_date),
+    'movements into a room since': lambda: select(ItemMovement.movement_id).where(
+        ItemMovement.to_room_id == 1, ItemMovement.move_date >= _SINCE),
+    'movements since': lambda: select(func.count()).select_from(ItemMovement).where(
+        ItemMovement.move_date >= _SINCE),
+}
+
+
+# ==================== Plan inspection ====================
+
+def _sqlite_full_scans(connection, stmt):
+    steps = [row[-1] for row in connection.execute(explain(stmt))]
+    full = [step for step in steps
+            if re.match(rf'SCAN ({"|".join(CHECKED_TABLES)})\b', step) and 'USING' not in step]
+    return full, steps
+
+
+def _pg_nodes(plan):
+    yield plan
+    for child in plan.get('Plans', ()):
+        yield from _pg_nodes(child)
+
+
+def _postgresql_full_scans(connection, stmt):
+    document = connection.execute(explain(stmt)).scalar()
+    if isinstance(document, str):
+        document = json.loads(document)
+    nodes = list(_pg_nodes(document[0]['Plan']))
+    steps = [f"{n['Node Type']} {n.get('Index Name') or n.get('Relation Name') or ''}".strip() for n in nodes]
+    full = [f"Seq Scan on {n['Relation Name']}" for n in nodes
+            if n['Node Type'] == 'Seq Scan' and n.get('Relation Name') in CHECKED_TABLES]
+    return full, steps
+
+
+def check_query_plans():
+    """
+    EXPLAIN every hot query. Returns ``[(name, full_scans, plan_steps)]``;
+    a non-empty ``full_scans`` means that query no longer uses an index.
+    """
+    results = []
+    engine = db.engine
+    if engine.dialect.name == 'sqlite' and engine.url.database not in (None, '', ':memory:'):
+        # An EXPLAIN never runs, so SQLite does not re-plan a statement the
+        # driver cached before an index was dropped; plan on a new connection
+        engine = create_engine(engine.url, poolclass=NullPool)
+    with engine.begin() as connection:
+        dialect = connection.dialect.name
+        if dialect == 'postgresql':
+            connection.execute(text('SET LOCAL enable_seqscan = off'))
+            inspect_plan = _postgresql_full_scans
+        elif dialect == 'sqlite':
+            inspect_plan = _sqlite_full_scans
+        else:
+            raise RuntimeError(f'Query-plan check is not supported on {dialect}.')
+        for name, build in HOT_QUERIES.items():
+            full, steps = inspect_plan(connection, build())
+            results.append((name, full, steps))
+    if engine is not db.engine:
+        engine.dispose()
+    return results
+
+
+@click.command('check-query-plans')
+@with_appcontext
+def check_query_plans_command():
+    """EXPLAIN the hot queries; exit 1 if any falls back to a full table scan."""
+    failures = 0
+    for name, full, steps in check_query_plans():
+        if full:
+            failures += 1
+            click.echo(f'✗ {name}: {"; ".join(full)}')
+        else:
+            click.echo(f'✓ {name}: {"; ".join(steps)}')
+    if failures:
+        click.echo(f'{failures} hot queries regressed to a full table scan.')
+        raise SystemExit(1)
@@ -0,0 +1,175 @@
+"""
+Incrementally maintained inventory rollups.
+
+``InventoryRollup`` holds one row per (campus, room, category, status,
+procurement month) with the item count and total cost for that key. An
+``after_flush`` hook applies +/- deltas for every Item insert, update, move
+and delete, and for Room campus changes, so dashboard breakdowns and room
+counts read a few hundred rollup rows instead of the whole ``item`` table.
+
+``flask rebuild-rollups`` recomputes the table from scratch.
+"""
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import event, inspect, select, insert, update, delete
+from sqlalchemy.orm import Session
+
+from .models import db, Item, Room, InventoryRollup
+
+
+ROLLUP_FIELDS = ('room_id', 'category', 'status', 'Procured_date', 'cost')
+
+
+def month_start(value):
+    """Truncate a date/datetime to the first day of its month."""
+    if value is None:
+        return None
+    return date(value.year, value.month, 1)
+
+
+def _values(item, use_old):
+    """Return the rollup-relevant attribute values of an item, before or after the flush."""
+    state = inspect(item)
+    values = {}
+    for name in ROLLUP_FIELDS:
+        history = state.attrs[name].history
+        if use_old and history.deleted:
+            values[name] = history.deleted[0]
+        else:
+            values[name] = getattr(item, name)
+    return values
+
+
+def _rollup_changed(item):
+    state = inspect(item)
+    return any(state.attrs[name].history.has_changes() for name in ROLLUP_FIELDS)
+
+
+def _add_delta(deltas, values, sign):
+    if values['room_id'] is None or values['status'] is None or values['category'] is None:
+        return
+    key = (values['room_id'], values['category'], values['status'], month_start(values['Procured_date']))
+    entry = deltas[key]
+    entry[0] += sign
+    entry[1] += sign * Decimal(values['cost'] or 0)
+
+
+def _apply_deltas(connection, deltas):
+    """Apply accumulated (count, cost) deltas to the rollup table."""
+    room_ids = {key[0] for key in deltas}
+    campus_by_room = dict(connection.execute(
+        select(Room.room_id, Room.campus_id).where(Room.room_id.in_(room_ids))
+    ).all())
+
+    table = InventoryRollup.__table__
+    emptied = []
+    for (room_id, category, status, month), (count, cost) in deltas.items():
+        if count == 0 and cost == 0:
+            continue
+        campus_id = campus_by_room.get(room_id)
+        if campus_id is None:
+            continue
+        key_clause = (
+            (table.c.room_id == room_id) & (table.c.category == category) &
+            (table.c.status == status) & (table.c.procured_month == month)
+        )
+        result = connection.execute(
+            update(table).where(key_clause).values(
+                item_count=table.c.item_count + count,
+                total_cost=table.c.total_cost + cost,
+            )
+        )
+        if result.rowcount == 0 and count > 0:
+            connection.execute(insert(table).values(
+                campus_id=campus_id, room_id=room_id, category=category,
+                status=status, procured_month=month,
+                item_count=count, total_cost=cost,
+            ))
+        if count < 0:
+            emptied.append(key_clause)
+
+    for key_clause in emptied:
+        connection.execute(delete(table).where(key_clause, table.c.item_count <= 0))
+
+
+@event.listens_for(Session, 'after_flush')
+def _maintain_rollups(session, flush_context):
+    """Translate this flush's Item/Room changes into rollup deltas."""
+    deltas = defaultdict(lambda: [0, Decimal(0)])
+    moved_rooms = []
+
+    for obj in session.new:
+        if isinstance(obj, Item):
+            _add_delta(deltas, _values(obj, use_old=False), +1)
+
+    for obj in session.dirty:
+        if isinstance(obj, Item) and _rollup_changed(obj):
+            _add_delta(deltas, _values(obj, use_old=True), -1)
+            _add_delta(deltas, _values(obj, use_old=False), +1)
+        elif isinstance(obj, Room) and inspect(obj).attrs.campus_id.history.has_changes():
+            moved_rooms.append((obj.room_id, obj.campus_id))
+
+    for obj in session.deleted:
+        if isinstance(obj, Item):
+            _add_delta(deltas, _values(obj, use_old=True), -1)
+
+    if not deltas and not moved_rooms:
+        return
+
+    connection = session.connection()
+    table = InventoryRollup.__table__
+
+    # Room moved to another campus: its rollup rows follow it
+    for room_id, campus_id in moved_rooms:
+        connection.execute(update(table).where(table.c.room_id == room_id).values(campus_id=campus_id))
+
+    if deltas:
+        _apply_deltas(connection, deltas)
+
+
+def rebuild_rollups():
+    """Recompute the whole rollup table from ``item``. Returns the number of rollup rows."""
+    table = InventoryRollup.__table__
+    rows = db.session.execute(
+        select(Room.campus_id, Item.room_id, Item.category, Item.status, Item.Procured_date, Item.cost)
+        .join(Room, Item.room_id == Room.room_id)
+        .execution_options(yield_per=5000)
+    )
+
+    totals = defaultdict(lambda: [0, Decimal(0)])
+    for campus_id, room_id, category, status, procured, cost in rows:
+        entry = totals[(campus_id, room_id, category, status, month_start(procured))]
+        entry[0] += 1
+        entry[1] += Decimal(cost or 0)
+
+    db.session.execute(delete(table))
+    if totals:
+        db.session.execute(insert(table), [
+            {
+                'campus_id': campus_id, 'room_id': room_id, 'category': category,
+                'status': status, 'procured_month': month,
+                'item_count': count, 'total_cost': cost,
+            }
+            for (campus_id, room_id, category, status, month), (count, cost) in totals.items()
+        ])
+    db.session.commit()
+    return len(totals)
+
+
+def ensure_rollups_populated():
+    """Build the rollup table on first start-up against an existing inventory."""
+    has_rollups = db.session.execute(select(InventoryRollup.rollup_id).limit(1)).first()
+    if has_rollups is None and db.session.execute(select(Item.item_id).limit(1)).first() is not None:
+        rebuild_rollups()
+
+
+@click.command('rebuild-rollups')
+@with_appcontext
+def rebuild_rollups_command():
+    """Recompute the inventory rollup table from the item table."""
+    count = rebuild_rollups()
+    click.echo(f'Rebuilt inventory rollups: {count} rows.')
@@ -1,33 +1,23 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request,send_file
+from flask import Blueprint, render_template, redirect, url_for, flash, request,send_file, jsonify
 from flask_login import login_required, current_user
-from ..models import Admin, Campus, DataCapturer, db, Item, Room, ItemStatus,ItemCategory
+from ..models import Admin, Campus, DataCapturer, db, Item, Room, ItemStatus,ItemCategory, InventoryExport
 from ..forms import AdminCreationForm, AdminEditForm, DataCapturerCreationForm, STATIC_DUT_CAMPUSES,RoomCreationForm, EditItemForm, CampusRoomCreationForm
 from ..forms import SuperAdminProfileEditForm,AdminProfileEditForm,DataCapturerEditForm,AdminEditItemForm
 from flask import current_app
 from wtforms.validators import DataRequired, EqualTo, Length, ValidationError, Optional
 import enum
-from functools import wraps
+from functools import partial, wraps
 from ..utils import admin_required, super_admin_required
 # New imports needed for forms defined within this file (like CampusRoomCreationForm)
 from flask_wtf import FlaskForm
 from wtforms import SelectMultipleField, SubmitField
-from sqlalchemy import or_ , func, and_
+from sqlalchemy import func, and_
 from sqlalchemy.exc import IntegrityError
 from werkzeug.utils import secure_filename
 import os
-from datetime import datetime, timedelta,date
-from io import BytesIO
-from sqlalchemy import func, case, literal_column, select, extract, case
-import xlsxwriter
-
-
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A3, landscape
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import cm
-from reportlab.lib.enums import TA_CENTER
-from sqlalchemy.orm import joinedload
+from datetime import datetime, date
+from sqlalchemy import func, literal_column, select, extract
+from sqlalchemy.orm import joinedload, contains_eager
 
 
 admin_bp = Blueprint('admin', __name__)
@@ -60,431 +50,97 @@ def ensure_campuses_exist():
 
 
 
-from datetime import date, datetime, timedelta
+from datetime import date, datetime
 from flask import render_template
 from flask_login import login_required, current_user
-from sqlalchemy.orm import joinedload
 from sqlalchemy import func
-from decimal import Decimal
 # Assuming admin_bp, Item, Room, ItemStatus, db are imported correctly
 from .admin_routes import admin_bp  # Adjust this import based on your file structure
 
-from datetime import date, datetime, timedelta
+from datetime import date, datetime
 from flask import render_template
 from flask_login import login_required, current_user
-from sqlalchemy.orm import joinedload
-from sqlalchemy import func, and_, or_, desc
-from decimal import Decimal
+from sqlalchemy import func, and_
 from collections import defaultdict
+from ..dashboard_widgets import WIDGETS as DASHBOARD_WIDGETS, build_dashboard_widget, UnknownDashboardWidget
+from ..timeseries import time_series, SOURCES as TIME_SERIES_SOURCES, UNITS as TIME_SERIES_UNITS
+from ..pagination import keyset_paginate, reverse_keys, clamp_per_page
+from ..substring import contains
+from ..query_guard import query_budget
+from ..inventory_filter import InventoryFilter, InventorySummary
+from ..search import SEARCH_SCORE
+from ..streaming import stream_page, stream_rows
+from ..exports import (
+    export_columns, export_rows, export_summary_keys, export_summaries, write_xlsx, write_pdf,
+    write_export, send_export_file, DELIMITED_DIALECTS, EXPORT_FORMATS, stream_delimited,
+)
+from ..export_jobs import enqueue_export, export_progress, export_available, export_download, available_for
+from ..export_cache import export_cache, send_cached_export
 # Assuming admin_bp, Item, Room, ItemStatus, ItemCategory, db, Campus, DataCapturer are imported correctly
 
 @admin_bp.route('/')
 @login_required
 def dashboard():
-    today = date.today()
-    current_time = datetime.now()
-    today_start = datetime.combine(today, datetime.min.time())
-    
-    # Date calculations
-    five_years_ago = today - timedelta(days=5 * 365 + 30)
-    four_years_ago = today - timedelta(days=4 * 365 + 30)
-    three_years_ago = today - timedelta(days=3 * 365 + 30)
-    thirty_days_ago = today - timedelta(days=30)
+    """
+    Render the dashboard shell. Every widget group is loaded asynchronously
+    from dashboard_widget_api() so slow widgets never hold up the page.
+    """
+    return render_template('admin/admin_dashboard.html',
+        is_super=current_user.is_super_admin,
+        widget_names=[name for name, (_, _, super_only) in DASHBOARD_WIDGETS.items()
+                      if current_user.is_super_admin or not super_only],
+        now=datetime.now()
+    )
 
-    if current_user.is_super_admin:
-        # ====================== SUPER ADMIN – ENHANCED DASHBOARD ======================
-
-        # === FINANCIAL OVERVIEW ===
-        total_cost = db.session.query(func.coalesce(func.sum(Item.cost), 0)).scalar()
-        total_cost = float(total_cost) if total_cost else 0.0
-
-        # Accumulated Depreciation
-        days_diff = func.julianday('now') - func.julianday(Item.Procured_date)
-        total_years = days_diff / 365.25
-        capped_years = func.min(5.0, total_years)
-        depreciation_per_item = Item.cost * capped_years * 0.20
-
-        accumulated_depreciation = db.session.query(
-            func.coalesce(func.sum(depreciation_per_item), 0)
-        ).filter(
-            Item.Procured_date.isnot(None),
-            Item.cost.isnot(None),
-            Item.cost > 0
-        ).scalar()
-        accumulated_depreciation = float(accumulated_depreciation) if accumulated_depreciation else 0.0
-
-        net_book_value = total_cost - accumulated_depreciation
-
-        # Fully Depreciated
-        fully_depreciated_value = db.session.query(func.coalesce(func.sum(Item.cost), 0))\
-            .filter(Item.Procured_date <= five_years_ago).scalar()
-        fully_depreciated_value = float(fully_depreciated_value) if fully_depreciated_value else 0.0
-        fully_depreciated_count = Item.query.filter(Item.Procured_date <= five_years_ago).count()
-
-        # At Risk (4-5 years old)
-        at_risk_value = db.session.query(func.coalesce(func.sum(Item.cost), 0))\
-            .filter(
-                Item.Procured_date > five_years_ago,
-                Item.Procured_date <= four_years_ago
-            ).scalar()
-        at_risk_value = float(at_risk_value) if at_risk_value else 0.0
-
-        # === OPERATIONAL METRICS ===
-        items_today = Item.query.filter(Item.capture_date >= today_start).count()
-        needs_repair_count = Item.query.filter(Item.status == ItemStatus.NEEDS_REPAIR).count()
-        total_active_items = Item.query.filter(Item.status == ItemStatus.ACTIVE).count()
-        
-        # === NEW METRICS ===
-        
-        # 1. Asset Status Breakdown
-        inactive_items = Item.query.filter(Item.status == ItemStatus.INACTIVE).count()
-        stolen_items = Item.query.filter(Item.status == ItemStatus.STOLEN).count()
-        disposed_items = Item.query.filter(Item.status == ItemStatus.DISPOSED).count()
-        
-        # Stolen/Missing Value
-        stolen_value = db.session.query(func.coalesce(func.sum(Item.cost), 0))\
-            .filter(Item.status == ItemStatus.STOLEN).scalar()
-        stolen_value = float(stolen_value) if stolen_value else 0.0
-
-        # 2. Items by Category
-        category_stats = db.session.query(
-            Item.category,
-            func.count(Item.item_id).label('count'),
-            func.sum(Item.cost).label('total_value')
-        ).group_by(Item.category).all()
-        
-        category_data = {}
-        for cat, count, value in category_stats:
-            category_data[cat.value if cat else 'Unknown'] = {
-                'count': count,
-                'value': float(value) if value else 0.0
-            }
-
-        # 3. Assets by Campus - FIXED QUERY
-        campus_stats = db.session.query(
-            Campus.name,
-            func.count(Item.item_id).label('count'),
-            func.coalesce(func.sum(Item.cost), 0).label('total_value')
-        ).select_from(Campus)\
-         .join(Room, Campus.campus_id == Room.campus_id)\
-         .join(Item, Room.room_id == Item.room_id)\
-         .group_by(Campus.name).all()
-        
-        campus_data = {}
-        for campus_name, count, value in campus_stats:
-            campus_data[campus_name] = {
-                'count': count,
-                'value': float(value) if value else 0.0
-            }
-
-        # 4. Replacement Planning (3-4 years old)
-        replacement_needed_value = db.session.query(func.coalesce(func.sum(Item.cost), 0))\
-            .filter(
-                Item.Procured_date > four_years_ago,
-                Item.Procured_date <= three_years_ago
-            ).scalar()
-        replacement_needed_value = float(replacement_needed_value) if replacement_needed_value else 0.0
-        
-        replacement_needed_count = Item.query.filter(
-            Item.Procured_date > four_years_ago,
-            Item.Procured_date <= three_years_ago
-        ).count()
 
-        # 5. Recent Activity (last 30 days)
-        items_last_30_days = Item.query.filter(Item.capture_date >= thirty_days_ago).count()
-        
-        # Active capturers (captured in last 30 days)
-        active_capturers_count = db.session.query(
-            func.count(func.distinct(Item.data_capturer_id))
-        ).filter(
-            Item.capture_date >= thirty_days_ago,
-            Item.data_capturer_id.isnot(None)
-        ).scalar() or 0
-
-        # 6. Data Quality Issues
-        items_no_serial = Item.query.filter(
-            or_(Item.serial_number.is_(None), Item.serial_number == '')
-        ).count()
-        
-        items_no_cost = Item.query.filter(
-            or_(Item.cost.is_(None), Item.cost == 0)
-        ).count()
-        
-        # Empty rooms
-        total_rooms = Room.query.filter(Room.is_active == True).count()
-        empty_rooms = Room.query.filter(
-            Room.is_active == True,
-            ~Room.items.any()
-        ).count()
-
-        # 7. Top 5 Most Valuable Items
-        top_valuable_items = Item.query.options(
-            joinedload(Item.room).joinedload(Room.campus)
-        ).filter(
-            Item.cost.isnot(None),
-            Item.cost > Decimal("0"),
-            Item.status == ItemStatus.ACTIVE
-        ).order_by(desc(Item.cost)).limit(5).all()
-
-        # 8. Monthly Capture Trend (last 6 months)
-        monthly_captures = []
-        for i in range(5, -1, -1):  # 5, 4, 3, 2, 1, 0
-            # Calculate the first day of the month
-            year = today.year
-            month = today.month - i
-            
-            # Handle year rollover
-            while month <= 0:
-                month += 12
-                year -= 1
-            
-            month_start = date(year, month, 1)
-            
-            # Calculate last day of month
-            if month == 12:
-                month_end = date(year + 1, 1, 1) - timedelta(days=1)
-            else:
-                month_end = date(year, month + 1, 1) - timedelta(days=1)
-            
-            count = Item.query.filter(
-                Item.capture_date >= datetime.combine(month_start, datetime.min.time()),
-                Item.capture_date <= datetime.combine(month_end, datetime.max.time())
-            ).count()
-            
-            monthly_captures.append({
-                'month': month_start.strftime('%b %Y'),
-                'count': count
-            })
-
-        # 9. Average Asset Age
-        avg_age_query = db.session.query(
-            func.avg(func.julianday('now') - func.julianday(Item.Procured_date)) / 365.25
-        ).filter(Item.Procured_date.isnot(None)).scalar()
-        avg_asset_age = round(float(avg_age_query), 1) if avg_age_query else 0.0
-
-        # 10. Total Capturers
-        total_capturers = DataCapturer.query.count()
-
-        # Recent Items
-        recent_items = Item.query.options(
-            joinedload(Item.room).joinedload(Room.campus),
-            joinedload(Item.data_capturer)
-        ).order_by(Item.capture_date.desc()).limit(10).all()
-
-        return render_template('admin/admin_dashboard.html',
-            is_super=True,
-            # Financial
-            total_cost=total_cost,
-            net_book_value=net_book_value,
-            accumulated_depreciation=accumulated_depreciation,
-            fully_depreciated_value=fully_depreciated_value,
-            fully_depreciated_count=fully_depreciated_count,
-            at_risk_value=at_risk_value,
-            # Operational
-            items_today=items_today,
-            needs_repair_count=needs_repair_count,
-            total_active_items=total_active_items,
-            inactive_items=inactive_items,
-            stolen_items=stolen_items,
-            disposed_items=disposed_items,
-            stolen_value=stolen_value,
-            # Categories & Campus
-            category_data=category_data,
-            campus_data=campus_data,
-            # Replacement Planning
-            replacement_needed_value=replacement_needed_value,
-            replacement_needed_count=replacement_needed_count,
-            # Activity
-            items_last_30_days=items_last_30_days,
-            active_capturers_count=active_capturers_count,
-            total_capturers=total_capturers,
-            # Data Quality
-            items_no_serial=items_no_serial,
-            items_no_cost=items_no_cost,
-            empty_rooms=empty_rooms,
-            total_rooms=total_rooms,
-            # Top Items
-            top_valuable_items=top_valuable_items,
-            # Trends
-            monthly_captures=monthly_captures,
-            avg_asset_age=avg_asset_age,
-            # General
-            now=current_time,
-            recent_items=recent_items
-        )
+@admin_bp.route('/api/dashboard/<string:widget>')
+@login_required
+@admin_required
+def dashboard_widget_api(widget):
+    """JSON payload for one dashboard widget group, with its own browser cache lifetime."""
+    try:
+        payload, max_age = build_dashboard_widget(widget, current_user, date.today())
+    except UnknownDashboardWidget:
+        return jsonify({'error': f"Unknown dashboard widget '{widget}'."}), 404
+
+    response = jsonify(payload)
+    response.cache_control.private = True
+    response.cache_control.max_age = max_age
+    response.add_etag()
+    return response.make_conditional(request)
+
+@admin_bp.route('/api/timeseries')
+@login_required
+@admin_required
+def timeseries_api():
+    """
+    JSON time series for dashboard charts.
+    Query params: source, unit (day/week/month/year), periods, or start/end (YYYY-MM-DD).
+    """
+    source = request.args.get('source', 'capture_date')
+    unit = request.args.get('unit', 'month')
+
+    if source not in TIME_SERIES_SOURCES:
+        return jsonify({'error': f"Unknown source. Use one of: {', '.join(TIME_SERIES_SOURCES)}"}), 400
+    if unit not in TIME_SERIES_UNITS:
+        return jsonify({'error': f"Unknown unit. Use one of: {', '.join(TIME_SERIES_UNITS)}"}), 400
+
+    try:
+        periods = int(request.args.get('periods', 6))
+        start = datetime.strptime(request.args['start'], "%Y-%m-%d").date() if request.args.get('start') else None
+        end = datetime.strptime(request.args['end'], "%Y-%m-%d").date() if request.args.get('end') else None
+    except ValueError:
+        return jsonify({'error': 'Invalid periods or date (expected YYYY-MM-DD).'}), 400
+
+    campus_ids = None if current_user.is_super_admin else [c.campus_id for c in current_user.campuses]
+
+    try:
+        series = time_series(source, unit, periods=periods, start=start, end=end, campus_ids=campus_ids)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify(source=source, unit=unit, series=series)
 
-    else:
-        # ====================== FACULTY ADMIN – STREAMLINED OPERATIONAL DASHBOARD ======================
-        campus_ids = [c.campus_id for c in current_user.campuses]
-
-        # --- Basic Activity ---
-        items_today = Item.query.join(Room) \
-            .filter(Room.campus_id.in_(campus_ids),
-                    Item.capture_date >= today_start).count()
-
-        # Active capturers (captured in last 30 days)
-        active_capturers_last_30 = db.session.query(
-            func.count(func.distinct(Item.data_capturer_id))
-        ).join(Room).filter(
-            Room.campus_id.in_(campus_ids),
-            Item.capture_date >= thirty_days_ago,
-            Item.data_capturer_id.isnot(None)
-        ).scalar() or 0
-        
-        # --- CAPTURER STATUS (MANDATORY ADDITION) ---
-        # NOTE: You will need a way to track data capturer online/offline status 
-        # (e.g., a last_ping column on the DataCapturer model).
-        # Assuming a field or separate table tracks this status:
-        
-        # Placeholder/Example: Assuming current_user.data_capturers is a list of DataCapturer objects
-        # We'll use the existing 'total_capturers' from your original code but scope it better
-        total_capturers_in_scope = len(current_user.data_capturers) 
-        
-        # Placeholder values for now (replace with actual logic)
-        online_capturers_count = 0 
-        offline_capturers_count = total_capturers_in_scope 
-        # Example Logic if DataCapturer had a 'last_ping' field:
-        # threshold = datetime.now() - timedelta(minutes=5)
-        # online_capturers_count = DataCapturer.query.filter(DataCapturer.last_ping >= threshold, DataCapturer.user_id.in_([dc.user_id for dc in current_user.data_capturers])).count()
-        # offline_capturers_count = total_capturers_in_scope - online_capturers_count
-        
-        # --- Operational Status Counts ---
-        needs_repair = Item.query.join(Room).filter(
-            Room.campus_id.in_(campus_ids),
-            Item.status == ItemStatus.NEEDS_REPAIR
-        ).count()
-
-        stolen_items = Item.query.join(Room).filter(
-            Room.campus_id.in_(campus_ids),
-            Item.status == ItemStatus.STOLEN
-        ).count()
-        
-        total_active_items = Item.query.join(Room).filter(
-            Room.campus_id.in_(campus_ids),
-            Item.status == ItemStatus.ACTIVE
-        ).count()
-
-        # --- Data Quality Issues (NECESSARY ADDITION) ---
-        items_no_serial = Item.query.join(Room).filter(
-            Room.campus_id.in_(campus_ids),
-            or_(Item.serial_number.is_(None), Item.serial_number == '')
-        ).count()
-        
-        items_no_location = Item.query.join(Room).filter(
-            Room.campus_id.in_(campus_ids),
-            Item.room_id.is_(None)
-        ).count() # Checks if item is assigned to a room at all (scoped by the room's campus ID)
-        
-        # Empty rooms
-        total_rooms_in_scope = Room.query.filter(
-            Room.campus_id.in_(campus_ids),
-            Room.is_active == True
-        ).count()
-        empty_rooms = Room.query.filter(
-            Room.campus_id.in_(campus_ids),
-            Room.is_active == True,
-            ~Room.items.any()
-        ).count()
-
-        # --- Age Breakdown (COUNTS ONLY) ---
-        fully_depreciated_count = Item.query.join(Room).filter(
-            Room.campus_id.in_(campus_ids),
-            Item.Procured_date <= five_years_ago
-        ).count()
-
-        at_risk_count = Item.query.join(Room).filter(
-            Room.campus_id.in_(campus_ids),
-            Item.Procured_date > five_years_ago,
-            Item.Procured_date <= four_years_ago
-        ).count()
-
-        replacement_soon_count = Item.query.join(Room).filter(
-            Room.campus_id.in_(campus_ids),
-            Item.Procured_date > four_years_ago,
-            Item.Procured_date <= three_years_ago
-        ).count()
-        
-        # Average Asset Age (NECESSARY ADDITION)
-        avg_age_query = db.session.query(
-            func.avg(func.julianday('now') - func.julianday(Item.Procured_date)) / 365.25
-        ).join(Room).filter(
-            Room.campus_id.in_(campus_ids),
-            Item.Procured_date.isnot(None)
-        ).scalar()
-        avg_asset_age = round(float(avg_age_query), 1) if avg_age_query else 0.0
-
-        # --- Breakdowns (Counts Only) ---
-        category_counts = db.session.query(
-            Item.category,
-            func.count(Item.item_id)
-        ).join(Room).filter(
-            Room.campus_id.in_(campus_ids)
-        ).group_by(Item.category).all()
-        category_data = {cat.value: count for cat, count in category_counts}
-
-        campus_stats = db.session.query(
-            Campus.name,
-            func.count(Item.item_id)
-        ).select_from(Campus) \
-            .join(Room, Campus.campus_id == Room.campus_id) \
-            .join(Item, Room.room_id == Item.room_id) \
-            .filter(Campus.campus_id.in_(campus_ids)) \
-            .group_by(Campus.name).all()
-        campus_data = {name: count for name, count in campus_stats}
-
-        # --- Top Valuable Items (Uses cost for sorting, but HTML HIDES cost) ---
-        top_items = Item.query.options(
-            joinedload(Item.room).joinedload(Room.campus)
-        ).join(Room).filter(
-            Room.campus_id.in_(campus_ids),
-            Item.cost.isnot(None),
-            Item.cost > Decimal("0"),
-            Item.status == ItemStatus.ACTIVE
-        ).order_by(desc(Item.cost)).limit(5).all()
-
-        # --- Recent Items ---
-        recent_items = Item.query.join(Room) \
-            .filter(Room.campus_id.in_(campus_ids)) \
-            .options(
-                joinedload(Item.room).joinedload(Room.campus),
-                joinedload(Item.data_capturer)
-            ).order_by(Item.capture_date.desc()).limit(10).all()
-
-        return render_template('admin/admin_dashboard.html',
-            is_super=False,
-            # Critical Status & Action
-            needs_repair_count=needs_repair,
-            stolen_items=stolen_items,
-            total_active_items=total_active_items,
-            
-            # Data Quality & Location
-            items_no_serial=items_no_serial,
-            items_no_location=items_no_location,
-            empty_rooms=empty_rooms,
-            total_rooms=total_rooms_in_scope,
-            
-            # Activity & Capturer Status
-            items_today=items_today,
-            active_capturers_count=active_capturers_last_30,
-            online_capturers_count=online_capturers_count, # New
-            offline_capturers_count=offline_capturers_count, # New
-            total_capturers=total_capturers_in_scope, # Scoped
-            
-            # Age
-            fully_depreciated_count=fully_depreciated_count,
-            at_risk_count=at_risk_count,
-            replacement_needed_count=replacement_soon_count,
-            avg_asset_age=avg_asset_age, # New
-            
-            # Breakdowns
-            category_data=category_data,
-            campus_data=campus_data,
-            
-            # Top Items & Recent
-            top_valuable_items=top_items, # Using a unified variable name for template
-            recent_items=recent_items,
-            now=current_time
-        )
 
 @admin_bp.route('/capturers')
 @login_required
@@ -722,19 +378,10 @@ def list_rooms():
         return redirect(url_for('main.index'))
 
     # --- Build base query ---
-    active_count_sub = (
-        func.coalesce(
-            func.count(
-                case((Item.status == ItemStatus.ACTIVE, Item.item_id))
-            ), 0
-        ).label('active_item_count')
-    )
-
+    # Active item counts are the room's maintained counter column, not a count over item
     base_select = (
-        select(Room, Campus.name.label('campus_name'), active_count_sub)
+        select(Room, Campus.name.label('campus_name'), Room.active_item_count)
         .join(Campus, Room.campus_id == Campus.campus_id)
-        .outerjoin(Item, (Item.room_id == Room.room_id) & (Item.status == ItemStatus.ACTIVE))
-        .group_by(Room.room_id, Campus.name)
     )
 
     # --- Apply user scope ---
@@ -751,7 +398,7 @@ def list_rooms():
     # 1. Search by room name
     search_q = request.args.get('q', '').strip()
     if search_q:
-        query = query.where(Room.name.ilike(f"%{search_q}%"))
+        query = query.where(contains(Room.name, search_q))
 
     # 2. Filter by campus
     campus_filter = request.args.get('campus_id')
@@ -1075,7 +722,7 @@ def delete_room(room_id):
             return redirect(url_for('admin.list_rooms'))
 
     # Check for active items
-    active_count = Item.query.filter_by(room_id=room_id, status=ItemStatus.ACTIVE).count()
+    active_count = room.active_item_count
     if active_count > 0:
         flash(f'Cannot deactivate "{room.name}". It has {active_count} active item(s).', 'danger')
         return redirect(url_for('admin.list_rooms'))
@@ -1098,199 +745,182 @@ def delete_room(room_id):
 @admin_bp.route('/items/export/<string:format>', methods=['GET'])
 @login_required
 @admin_required
+@query_budget(8)
 def export_items(format):
 
-    # === QUERY + FILTERS ===
-    query = db.select(Item).join(Room).join(Campus).outerjoin(DataCapturer)
-    if not current_user.is_super_admin:
-        query = query.where(Room.campus_id.in_([c.campus_id for c in current_user.campuses]))
-
-    if alloc_from := request.args.get("alloc_from"):
-        try:
-            query = query.where(Item.allocated_date >= datetime.strptime(alloc_from, "%Y-%m-%d").date())
-        except:
-            pass
-    if alloc_to := request.args.get("alloc_to"):
-        try:
-            query = query.where(Item.allocated_date <= datetime.strptime(alloc_to, "%Y-%m-%d").date())
-        except:
-            pass
-
-    items = db.session.execute(query).scalars().all()
-    if not items:
+    # === QUERY + FILTERS (same parsing as view_inventory / run_report) ===
+    filters = _export_filters(request.args)
+    if not filters.summary().total:
         flash("No items to export.", "info")
         return redirect(url_for('admin.view_inventory'))
 
-    # === BUILD DATA ===
-    all_data = []
-    for i in items:
-        all_data.append({
-            "Asset No.": i.asset_number or "",
-            "Serial No.": i.serial_number or "",
-            "Name": i.name,
-            "Brand": i.brand or "",
-            "Color": i.color or "",
-            "Capacity/Specs": i.capacity or "",
-            "Category": i.category.value if i.category else "",
-            "Cost (R)": float(i.cost) if i.cost else 0.0,
-            "Status": i.status.value,
-            "Captured By": i.data_capturer.full_name if i.data_capturer else "",
-            "Room": i.room.name,
-            "Campus": i.room.campus.name,
-            "Room Staff": i.room.staff_name or "",
-            "Staff ID": i.room.staff_number or "",
-            "Procured Date": i.Procured_date.strftime("%Y-%m-%d") if i.Procured_date else "",
-            "Allocated Date": i.allocated_date.strftime("%Y-%m-%d") if i.allocated_date else "Not Allocated",
-            "Captured Date": i.capture_date.strftime("%Y-%m-%d") if i.capture_date else "",
-        })
-
-    selected_cols = request.args.getlist('columns') or [
-        "Asset No.", "Serial No.", "Name", "Brand", "Color",
-        "Capacity/Specs", "Category", "Cost (R)", "Status",
-        "Room", "Campus", "Room Staff", "Staff ID",
-        "Procured Date", "Allocated Date", "Captured Date"
-    ]
-
-    final_rows = [[item.get(col, "") for col in selected_cols] for item in all_data]
-
-    # Summary
-    summary_dict = {}
-    for item in all_data:
-        key = (item["Name"], item["Status"])
-        summary_dict[key] = summary_dict.get(key, 0) + 1
-    summary_rows = [[name, status, count] for (name, status), count in summary_dict.items()]
-
+    selected_cols = export_columns(request.args.getlist('columns'))
+    summary_keys = export_summary_keys(request.args.getlist('summaries'))
+    summary_only = request.args.get('summary_only') == '1' and format in EXPORT_FORMATS
+    compress = format in DELIMITED_DIALECTS and request.args.get('gzip') == '1'
+    prefix = "DUT_Inventory_Summary" if summary_only else "DUT_Inventory"
+
+    # ==================== CACHED FILE ====================
+    # The same export of unchanged data is sent from disk (ETag / Last-Modified, so repeats can 304)
+    cache_key = _export_cache_key(format, filters, selected_cols, summary_keys, summary_only, compress)
+    cached = export_cache.get(cache_key)
+    if cached is not None:
+        built = datetime.fromtimestamp(cached.created_at).strftime("%Y%m%d_%H%M")
+        download_name = f"{prefix}_{built}.{EXPORT_FORMATS[format][1]}"
+        if compress:
+            return send_cached_export(cached, download_name + '.gz', 'application/gzip')
+        return send_cached_export(cached, download_name, EXPORT_FORMATS[format][2])
+    # Read before any row is queried: a commit during the build leaves the file outdated
+    data_version = export_cache.version()
     timestamp = datetime.now().strftime("%Y%m%d_%H%M")
+    tee = partial(export_cache.tee, cache_key, data_version)
+
+    # ==================== SUMMARY-ONLY EXPORT ====================
+    # Only the GROUP BY summaries: no detail rows are read, whatever the result size
+    if summary_only:
+        summaries = export_summaries(filters, summary_keys)
+        download_name = f"{prefix}_{timestamp}.{EXPORT_FORMATS[format][1]}"
+        if format in DELIMITED_DIALECTS:
+            return stream_delimited(format, None, None, download_name, compress=compress,
+                                    summaries=summaries, tee=tee)
+        path = write_export(format, None, None, summaries)
+        return _send_new_export(path, cache_key, data_version, download_name, EXPORT_FORMATS[format][2])
+
+    # Too large to build while the admin waits: hand it to a background job
+    # (CSV/TSV stream from the first row, so they never need one)
+    if format in ("xlsx", "pdf") and \
+            filters.summary().total > current_app.config.get('REPORT_EXPORT_JOB_THRESHOLD', 20000):
+        return _start_export_job(format, filters, selected_cols, summary_keys)
 
     # ==================== EXCEL EXPORT ====================
+    # Streamed: column tuples in batches into a constant_memory workbook on disk
     if format == "xlsx":
-        output = BytesIO()
-        workbook = xlsxwriter.Workbook(output, {'in_memory': True})
-        navy = '#001F3F'
-
-        header_fmt = workbook.add_format({
-            'bg_color': navy, 'font_color': 'white', 'bold': True, 'border': 1,
-            'align': 'center', 'valign': 'vcenter', 'text_wrap': True
-        })
-        money_fmt = workbook.add_format({'num_format': 'R#,##0.00', 'border': 1})
-        date_fmt = workbook.add_format({'num_format': 'yyyy-mm-dd', 'border': 1})
-        cell_fmt = workbook.add_format({'border': 1})
-
-        # Inventory Sheet
-        sheet = workbook.add_worksheet("Inventory")
-        for c, col in enumerate(selected_cols):
-            sheet.write(0, c, col, header_fmt)
-        for r, row in enumerate(final_rows, start=1):
-            for c, val in enumerate(row):
-                col_name = selected_cols[c]
-                if col_name == "Cost (R)":
-                    sheet.write(r, c, val, money_fmt)
-                elif "Date" in col_name:
-                    sheet.write(r, c, val, date_fmt)
-                else:
-                    sheet.write(r, c, val, cell_fmt)
-        sheet.freeze_panes(1, 0)
-        for i, col in enumerate(selected_cols):
-            sheet.set_column(i, i, 20)
-
-        # Summary Sheet
-        s = workbook.add_worksheet("Summary")
-        s.merge_range('A1:C1', 'SUMMARY BY ITEM & STATUS', workbook.add_format({'bold': True, 'size': 18, 'align': 'center', 'font_color': navy}))
-        headers = ["Item Name", "Status", "Total Count"]
-        for c, h in enumerate(headers):
-            s.write(4, c, h, header_fmt)
-        for r, (name, status, count) in enumerate(summary_rows, start=5):
-            s.write(r, 0, name)
-            s.write(r, 1, status)
-            s.write(r, 2, count)
-        s.set_column('A:A', 50)
-        s.set_column('B:B', 20)
-        s.set_column('C:C', 18)
-
-        workbook.close()
-        output.seek(0)
-        return send_file(output, as_attachment=True,
-                         download_name=f"DUT_Inventory_{timestamp}.xlsx",
-                         mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+        path = write_xlsx(selected_cols, export_rows(filters, selected_cols), export_summaries(filters, summary_keys))
+        return _send_new_export(path, cache_key, data_version, f"{prefix}_{timestamp}.xlsx",
+                                "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+
+    # ==================== CSV / TSV EXPORT ====================
+    # Streamed as it is fetched (server-side cursor); ?gzip=1 compresses on the fly
+    if format in DELIMITED_DIALECTS:
+        return stream_delimited(format, selected_cols, export_rows(filters, selected_cols),
+                                f"{prefix}_{timestamp}.{format}", compress=compress, tee=tee)
 
     # ==================== PDF EXPORT ====================
-    elif format == "pdf":
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=landscape(A3),
-            topMargin=1.5*cm,
-            bottomMargin=1.5*cm,
-            leftMargin=1*cm,
-            rightMargin=1*cm
-        )
+    if format == "pdf":
+        # Same column projection as the streamed formats
+        final_rows = list(export_rows(filters, selected_cols))
+        summaries = export_summaries(filters, summary_keys)
+
+        path = write_pdf(selected_cols, final_rows, summaries)
+        return _send_new_export(path, cache_key, data_version, f"{prefix}_{timestamp}.pdf", "application/pdf")
 
-        styles = getSampleStyleSheet()
-        styles.add(ParagraphStyle(name='BigTitle', parent=styles['Title'], fontSize=26, textColor=colors.HexColor('#001F3F'), alignment=TA_CENTER, spaceAfter=30))
-        styles.add(ParagraphStyle(name='Heading', parent=styles['Heading2'], fontSize=18, textColor=colors.HexColor('#001F3F'), spaceAfter=15))
-        styles.add(ParagraphStyle(name='SumCell', fontSize=12, alignment=TA_CENTER, leading=14))
-        styles.add(ParagraphStyle(name='Hdr', fontSize=9, fontName='Helvetica-Bold', textColor=colors.white, alignment=TA_CENTER, leading=10, wordWrap='CJK'))
-        styles.add(ParagraphStyle(name='Cell', fontSize=9, alignment=TA_CENTER, leading=10))
-
-        elements = []
-        elements.append(Paragraph("DUT INVENTORY REPORT", styles["BigTitle"]))
-        elements.append(Paragraph(f"Generated: {datetime.now().strftime('%d %B %Y at %H:%M')} • Total Items: {len(final_rows)}", styles["Normal"]))
-        elements.append(Spacer(1, 1*cm))
-
-        # Summary Table
-        elements.append(Paragraph("SUMMARY BY ITEM & STATUS", styles["Heading"]))
-        sum_data = [[Paragraph("<b>Item Name</b>", styles["SumCell"]),
-                     Paragraph("<b>Status</b>", styles["SumCell"]),
-                     Paragraph("<b>Total Count</b>", styles["SumCell"])]]
-        for name, status, count in summary_rows:
-            sum_data.append([Paragraph(name, styles["SumCell"]),
-                             Paragraph(status, styles["SumCell"]),
-                             Paragraph(str(count), styles["SumCell"])])
-
-        sum_table = Table(sum_data, colWidths=[12*cm, 8*cm, 6*cm])
-        sum_table.setStyle(TableStyle([
-            ('BACKGROUND', (0,0), (-1,0), colors.HexColor('#001F3F')),
-            ('TEXTCOLOR', (0,0), (-1,0), colors.white),
-            ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-            ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-            ('GRID', (0,0), (-1,-1), 0.8, colors.black),
-            ('ROWBACKGROUNDS', (1,0), (-1,-1), [colors.white, colors.HexColor('#f0f4f8')])
-        ]))
-        elements.append(sum_table)
-        elements.append(PageBreak())
-
-        # Detailed Table
-        elements.append(Paragraph("DETAILED INVENTORY LISTING", styles["Heading"]))
-        detail_data = [[Paragraph(col, styles["Hdr"]) for col in selected_cols]]
-        for row in final_rows:
-            detail_data.append([Paragraph(str(v) if v else "-", styles["Cell"]) for v in row])
-
-        # Auto-adjust column width
-        max_width = 37.0  # total width in cm
-        col_width = max_width / len(selected_cols)
-        col_widths = [col_width * cm for _ in selected_cols]
-
-        detail_table = Table(detail_data, colWidths=col_widths, repeatRows=1)
-        detail_table.setStyle(TableStyle([
-            ('BACKGROUND', (0,0), (-1,0), colors.HexColor('#001F3F')),
-            ('TEXTCOLOR', (0,0), (-1,0), colors.white),
-            ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-            ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-            ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
-            ('ROWBACKGROUNDS', (1,0), (-1,-1), [colors.white, colors.HexColor('#f8f9fa')])
-        ]))
-        elements.append(detail_table)
-
-        doc.build(elements)
-        buffer.seek(0)
-        return send_file(buffer, as_attachment=True,
-                         download_name=f"DUT_Inventory_{timestamp}.pdf",
-                         mimetype="application/pdf")
-
-    flash("Invalid format. Use 'xlsx' or 'pdf'.", "danger")
+    flash("Invalid format. Use 'xlsx', 'pdf', 'csv' or 'tsv'.", "danger")
     return redirect(url_for('admin.view_inventory'))
 
 
+def _export_cache_key(format, filters, selected_cols, summary_keys, summary_only=False, compress=False):
+    # Same key as export_jobs.run_export() uses for a job's file
+    return export_cache.make_key(format, None if summary_only else selected_cols, filters, summary_keys,
+                                 summary_only=summary_only, gzip=compress)
+
+
+def _send_new_export(path, cache_key, data_version, download_name, mimetype):
+    """Send a just-built export from the export cache, or send and delete it when it was not cached."""
+    cached = export_cache.put(cache_key, data_version, path)
+    if cached is None:
+        return send_export_file(path, download_name, mimetype)
+    return send_cached_export(cached, download_name, mimetype)
+
+
+#---------------Background export jobs--------------------------------#
+def _export_filters(args):
+    return InventoryFilter.from_args(
+        args,
+        campus_ids=None if current_user.is_super_admin else [c.campus_id for c in current_user.campuses],
+    )
+
+
+def _start_export_job(format, filters, selected_cols, summary_keys):
+    export = enqueue_export(format, selected_cols, filters, admin_id=current_user.admin_id,
+                            summaries=summary_keys)
+    flash(f"Your export of {filters.summary().total:,} items is being prepared in the background.", "info")
+    return redirect(url_for('admin.export_job', export_id=export.export_id))
+
+
+def _get_own_export(export_id):
+    """The export job, if it exists and belongs to the current admin (any job for the Super Admin)."""
+    export = db.session.get(InventoryExport, export_id)
+    if export is None or export.status is None:
+        return None
+    if not current_user.is_super_admin and export.admin_id != current_user.admin_id:
+        return None
+    return export
+
+
+@admin_bp.route('/exports/<string:format>', methods=['POST'])
+@login_required
+@admin_required
+def queue_export(format):
+    """Queue a background export of the filtered items (filters/columns as in export_items)."""
+    if format not in EXPORT_FORMATS:
+        flash("Invalid format. Use 'xlsx', 'pdf', 'csv' or 'tsv'.", "danger")
+        return redirect(url_for('admin.run_report'))
+
+    if request.values.get('summary_only') == '1':
+        # Summary-only exports are a few GROUP BY rows: build them right away
+        return redirect(url_for('admin.export_items', format=format, **request.values.to_dict(flat=False)))
+
+    filters = _export_filters(request.values)
+    if not filters.summary().total:
+        flash("No items to export.", "info")
+        return redirect(url_for('admin.run_report'))
+    selected_cols = export_columns(request.values.getlist('columns'))
+    summary_keys = export_summary_keys(request.values.getlist('summaries'))
+    if export_cache.get(_export_cache_key(format, filters, selected_cols, summary_keys)) is not None:
+        # Already built from the current data: download it instead of queueing a job
+        return redirect(url_for('admin.export_items', format=format, **request.values.to_dict(flat=False)))
+    return _start_export_job(format, filters, selected_cols, summary_keys)
+
+
+@admin_bp.route('/exports/<int:export_id>', methods=['GET'])
+@login_required
+@admin_required
+def export_job(export_id):
+    """Progress page for a background export; polls export_job_status until the file is ready."""
+    export = _get_own_export(export_id)
+    if export is None:
+        flash("Export not found.", "danger")
+        return redirect(url_for('admin.run_report'))
+    return render_template('admin/export_job.html', title='Export', export=export,
+                           progress=export_progress(export), available_for=available_for())
+
+
+@admin_bp.route('/exports/<int:export_id>/status', methods=['GET'])
+@login_required
+@admin_required
+def export_job_status(export_id):
+    export = _get_own_export(export_id)
+    if export is None:
+        return jsonify({'error': 'Export not found.'}), 404
+    progress = export_progress(export)
+    progress['download_url'] = (
+        url_for('admin.download_export', export_id=export_id) if export_available(export) else None
+    )
+    return jsonify(progress)
+
+
+@admin_bp.route('/exports/<int:export_id>/download', methods=['GET'])
+@login_required
+@admin_required
+def download_export(export_id):
+    export = _get_own_export(export_id)
+    if export is None or not export_available(export):
+        flash("This export is no longer available. Please run it again.", "warning")
+        return redirect(url_for('admin.run_report'))
+    download_name, mimetype = export_download(export)
+    return send_file(export.file_path, as_attachment=True, download_name=download_name, mimetype=mimetype)
+
+
 
 # ------------------Manage Campuses Route ----------------#
 @admin_bp.route('/campuses', methods=['GET', 'POST'])
@@ -1361,152 +991,96 @@ def manage_campuses():
 
 
 #------------------View Inventory Route ----------------#
+
+# Server-side sorts for the inventory table: name -> [(expression, descending), ...]
+# in ascending order. Every sort ends with item_id so keyset cursors are stable;
+# nullable columns are coalesced because keyset comparisons cannot see NULLs.
+INVENTORY_SORTS = {
+    'location': [(Campus.name, False), (Room.name, False), (Item.capture_date, True), (Item.item_id, True)],
+    'asset': [(func.coalesce(Item.asset_number, ''), False), (Item.item_id, False)],
+    'item': [(Item.name, False), (Item.item_id, False)],
+    'category': [(Item.category, False), (Item.item_id, False)],
+    'staff': [(func.coalesce(Room.staff_name, ''), False), (Item.item_id, False)],
+    'status': [(Item.status, False), (Item.item_id, False)],
+    'cost': [(func.coalesce(Item.cost, -1), False), (Item.item_id, False)],
+    'captured_by': [(func.coalesce(DataCapturer.full_name, ''), False), (Item.item_id, False)],
+    'procured': [(Item.Procured_date, False), (Item.item_id, False)],
+    'allocated': [(func.coalesce(Item.allocated_date, date.min), False), (Item.item_id, False)],
+    'captured': [(Item.capture_date, False), (Item.item_id, False)],
+}
+
+
 @admin_bp.route('/inventory')
 @login_required
 @admin_required
+@query_budget(12)
 def view_inventory():
     """
     Ultimate Admin Inventory Dashboard
     Now with Allocated Date filter + display
     """
-    from datetime import datetime
-    from sqlalchemy import and_, or_
-
-    # === 1. Base Query ===
-    query = db.select(Item) \
-        .join(Room, Item.room_id == Room.room_id) \
-        .join(Campus, Room.campus_id == Campus.campus_id) \
-        .outerjoin(DataCapturer, Item.data_capturer_id == DataCapturer.data_capturer_id)
-
-    # === 2. Admin Scope ===
+    # === 1. Admin Scope ===
     if current_user.is_super_admin:
         managed_campuses = Campus.query.order_by(Campus.name).all()
         managed_capturers = DataCapturer.query.order_by(DataCapturer.full_name).all()
     else:
         managed_campuses = current_user.campuses
         managed_capturers = current_user.data_capturers
-        query = query.where(Room.campus_id.in_([c.campus_id for c in managed_campuses]))
 
     managed_campus_ids = [c.campus_id for c in managed_campuses]
-    current_filters = {}
-
-    # === 3. ALL FILTERS (including new Allocated Date range) ===
-
-    # Campus
-    if (campus_id := request.args.get("campus_id")) and campus_id.isdigit():
-        campus_id = int(campus_id)
-        if current_user.is_super_admin or campus_id in managed_campus_ids:
-            query = query.where(Room.campus_id == campus_id)
-            current_filters['campus_id'] = campus_id
-
-    # Room
-    if (room_id := request.args.get("room_id")) and room_id.isdigit():
-        query = query.where(Item.room_id == int(room_id))
-        current_filters['room_id'] = int(room_id)
-
-    # Status
-    if (status := request.args.get("status")) and status != "all":
-        try:
-            query = query.where(Item.status == ItemStatus[status.upper()])
-            current_filters['status'] = status
-        except KeyError:
-            flash("Invalid status filter.", "warning")
-
-    # Category
-    if (category := request.args.get("category")) and category != "all":
-        try:
-            query = query.where(Item.category == ItemCategory[category.upper()])
-            current_filters['category'] = category
-        except KeyError:
-            flash("Invalid category selected.", "warning")
-
-    # Data Capturer
-    if capturer := request.args.get("capturer"):
-        subq = db.select(DataCapturer.data_capturer_id).where(
-            or_(
-                DataCapturer.full_name.ilike(f"%{capturer}%"),
-                DataCapturer.student_number.ilike(f"%{capturer}%")
-            )
-        ).scalar_subquery()
-        query = query.where(Item.data_capturer_id.in_(subq))
-        current_filters['capturer'] = capturer
-
-    # Responsible Staff
-    if staff := request.args.get("staff"):
-        query = query.where(
-            or_(
-                Room.staff_name.ilike(f"%{staff}%"),
-                Room.staff_number.ilike(f"%{staff}%")
-            )
-        )
-        current_filters['staff'] = staff
 
-    # Cost Range
-    if min_cost := request.args.get("min_cost"):
-        try:
-            query = query.where(Item.cost >= float(min_cost))
-            current_filters['min_cost'] = min_cost
-        except (ValueError, TypeError):
-            flash("Invalid minimum cost.", "warning")
-
-    if max_cost := request.args.get("max_cost"):
-        try:
-            query = query.where(Item.cost <= float(max_cost))
-            current_filters['max_cost'] = max_cost
-        except (ValueError, TypeError):
-            flash("Invalid maximum cost.", "warning")
-
-    # Procurement Date Range
-    if date_from := request.args.get("date_from"):
-        try:
-            start = datetime.strptime(date_from, "%Y-%m-%d").date()
-            query = query.where(Item.Procured_date >= start)
-            current_filters['date_from'] = date_from
-        except ValueError:
-            flash("Invalid 'From' procurement date.", "warning")
-
-    if date_to := request.args.get("date_to"):
-        try:
-            end = datetime.strptime(date_to, "%Y-%m-%d").date()
-            query = query.where(Item.Procured_date <= end)
-            current_filters['date_to'] = date_to
-        except ValueError:
-            flash("Invalid 'To' procurement date.", "warning")
-
-    # === NEW: Allocated Date Range Filter ===
-    if alloc_from := request.args.get("alloc_from"):
-        try:
-            start = datetime.strptime(alloc_from, "%Y-%m-%d").date()
-            query = query.where(Item.allocated_date >= start)
-            current_filters['alloc_from'] = alloc_from
-        except ValueError:
-            flash("Invalid 'Allocated From' date.", "warning")
-
-    if alloc_to := request.args.get("alloc_to"):
-        try:
-            end = datetime.strptime(alloc_to, "%Y-%m-%d").date()
-            query = query.where(Item.allocated_date <= end)
-            current_filters['alloc_to'] = alloc_to
-        except ValueError:
-            flash("Invalid 'Allocated To' date.", "warning")
-
-    # === 4. Execute Query ===
-    query = query.order_by(
-        Campus.name,
-        Room.name,
-        Item.capture_date.desc()
+    # === 2. Filters (shared with the report and exports) ===
+    filters = InventoryFilter.from_args(
+        request.args,
+        campus_ids=None if current_user.is_super_admin else managed_campus_ids,
     )
+    for message in filters.errors:
+        flash(message, "warning")
+    query = filters.statement()
+    current_filters = filters.to_args()
+
+    # === 3. Full-text search adds a relevance sort ===
+    sorts = INVENTORY_SORTS
+    if filters.hits is not None:
+        sorts = dict(INVENTORY_SORTS, relevance=[(SEARCH_SCORE, True), (Item.item_id, False)])
+
+    # === 4. Sort + Keyset Page + Cached Count ===
+    sort = request.args.get('sort') or ('relevance' if 'relevance' in sorts else 'location')
+    if sort not in sorts:
+        sort = 'location'
+    sort_dir = 'desc' if request.args.get('dir') == 'desc' else 'asc'
+    keys = sorts[sort] if sort_dir == 'asc' else reverse_keys(sorts[sort])
+
+    page = keyset_paginate(
+        query, f'{sort}:{sort_dir}', keys,
+        per_page=clamp_per_page(request.args.get('per_page')),
+        after=request.args.get('after'),
+        before=request.args.get('before'),
+    )
+    items = page.items
+
+    # Counts and pills cover every matching item, not just this page
+    summary = filters.summary()
 
-    items = db.session.execute(query).scalars().all()
+    # Links keep the filters; sorting restarts from the first page
+    page_args = dict(current_filters, sort=sort, dir=sort_dir, per_page=page.per_page)
+    sort_links = {
+        name: url_for('admin.view_inventory', **dict(
+            page_args, sort=name, dir='desc' if name == sort and sort_dir == 'asc' else 'asc'))
+        for name in INVENTORY_SORTS
+    }
+    next_url = url_for('admin.view_inventory', **page_args, after=page.next_cursor) if page.has_next else None
+    prev_url = url_for('admin.view_inventory', **page_args, before=page.prev_cursor) if page.has_prev else None
 
     # === 5. Dropdown Data ===
     all_managed_rooms = Room.query.filter(
         Room.campus_id.in_(managed_campus_ids)
-    ).order_by(Room.name).all()
+    ).options(joinedload(Room.campus)).order_by(Room.name).all()
 
     status_choices = [(s.name.lower(), s.value.replace(" ", " ").title()) for s in ItemStatus]
     category_choices = [(c.name.lower(), c.value) for c in ItemCategory]
 
+    # One keyset page (at most MAX_PER_PAGE rows): rendered in full, nothing to gain from streaming
     return render_template(
         'admin/view_inventory.html',
         title='Inventory Dashboard',
@@ -1516,7 +1090,15 @@ def view_inventory():
         managed_capturers=managed_capturers,
         status_choices=status_choices,
         category_choices=category_choices,
-        current_filters=current_filters
+        current_filters=current_filters,
+        total_items=summary.total,
+        summary=summary,
+        page=page,
+        sort=sort,
+        sort_dir=sort_dir,
+        sort_links=sort_links,
+        next_url=next_url,
+        prev_url=prev_url
     )
 
 
@@ -1720,62 +1302,38 @@ def system_settings():
 @admin_bp.route('/reports')
 @login_required
 @admin_required
+@query_budget(10)
 def run_report():
     """
     Dedicated report-generation page.
-    - Applies filters and renders a live preview table
+    - Applies filters and renders a bounded live preview (first REPORT_PREVIEW_ROWS rows)
+      with exact totals for the whole result
     - Column selector + export buttons reuse the same GET params as export_items
     """
 
     # ── 1. Scope: campuses & rooms this admin can see ──────────────────────────
     if current_user.is_super_admin:
         managed_campuses = Campus.query.order_by(Campus.name).all()
-        managed_rooms    = Room.query.join(Campus).order_by(Campus.name, Room.name).all()
+        managed_rooms    = Room.query.join(Campus).options(contains_eager(Room.campus)) \
+                                     .order_by(Campus.name, Room.name).all()
     else:
         managed_campuses = current_user.campuses
         campus_ids       = [c.campus_id for c in managed_campuses]
         managed_rooms    = Room.query.filter(Room.campus_id.in_(campus_ids)) \
-                                     .join(Campus).order_by(Campus.name, Room.name).all()
-
-    # ── 2. Collect filter params ───────────────────────────────────────────────
-    campus_id  = request.args.get("campus_id",  "")
-    room_id    = request.args.get("room_id",    "")
-    status     = request.args.get("status",     "all")
-    category   = request.args.get("category",   "all")
-    staff      = request.args.get("staff",      "").strip()
-    capturer   = request.args.get("capturer",   "").strip()
-    min_cost   = request.args.get("min_cost",   "").strip()
-    max_cost   = request.args.get("max_cost",   "").strip()
-    date_from  = request.args.get("date_from",  "").strip()
-    date_to    = request.args.get("date_to",    "").strip()
-    alloc_from = request.args.get("alloc_from", "").strip()
-    alloc_to   = request.args.get("alloc_to",   "").strip()
-
-    current_filters = {
-        "campus_id":  campus_id,
-        "room_id":    room_id,
-        "status":     status,
-        "category":   category,
-        "staff":      staff,
-        "capturer":   capturer,
-        "min_cost":   min_cost,
-        "max_cost":   max_cost,
-        "date_from":  date_from,
-        "date_to":    date_to,
-        "alloc_from": alloc_from,
-        "alloc_to":   alloc_to,
-    }
+                                     .join(Campus).options(contains_eager(Room.campus)) \
+                                     .order_by(Campus.name, Room.name).all()
+
+    # ── 2. Parse filters (shared with the inventory view and exports) ─────────
+    filters = InventoryFilter.from_args(
+        request.args,
+        campus_ids=None if current_user.is_super_admin else campus_ids,
+    )
+    for message in filters.errors:
+        flash(message, "warning")
+    current_filters = filters.to_args()
 
     # Detect whether the user has actually submitted any filter
-    has_filters = any([
-        campus_id, room_id,
-        status not in ("", "all"),
-        category not in ("", "all"),
-        staff, capturer,
-        min_cost, max_cost,
-        date_from, date_to,
-        alloc_from, alloc_to,
-    ])
+    has_filters = filters.has_filters
 
     # ── 3. Column selection (preserved from export_items) ─────────────────────
     default_columns = [
@@ -1785,108 +1343,50 @@ def run_report():
         "Procured Date", "Allocated Date", "Captured Date",
     ]
     selected_columns = request.args.getlist("columns") or default_columns
+    selected_summaries = request.args.getlist("summaries")
+    summary_only = request.args.get("summary_only") == "1"
 
     # ── 4. Build query (only when filters were applied) ────────────────────────
-    items = []
+    # The preview is the first REPORT_PREVIEW_ROWS rows, streamed into the page;
+    # totals and pills cover the whole result (one grouped aggregate, cached).
+    items = ()
+    summary = InventorySummary()
+    preview_limit = current_app.config.get('REPORT_PREVIEW_ROWS', 100)
 
     if has_filters:
-        query = db.select(Item).join(Room).join(Campus).outerjoin(DataCapturer)
-
-        # Restrict non-super admins to their campuses
-        if not current_user.is_super_admin:
-            query = query.where(Room.campus_id.in_([c.campus_id for c in managed_campuses]))
-
-        # Campus
-        if campus_id:
-            query = query.where(Room.campus_id == int(campus_id))
+        summary = filters.summary()
 
-        # Room
-        if room_id:
-            query = query.where(Item.room_id == int(room_id))
-
-        # Status
-        if status and status != "all":
-            try:
-                query = query.where(Item.status == ItemStatus(status))
-            except (ValueError, KeyError):
-                pass
-
-        # Category
-        if category and category != "all":
-            try:
-                query = query.where(Item.category == ItemCategory(category))
-            except (ValueError, KeyError):
-                pass
-
-        # Responsible staff (name or staff number on the Room)
-        if staff:
-            staff_q = f"%{staff}%"
-            query = query.where(
-                db.or_(
-                    Room.staff_name.ilike(staff_q),
-                    Room.staff_number.ilike(staff_q),
-                )
-            )
-
-        # Data capturer (name or student number)
-        if capturer:
-            capturer_q = f"%{capturer}%"
-            query = query.where(
-                db.or_(
-                    DataCapturer.full_name.ilike(capturer_q),
-                    DataCapturer.student_number.ilike(capturer_q),
-                )
-            )
-
-        # Cost range
-        if min_cost:
-            try:
-                query = query.where(Item.cost >= float(min_cost))
-            except ValueError:
-                pass
-        if max_cost:
-            try:
-                query = query.where(Item.cost <= float(max_cost))
-            except ValueError:
-                pass
-
-        # Procured date range
-        if date_from:
-            try:
-                query = query.where(Item.Procured_date >= datetime.strptime(date_from, "%Y-%m-%d").date())
-            except ValueError:
-                pass
-        if date_to:
-            try:
-                query = query.where(Item.Procured_date <= datetime.strptime(date_to, "%Y-%m-%d").date())
-            except ValueError:
-                pass
-
-        # Allocated date range
-        if alloc_from:
-            try:
-                query = query.where(Item.allocated_date >= datetime.strptime(alloc_from, "%Y-%m-%d").date())
-            except ValueError:
-                pass
-        if alloc_to:
-            try:
-                query = query.where(Item.allocated_date <= datetime.strptime(alloc_to, "%Y-%m-%d").date())
-            except ValueError:
-                pass
+        query = filters.statement()
+        # Full-text search, best matches first; otherwise by location like the inventory view
+        if filters.hits is not None:
+            query += lambda s: s.order_by(SEARCH_SCORE.desc(), Item.item_id)
+        else:
+            query += lambda s: s.order_by(Campus.name, Room.name, Item.capture_date.desc(), Item.item_id.desc())
+        query += lambda s: s.limit(preview_limit)
+        items = stream_rows(query)
 
-        items = db.session.execute(query).scalars().all()
+    # Results this large are too big to export while the admin waits
+    export_job_threshold = current_app.config.get('REPORT_EXPORT_JOB_THRESHOLD', 20000)
+    export_as_job = summary.total > export_job_threshold
 
     # ── 5. Choices for dropdowns ───────────────────────────────────────────────
-    status_choices   = [(s.value, s.value.replace("_", " ").title()) for s in ItemStatus]
-    category_choices = [(c.value, c.value) for c in ItemCategory]
+    status_choices   = [(s.name.lower(), s.value.replace("_", " ").title()) for s in ItemStatus]
+    category_choices = [(c.name.lower(), c.value) for c in ItemCategory]
 
-    return render_template(
+    return stream_page(
         'admin/run_report.html',
         title='Generate Report',
         items=items,
+        total_items=summary.total,
+        summary=summary,
+        preview_limit=preview_limit,
+        export_as_job=export_as_job,
+        export_job_threshold=export_job_threshold,
         has_filters=has_filters,
         current_filters=current_filters,
         selected_columns=selected_columns,
+        selected_summaries=selected_summaries,
+        summary_only=summary_only,
         managed_campuses=managed_campuses,
         managed_rooms=managed_rooms,
         status_choices=status_choices,
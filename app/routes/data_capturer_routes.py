@@ -3,6 +3,12 @@ from flask_login import login_required, current_user
 from ..forms import LocationSelectionForm, ItemCreationForm,EditItemForm,ItemMovementForm
 from ..models import DataCapturer, Item, Campus, Room, db, ItemStatus,ItemMovement,ItemCategory
 from ..utils import capturer_required
+from ..presence import presence
+from ..substring import contains
+from ..inventory_filter import InventoryFilter
+from ..search import SEARCH_SCORE
+from ..query_guard import query_budget
+from ..pagination import keyset_paginate, clamp_per_page
 from datetime import datetime
 from sqlalchemy.orm import joinedload
 from sqlalchemy import or_
@@ -12,6 +18,13 @@ from sqlalchemy import distinct, func
 data_capturer_bp = Blueprint('capturer', __name__, url_prefix='/capturer')
 
 
+@data_capturer_bp.before_request
+def record_heartbeat():
+    """Buffer a presence heartbeat for the signed-in capturer (flushed in batches)."""
+    if current_user.is_authenticated and getattr(current_user, 'is_data_capturer', False):
+        presence.touch(current_user.data_capturer_id)
+
+
 
 @data_capturer_bp.route('/', methods=['GET', 'POST'])
 @data_capturer_bp.route('/dashboard', methods=['GET', 'POST'])
@@ -183,13 +196,13 @@ def autocomplete_item_types():
 @data_capturer_bp.route('/autocomplete/brands')
 def autocomplete_brands():
     q = request.args.get('q', '').strip()
-    suggestions = db.session.query(Item.brand).filter(Item.brand.ilike(f'%{q}%')).distinct().limit(10).all()
+    suggestions = db.session.query(Item.brand).filter(contains(Item.brand, q)).distinct().limit(10).all()
     return jsonify([s[0] for s in suggestions])
 
 @data_capturer_bp.route('/autocomplete/colors')
 def autocomplete_colors():
     q = request.args.get('q', '').strip()
-    suggestions = db.session.query(Item.color).filter(Item.color.ilike(f'%{q}%')).distinct().limit(10).all()
+    suggestions = db.session.query(Item.color).filter(contains(Item.color, q)).distinct().limit(10).all()
     return jsonify([s[0] for s in suggestions])
 
 
@@ -416,69 +429,40 @@ def manage_room_items(room_id):
 @data_capturer_bp.route('/my-items', methods=['GET'])
 @login_required
 @capturer_required
+@query_budget(10)
 def my_items():
     """View items captured by this user, with search and filter options."""
 
-    # Base query: items captured by current user
-    query = Item.query.options(
-        db.joinedload(Item.room).joinedload(Room.campus)
-    ).filter(
-        Item.data_capturer_id == current_user.data_capturer_id
+    # Items captured by current user; data capturers may not filter by "Disposed"
+    filters = InventoryFilter.from_args(
+        request.args,
+        data_capturer_id=current_user.data_capturer_id,
+        excluded_statuses=(ItemStatus.DISPOSED,),
     )
+    query = filters.statement()
+
+    # Full-text search ranks results; otherwise newest captures first
+    keys = [(Item.capture_date, True), (Item.item_id, True)]
+    sort = 'captured'
+    if filters.hits is not None:
+        keys = [(SEARCH_SCORE, True), (Item.item_id, False)]
+        sort = 'relevance'
+
+    page = keyset_paginate(
+        query, sort, keys,
+        per_page=clamp_per_page(request.args.get('per_page')),
+        after=request.args.get('after'),
+        before=request.args.get('before'),
+    )
+    items = page.items
 
-    # Get search/filter params from query string
-    asset_number = request.args.get('asset_number', '').strip()
-    item_name = request.args.get('item_name', '').strip()
-    status = request.args.get('status', '').strip()
-    campus_id = request.args.get('campus_id', '').strip()
-    room_id = request.args.get('room_id', '').strip()
-    procured_date_from = request.args.get('procured_date_from', '').strip()
-    procured_date_to = request.args.get('procured_date_to', '').strip()
-
-    # Apply filters if provided
-    if asset_number:
-        query = query.filter(Item.asset_number.ilike(f"%{asset_number}%"))
-
-    if item_name:
-        query = query.filter(Item.name.ilike(f"%{item_name}%"))
-
-    if status:
-         status = status.strip().upper()
-    
-    # Allow ANY valid status EXCEPT "DISPOSED" for data capturers
-    if status == "DISPOSED":
-        # Data capturers are not allowed to filter by "Disposed" → silently ignore
-        pass
-    else:
-        try:
-            status_enum = ItemStatus[status]
-            query = query.filter(Item.status == status_enum)
-        except KeyError:
-            # Invalid status (e.g. "BLAHBLAH", "123") → ignore silently
-            pass
-
-    if campus_id:
-        query = query.join(Item.room).filter(Room.campus_id == int(campus_id))
-
-    if room_id:
-        query = query.filter(Item.room_id == int(room_id))
-
-    if procured_date_from:
-        try:
-            date_from = datetime.strptime(procured_date_from, "%Y-%m-%d").date()
-            query = query.filter(Item.Procured_date >= date_from)
-        except ValueError:
-            pass
-
-    if procured_date_to:
-        try:
-            date_to = datetime.strptime(procured_date_to, "%Y-%m-%d").date()
-            query = query.filter(Item.Procured_date <= date_to)
-        except ValueError:
-            pass
+    # Totals cover every matching item, not just this page
+    summary = filters.summary()
 
-    # Execute query
-    items = query.order_by(Item.capture_date.desc()).all()
+    current_filters = filters.to_args()
+    page_args = dict(current_filters, per_page=page.per_page)
+    next_url = url_for('capturer.my_items', **page_args, after=page.next_cursor) if page.has_next else None
+    prev_url = url_for('capturer.my_items', **page_args, before=page.prev_cursor) if page.has_prev else None
 
     # Assigned campuses for dropdown
     assigned_campuses = current_user.assigned_campuses or []
@@ -491,18 +475,7 @@ def my_items():
         ]
 
     # Pass the rooms of the selected campus for initial rendering
-    rooms = rooms_json.get(campus_id, []) if campus_id else []
-
-    # Filters dict for template
-    filters = {
-        'asset_number': asset_number,
-        'item_name': item_name,
-        'status': status,
-        'campus_id': campus_id,
-        'room_id': room_id,
-        'procured_date_from': procured_date_from,
-        'procured_date_to': procured_date_to
-    }
+    rooms = rooms_json.get(current_filters.get('campus_id'), [])
 
     return render_template(
         'data_capturer/my_items.html',
@@ -510,8 +483,13 @@ def my_items():
         assigned_campuses=assigned_campuses,
         rooms=rooms,
         rooms_json=rooms_json,  # JSON-safe rooms for JS
-        filters=filters,
-        ItemStatus=ItemStatus
+        filters=current_filters,
+        ItemStatus=ItemStatus,
+        page=page,
+        total_items=summary.total,
+        summary=summary,
+        next_url=next_url,
+        prev_url=prev_url
     )
 
 
@@ -532,8 +510,6 @@ def search_staff():
     if len(query_term) < 2:
         return jsonify([])
 
-    search_pattern = f"%{query_term}%"
-
     # Query the Room table for distinct staff_number and staff_name pairs
     # that match the search term.
     # We use distinct() to avoid sending duplicate staff details.
@@ -544,8 +520,8 @@ def search_staff():
         )\
         .filter(
             or_(
-                Room.staff_number.ilike(search_pattern),
-                Room.staff_name.ilike(search_pattern)
+                contains(Room.staff_number, query_term),
+                contains(Room.staff_name, query_term)
             )
         )\
         .distinct()\
@@ -689,8 +665,8 @@ def move_item(item_id):
 
         try:
             # Count items affected by staff changes
-            source_items_affected = len(current_room.items)
-            dest_items_affected = len(new_room.items)
+            source_items_affected = current_room.item_count
+            dest_items_affected = new_room.item_count
             
             # Only update if staff details were actually changed
             source_changed = False
@@ -0,0 +1,100 @@
+"""
+Additive schema upgrades for databases created before a column or index existed.
+
+``db.create_all()`` only creates missing tables. ``upgrade_schema()`` adds
+any model column or index that an existing table lacks, then runs the
+backfill registered for each newly added column. Only nullable columns (or
+columns with a server default) can be added this way.
+
+``flask upgrade-schema`` runs the same upgrade by hand.
+"""
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import inspect, select, update, text
+from sqlalchemy.schema import CreateColumn
+
+from .models import db, Item, Room
+from .model_events import reconcile_room_counts
+
+
+# ==================== Backfills ====================
+
+def _backfill_item_campus(connection):
+    """Copy each item's room campus onto the denormalized Item.campus_id."""
+    room_campus = (
+        select(Room.__table__.c.campus_id)
+        .where(Room.__table__.c.room_id == Item.__table__.c.room_id)
+        .scalar_subquery()
+    )
+    connection.execute(update(Item.__table__).values(campus_id=room_campus))
+
+
+# (table name, column name) -> callable(connection), run once after the column is added
+BACKFILLS = {
+    ('item', 'campus_id'): _backfill_item_campus,
+    ('room', 'item_count'): reconcile_room_counts,
+    ('room', 'active_item_count'): reconcile_room_counts,
+}
+
+
+# ==================== Upgrade ====================
+
+def _index_names(connection, inspector, table_name):
+    # SQLite reflection skips expression indexes (e.g. on lower(name)), so read their names directly
+    if connection.dialect.name == 'sqlite':
+        rows = connection.execute(
+            text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :table"),
+            {'table': table_name},
+        )
+        return {name for (name,) in rows}
+    return {i['name'] for i in inspector.get_indexes(table_name)}
+
+
+def upgrade_schema():
+    """
+    Add missing columns and indexes to existing tables.
+    Returns a list of human-readable descriptions of what was changed.
+    """
+    changes = []
+    with db.engine.begin() as connection:
+        inspector = inspect(connection)
+        existing_tables = set(inspector.get_table_names())
+
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+
+            present = {c['name'] for c in inspector.get_columns(table.name)}
+            backfills = []
+            for column in table.columns:
+                if column.name in present:
+                    continue
+                ddl = CreateColumn(column).compile(dialect=connection.dialect)
+                connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {ddl}'))
+                changes.append(f'added column {table.name}.{column.name}')
+                backfill = BACKFILLS.get((table.name, column.name))
+                if backfill and backfill not in backfills:
+                    backfills.append(backfill)
+
+            # Backfills run once all of the table's new columns exist
+            for backfill in backfills:
+                backfill(connection)
+                changes.append(f'backfilled {table.name} ({backfill.__name__})')
+
+            indexed = _index_names(connection, inspector, table.name)
+            for index in table.indexes:
+                if index.name not in indexed:
+                    index.create(connection)
+                    changes.append(f'created index {index.name}')
+    return changes
+
+
+@click.command('upgrade-schema')
+@with_appcontext
+def upgrade_schema_command():
+    """Add missing columns/indexes to an existing database and backfill them."""
+    changes = upgrade_schema()
+    if not changes:
+        click.echo('Schema is up to date.')
+    for change in changes:
+        click.echo(f'✓ {change}')
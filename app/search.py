@@ -0,0 +1,245 @@
+"""
+Full-text inventory search.
+
+Each item gets one search document built from its name, asset number,
+serial, brand, room, campus and responsible staff. The document is indexed
+per database:
+
+* PostgreSQL – ``item_search.document`` is a ``tsvector`` with a GIN index,
+  queried with ``@@`` and ranked with ``ts_rank``;
+* SQLite – an FTS5 virtual table ``item_fts`` (rowid = item_id), queried with
+  ``MATCH`` and ranked with ``bm25``;
+* anything else – no index; ``search_hits`` falls back to ILIKE.
+
+An ``after_flush`` hook re-indexes items whose searchable fields changed,
+every item of a renamed/re-staffed/moved room and of a renamed campus, and
+drops deleted items. ``flask rebuild-search-index`` rebuilds from scratch.
+
+``search_hits(q)`` returns a subquery of ``(item_id, score)`` (higher score =
+better match) that list pages join to filter and rank results. Order by
+``SEARCH_SCORE`` rather than ``hits.c.score`` when the statement is a
+``lambda_stmt``: it names the joined subquery, so it still matches after
+SQLAlchemy clones the cached statement with new search terms.
+"""
+import re
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import (
+    event, inspect, select, insert, delete, func, or_, literal, literal_column, bindparam, text,
+    table, column, Integer, Float,
+)
+from sqlalchemy.orm import Session
+
+from .models import db, Item, Room, Campus
+
+
+ITEM_FIELDS = ('name', 'asset_number', 'serial_number', 'brand', 'room_id')
+ROOM_FIELDS = ('name', 'staff_name', 'staff_number', 'campus_id')
+CAMPUS_FIELDS = ('name',)
+
+MAX_TERMS = 8
+REBUILD_BATCH = 2000
+
+SEARCH_SCORE = literal_column('search_hits.score', Float)
+
+# Lightweight table handles; the tables themselves are created by ensure_search_index()
+pg_search = table('item_search', column('item_id', Integer), column('document'))
+sqlite_fts = table('item_fts', column('rowid', Integer), column('document'))
+
+PG_DDL = (
+    'CREATE TABLE IF NOT EXISTS item_search ('
+    ' item_id INTEGER PRIMARY KEY REFERENCES item (item_id) ON DELETE CASCADE,'
+    ' document TSVECTOR NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS ix_item_search_document ON item_search USING GIN (document)',
+)
+SQLITE_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS item_fts USING fts5(document, tokenize='unicode61')",
+)
+
+
+def search_terms(q):
+    """Split user input into at most MAX_TERMS lowercase word tokens."""
+    return re.findall(r'\w+', (q or '').lower())[:MAX_TERMS]
+
+
+def _dialect(bind):
+    return bind.dialect.name
+
+
+# ==================== Documents ====================
+
+def _document_rows(connection, item_ids=(), room_ids=(), campus_ids=()):
+    """(item_id, document text) for the given items and for every item in the given rooms/campuses."""
+    stmt = (
+        select(Item.item_id, Item.name, Item.asset_number, Item.serial_number, Item.brand,
+               Room.name, Campus.name, Room.staff_name, Room.staff_number)
+        .join(Room, Item.room_id == Room.room_id)
+        .join(Campus, Room.campus_id == Campus.campus_id)
+    )
+    conditions = []
+    if item_ids:
+        conditions.append(Item.item_id.in_(item_ids))
+    if room_ids:
+        conditions.append(Item.room_id.in_(room_ids))
+    if campus_ids:
+        conditions.append(Room.campus_id.in_(campus_ids))
+    if conditions:
+        stmt = stmt.where(or_(*conditions))
+    for row in connection.execute(stmt.execution_options(yield_per=REBUILD_BATCH)):
+        yield row[0], ' '.join(str(part) for part in row[1:] if part)
+
+
+def _delete_documents(connection, item_ids=None):
+    if _dialect(connection) == 'postgresql':
+        stmt = delete(pg_search)
+        if item_ids is not None:
+            stmt = stmt.where(pg_search.c.item_id.in_(item_ids))
+    else:
+        stmt = delete(sqlite_fts)
+        if item_ids is not None:
+            stmt = stmt.where(sqlite_fts.c.rowid.in_(item_ids))
+    connection.execute(stmt)
+
+
+def _insert_documents(connection, rows):
+    if not rows:
+        return
+    if _dialect(connection) == 'postgresql':
+        stmt = insert(pg_search).values(
+            item_id=bindparam('item_id'),
+            document=func.to_tsvector('simple', bindparam('doc')),
+        )
+    else:
+        stmt = insert(sqlite_fts).values(rowid=bindparam('item_id'), document=bindparam('doc'))
+    connection.execute(stmt, [{'item_id': item_id, 'doc': doc} for item_id, doc in rows])
+
+
+def _index_supported(connection):
+    return _dialect(connection) in ('postgresql', 'sqlite')
+
+
+# ==================== Sync ====================
+
+def _changed(obj, fields):
+    state = inspect(obj)
+    return any(state.attrs[name].history.has_changes() for name in fields)
+
+
+@event.listens_for(Session, 'after_flush')
+def _maintain_search_index(session, flush_context):
+    """Re-index items touched by this flush (directly or through their room/campus)."""
+    item_ids, room_ids, campus_ids, deleted_ids = set(), set(), set(), set()
+
+    for obj in session.new:
+        if isinstance(obj, Item):
+            item_ids.add(obj.item_id)
+
+    for obj in session.dirty:
+        if isinstance(obj, Item) and _changed(obj, ITEM_FIELDS):
+            item_ids.add(obj.item_id)
+        elif isinstance(obj, Room) and _changed(obj, ROOM_FIELDS):
+            room_ids.add(obj.room_id)
+        elif isinstance(obj, Campus) and _changed(obj, CAMPUS_FIELDS):
+            campus_ids.add(obj.campus_id)
+
+    for obj in session.deleted:
+        if isinstance(obj, Item):
+            deleted_ids.add(obj.item_id)
+
+    if not (item_ids or room_ids or campus_ids or deleted_ids):
+        return
+    connection = session.connection()
+    if not _index_supported(connection):
+        return
+
+    rows = list(_document_rows(connection, item_ids, room_ids, campus_ids))
+    _delete_documents(connection, deleted_ids | {item_id for item_id, _ in rows})
+    _insert_documents(connection, rows)
+
+
+def rebuild_search_index():
+    """Re-create every search document. Returns the number of items indexed."""
+    count = 0
+    with db.engine.begin() as connection:
+        if not _index_supported(connection):
+            return 0
+        _delete_documents(connection)
+        batch = []
+        for row in _document_rows(connection):
+            batch.append(row)
+            if len(batch) >= REBUILD_BATCH:
+                _insert_documents(connection, batch)
+                count += len(batch)
+                batch = []
+        _insert_documents(connection, batch)
+        count += len(batch)
+    return count
+
+
+def ensure_search_index():
+    """Create the search table/index if missing and build it on first start-up."""
+    with db.engine.begin() as connection:
+        dialect = _dialect(connection)
+        if dialect == 'postgresql':
+            statements, index = PG_DDL, pg_search
+        elif dialect == 'sqlite':
+            statements, index = SQLITE_DDL, sqlite_fts
+        else:
+            return
+        for statement in statements:
+            connection.execute(text(statement))
+        indexed = connection.execute(select(literal(1)).select_from(index).limit(1)).first()
+        has_items = connection.execute(select(Item.item_id).limit(1)).first()
+    if indexed is None and has_items is not None:
+        rebuild_search_index()
+
+
+@click.command('rebuild-search-index')
+@with_appcontext
+def rebuild_search_index_command():
+    """Rebuild the full-text inventory search index."""
+    count = rebuild_search_index()
+    click.echo(f'Indexed {count} items for search.')
+
+
+# ==================== Querying ====================
+
+def search_hits(q):
+    """
+    Subquery ``(item_id, score)`` of items matching every term of ``q`` as a
+    word prefix, or None when ``q`` has no searchable terms.
+    """
+    terms = search_terms(q)
+    if not terms:
+        return None
+
+    dialect = _dialect(db.session.get_bind())
+    if dialect == 'postgresql':
+        tsquery = func.to_tsquery('simple', ' & '.join(f'{t}:*' for t in terms))
+        return (
+            select(pg_search.c.item_id.label('item_id'),
+                   func.ts_rank(pg_search.c.document, tsquery).cast(Float).label('score'))
+            .where(pg_search.c.document.op('@@')(tsquery))
+            .subquery('search_hits')
+        )
+    if dialect == 'sqlite':
+        match = ' '.join(f'"{t}"*' for t in terms)
+        return (
+            # bm25() is lower-is-better, so negate it into a score
+            select(sqlite_fts.c.rowid.label('item_id'),
+                   (-func.bm25(text('item_fts'))).label('score'))
+            .where(sqlite_fts.c.document.op('MATCH')(match))
+            .subquery('search_hits')
+        )
+
+    # No full-text index on this database: every term must appear in some field
+    fields = (Item.name, Item.asset_number, Item.serial_number, Item.brand,
+              Room.name, Campus.name, Room.staff_name, Room.staff_number)
+    return (
+        select(Item.item_id.label('item_id'), literal(1.0, Float).label('score'))
+        .join(Room, Item.room_id == Room.room_id)
+        .join(Campus, Room.campus_id == Campus.campus_id)
+        .where(*[or_(*[f.ilike(f'%{t}%') for f in fields]) for t in terms])
+        .subquery('search_hits')
+    )
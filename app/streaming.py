@@ -0,0 +1,61 @@
+"""
+Streaming page renders for result sets too large to buffer.
+
+``render_template`` builds the whole page in memory before the first byte is
+sent. ``stream_page()`` renders the same template incrementally instead: the
+head, filters and summary pills reach the browser immediately and each table
+row is rendered as it is fetched. Pass the rows as ``stream_rows(stmt)`` — a
+``yield_per`` generator — so worker memory stays flat however many rows
+match; anything the template needs before the rows (counts, totals) must come
+from an aggregate query run up front.
+
+Templates rendered this way may iterate the rows once only and must not use
+``|length`` or truthiness on them. Flask tears down the view's context (and
+closes its session) when the view returns, before the body is streamed, so
+objects the view loaded are detached while the template renders: any
+relationship the template reads on them must be eager-loaded.
+"""
+from flask import Response, get_flashed_messages, stream_template
+
+from .models import db
+
+
+STREAM_BATCH = 500          # rows fetched per round trip (server-side cursor on PostgreSQL)
+STREAM_CHUNK_BYTES = 16384  # rendered output sent per write
+
+
+def stream_rows(stmt, batch=STREAM_BATCH):
+    """
+    Iterate the ORM rows of ``stmt``, ``batch`` at a time, without loading
+    them all. The statement runs when iteration starts, i.e. while the
+    response is being streamed.
+    """
+    yield from db.session.execute(stmt, execution_options={'yield_per': batch}).scalars()
+
+
+def _buffered(chunks, size):
+    # Jinja yields every output node separately; join them into fewer, larger writes
+    buffer, buffered = [], 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        buffered += len(chunk)
+        if buffered >= size:
+            yield ''.join(buffer)
+            buffer, buffered = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def stream_page(template_name, **context):
+    """
+    Streamed equivalent of ``render_template``. ``request`` and ``g`` are
+    still available while rendering, but the view's session is already
+    closed (see above).
+    """
+    # Pop flashed messages now: the session cookie is sent with the headers,
+    # before the template asks for them. The template then reads the request cache.
+    get_flashed_messages(with_categories=True)
+    body = _buffered(stream_template(template_name, **context), STREAM_CHUNK_BYTES)
+    response = Response(body, mimetype='text/html')
+    response.headers['X-Accel-Buffering'] = 'no'   # don't let a reverse proxy re-buffer it
+    return response
@@ -0,0 +1,228 @@
+"""
+Indexed substring matching for ``ILIKE '%term%'`` style filters.
+
+A leading-wildcard LIKE cannot use a B-tree index, so every such filter
+scans its table. ``contains(column, term)`` returns the same case-insensitive
+"column contains term" condition, served by an index per database:
+
+* PostgreSQL – a ``pg_trgm`` GIN index (``gin_trgm_ops``) on each column in
+  ``SUBSTRING_COLUMNS``; the planner uses it for ILIKE directly. When the
+  database role may not create the extension, start-up logs a warning and
+  the filters run as unindexed ILIKE;
+* SQLite – an n-gram side table ``substring_gram(column_key, gram, row_id)``
+  holding every lowercase trigram of each value. A term's trigrams narrow the
+  rows to candidates, then ILIKE confirms the match;
+* anything else, or terms shorter than a trigram – plain ILIKE.
+
+An ``after_flush`` hook keeps the SQLite side table in sync with the tracked
+columns; ``flask rebuild-substring-index`` rebuilds it from scratch. A column
+added to ``SUBSTRING_COLUMNS`` later is indexed on the next start-up.
+"""
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import (
+    MetaData, Table, Column, Integer, String, PrimaryKeyConstraint,
+    event, inspect, select, insert, delete, func, and_, text,
+)
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from .models import db, Item, Room, DataCapturer
+
+
+GRAM_SIZE = 3
+REBUILD_BATCH = 5000
+
+# column key -> column. Only columns listed here can be passed to contains().
+SUBSTRING_COLUMNS = {
+    'item.asset_number': Item.asset_number,
+    'item.name': Item.name,
+    'item.brand': Item.brand,
+    'item.color': Item.color,
+    'room.name': Room.name,
+    'room.staff_name': Room.staff_name,
+    'room.staff_number': Room.staff_number,
+    'data_capturer.full_name': DataCapturer.full_name,
+    'data_capturer.student_number': DataCapturer.student_number,
+}
+
+# SQLite side table, kept out of db.metadata so it is never created on PostgreSQL
+gram_metadata = MetaData()
+substring_gram = Table(
+    'substring_gram', gram_metadata,
+    Column('column_key', String(64), nullable=False),
+    Column('gram', String(GRAM_SIZE), nullable=False),
+    Column('row_id', Integer, nullable=False),
+    PrimaryKeyConstraint('column_key', 'gram', 'row_id'),
+    sqlite_with_rowid=False,
+)
+
+
+def _column_key(column):
+    return f'{column.table.name}.{column.key}'
+
+
+def _primary_key(column):
+    return column.table.primary_key.columns.values()[0]
+
+
+def _escape_like(term):
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def grams(value):
+    """The distinct lowercase trigrams of ``value``."""
+    value = (value or '').lower()
+    return {value[i:i + GRAM_SIZE] for i in range(len(value) - GRAM_SIZE + 1)}
+
+
+def _dialect(bind):
+    return bind.dialect.name
+
+
+def _pg_index_ddl(key):
+    table_name, column_name = key.split('.')
+    return (f'CREATE INDEX IF NOT EXISTS ix_trgm_{table_name}_{column_name} '
+            f'ON {table_name} USING GIN ({column_name} gin_trgm_ops)')
+
+
+# ==================== Querying ====================
+
+def contains(column, term):
+    """Case-insensitive "``column`` contains ``term``" condition, index-assisted where possible."""
+    condition = column.ilike(f'%{_escape_like(term)}%', escape='\\')
+    needle = grams(term)
+    if not needle or _dialect(db.session.get_bind()) != 'sqlite':
+        return condition
+
+    # Rows holding every trigram of the term are the only possible matches
+    candidates = (
+        select(substring_gram.c.row_id)
+        .where(substring_gram.c.column_key == _column_key(column),
+               substring_gram.c.gram.in_(needle))
+        .group_by(substring_gram.c.row_id)
+        .having(func.count() == len(needle))
+    )
+    return and_(_primary_key(column).in_(candidates), condition)
+
+
+# ==================== Sync (SQLite) ====================
+
+def _gram_rows(key, row_id, value):
+    return [{'column_key': key, 'gram': gram, 'row_id': row_id} for gram in grams(value)]
+
+
+def _write_grams(connection, key, values):
+    """Replace the n-grams of ``{row_id: value}`` for one column."""
+    connection.execute(
+        delete(substring_gram).where(substring_gram.c.column_key == key,
+                                     substring_gram.c.row_id.in_(list(values)))
+    )
+    rows = [row for row_id, value in values.items() for row in _gram_rows(key, row_id, value)]
+    if rows:
+        connection.execute(insert(substring_gram), rows)
+
+
+@event.listens_for(Session, 'after_flush')
+def _maintain_substring_index(session, flush_context):
+    """Re-index tracked columns of rows inserted, changed or deleted in this flush."""
+    changes = {}   # column key -> {row_id: new value (None = removed)}
+
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, (Item, Room, DataCapturer)):
+            continue
+        state = inspect(obj)
+        row_id = state.mapper.primary_key_from_instance(obj)[0]
+        for key, column in SUBSTRING_COLUMNS.items():
+            if column.table is not state.mapper.local_table:
+                continue
+            if obj in session.deleted:
+                changes.setdefault(key, {})[row_id] = None
+            elif obj in session.new or state.attrs[column.key].history.has_changes():
+                changes.setdefault(key, {})[row_id] = getattr(obj, column.key)
+
+    if not changes:
+        return
+    connection = session.connection()
+    if _dialect(connection) != 'sqlite':
+        return
+    for key, values in changes.items():
+        _write_grams(connection, key, values)
+
+
+def rebuild_substring_index(keys=None):
+    """
+    Re-create the n-gram rows of the given column keys, default all (SQLite
+    only). Returns the number of values indexed.
+    """
+    keys = list(SUBSTRING_COLUMNS) if keys is None else keys
+    count = 0
+    with db.engine.begin() as connection:
+        if _dialect(connection) != 'sqlite':
+            return 0
+        connection.execute(delete(substring_gram).where(substring_gram.c.column_key.in_(keys)))
+        for key in keys:
+            column = SUBSTRING_COLUMNS[key]
+            stmt = select(_primary_key(column), column).where(column.isnot(None))
+            batch = []
+            for row_id, value in connection.execute(stmt.execution_options(yield_per=REBUILD_BATCH)):
+                batch.extend(_gram_rows(key, row_id, value))
+                count += 1
+                if len(batch) >= REBUILD_BATCH:
+                    connection.execute(insert(substring_gram), batch)
+                    batch = []
+            if batch:
+                connection.execute(insert(substring_gram), batch)
+    return count
+
+
+def _ensure_pg_trgm_indexes():
+    # CREATE EXTENSION needs a privileged role; without it the app still runs,
+    # and contains() is the same ILIKE, just without an index behind it
+    try:
+        with db.engine.begin() as connection:
+            installed = connection.execute(
+                text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).first()
+            if installed is None:
+                connection.execute(text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+            for key in SUBSTRING_COLUMNS:
+                connection.execute(text(_pg_index_ddl(key)))
+    except DBAPIError as e:
+        current_app.logger.warning(
+            'Trigram indexes not created, substring filters scan their tables '
+            f'(run CREATE EXTENSION pg_trgm as a privileged role, then restart): {e.orig}')
+
+
+def _unindexed_keys(connection):
+    """Column keys with no n-gram rows although some value is long enough to have one."""
+    missing = []
+    for key, column in SUBSTRING_COLUMNS.items():
+        indexed = connection.execute(
+            select(substring_gram.c.row_id).where(substring_gram.c.column_key == key).limit(1)).first()
+        if indexed is None and connection.execute(
+                select(_primary_key(column)).where(func.length(column) >= GRAM_SIZE).limit(1)).first():
+            missing.append(key)
+    return missing
+
+
+def ensure_substring_index():
+    """Create the trigram indexes / n-gram table if missing and index any column not indexed yet."""
+    if _dialect(db.engine) == 'postgresql':
+        _ensure_pg_trgm_indexes()
+        return
+    with db.engine.begin() as connection:
+        if _dialect(connection) != 'sqlite':
+            return
+        substring_gram.create(connection, checkfirst=True)
+        missing = _unindexed_keys(connection)
+    if missing:
+        rebuild_substring_index(missing)
+
+
+@click.command('rebuild-substring-index')
+@with_appcontext
+def rebuild_substring_index_command():
+    """Rebuild the n-gram substring index (SQLite)."""
+    count = rebuild_substring_index()
+    click.echo(f'Indexed {count} values for substring search.')
@@ -0,0 +1,177 @@
+"""
+Time-series aggregation over item and movement dates.
+
+``time_series()`` counts rows per day/week/month/year bucket with a single
+GROUP BY over a truncated date, then fills empty buckets in Python, so a
+60-month window costs the same single query as a 6-month one.
+"""
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import Date, DateTime, func, select
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+from sqlalchemy.sql.visitors import InternalTraversal
+
+from .models import db, Item, ItemMovement, Room
+
+
+UNITS = ('day', 'week', 'month', 'year')
+
+# source name -> (date column, campus column, join needed to reach the campus column or None)
+SOURCES = {
+    'capture_date': (Item.capture_date, Item.campus_id, None),
+    'procured_date': (Item.Procured_date, Item.campus_id, None),
+    'allocated_date': (Item.allocated_date, Item.campus_id, None),
+    'move_date': (ItemMovement.move_date, Room.campus_id, (Room, ItemMovement.to_room_id == Room.room_id)),
+}
+
+LABEL_FORMATS = {
+    'day': '%d %b %Y',
+    'week': 'Wk %d %b %Y',
+    'month': '%b %Y',
+    'year': '%Y',
+}
+
+MAX_PERIODS = 1000
+
+
+# ==================== SQL: date truncation per dialect ====================
+
+class date_bucket(FunctionElement):
+    """Truncate a date/datetime column to the start of its day/week/month/year (weeks start Monday)."""
+    type = Date()
+    inherit_cache = True
+    name = 'date_bucket'
+    # The unit is rendered into the SQL, so it must be part of the statement cache key
+    _traverse_internals = FunctionElement._traverse_internals + [('unit', InternalTraversal.dp_string)]
+
+    def __init__(self, unit, column):
+        self.unit = unit
+        super().__init__(column)
+
+
+@compiles(date_bucket)
+def _date_bucket_default(element, compiler, **kw):
+    column = compiler.process(list(element.clauses)[0], **kw)
+    return "CAST(date_trunc('%s', %s) AS DATE)" % (element.unit, column)
+
+
+@compiles(date_bucket, 'sqlite')
+def _date_bucket_sqlite(element, compiler, **kw):
+    column = compiler.process(list(element.clauses)[0], **kw)
+    if element.unit == 'day':
+        return 'date(%s)' % column
+    if element.unit == 'week':
+        return "date(%s, 'weekday 0', '-6 days')" % column
+    if element.unit == 'month':
+        return "strftime('%%Y-%%m-01', %s)" % column
+    return "strftime('%%Y-01-01', %s)" % column
+
+
+# ==================== Python: bucket arithmetic ====================
+
+def bucket_floor(value, unit):
+    """Start of the bucket containing ``value``."""
+    if isinstance(value, datetime):
+        value = value.date()
+    if unit == 'day':
+        return value
+    if unit == 'week':
+        return value - timedelta(days=value.weekday())
+    if unit == 'month':
+        return value.replace(day=1)
+    return value.replace(month=1, day=1)
+
+
+def bucket_shift(value, unit, n):
+    """Move a bucket start ``n`` buckets forward (negative = backwards)."""
+    if unit == 'day':
+        return value + timedelta(days=n)
+    if unit == 'week':
+        return value + timedelta(weeks=n)
+    if unit == 'month':
+        months = value.year * 12 + (value.month - 1) + n
+        return date(months // 12, months % 12 + 1, 1)
+    return date(value.year + n, 1, 1)
+
+
+def bucket_count(start_bucket, end_bucket, unit):
+    """Number of buckets from ``start_bucket`` to ``end_bucket`` inclusive."""
+    if unit == 'day':
+        return (end_bucket - start_bucket).days + 1
+    if unit == 'week':
+        return (end_bucket - start_bucket).days // 7 + 1
+    if unit == 'month':
+        return (end_bucket.year - start_bucket.year) * 12 + end_bucket.month - start_bucket.month + 1
+    return end_bucket.year - start_bucket.year + 1
+
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return datetime.strptime(value[:10], '%Y-%m-%d').date()
+    return value
+
+
+def time_series(source='capture_date', unit='month', periods=6, start=None, end=None, campus_ids=None):
+    """
+    Count rows per ``unit`` bucket of the ``source`` date.
+
+    The window is ``start``..``end`` (inclusive dates) when given, otherwise
+    the last ``periods`` buckets up to and including the current one.
+    ``campus_ids=None`` means no campus restriction.
+    Returns ``[{'bucket': 'YYYY-MM-DD', 'label': str, 'count': int}, ...]``.
+    """
+    if source not in SOURCES:
+        raise ValueError(f"Unknown time-series source '{source}'.")
+    if unit not in UNITS:
+        raise ValueError(f"Unknown time-series unit '{unit}'.")
+
+    periods = max(1, min(int(periods), MAX_PERIODS))
+    try:
+        end_bucket = bucket_floor(end or date.today(), unit)
+        if start:
+            start_bucket = bucket_floor(start, unit)
+        else:
+            start_bucket = bucket_shift(end_bucket, unit, -(periods - 1))
+        window_end = bucket_shift(end_bucket, unit, 1)
+    except (OverflowError, ValueError):
+        # Stepping past date.min / date.max
+        raise ValueError('Time-series window is outside the supported date range.')
+    if start_bucket > end_bucket:
+        raise ValueError('Time-series start must not be after end.')
+    # An explicit start..end is bounded like ``periods``
+    if bucket_count(start_bucket, end_bucket, unit) > MAX_PERIODS:
+        raise ValueError(f'Time-series window is longer than {MAX_PERIODS} {unit}s; use a larger unit.')
+
+    column, campus_column, campus_join = SOURCES[source]
+    bucket = date_bucket(unit, column)
+
+    lower, upper = start_bucket, window_end
+    if isinstance(column.type, DateTime):
+        lower = datetime.combine(lower, datetime.min.time())
+        upper = datetime.combine(upper, datetime.min.time())
+
+    stmt = (
+        select(bucket.label('bucket'), func.count().label('count'))
+        .where(column >= lower, column < upper)
+        .group_by(bucket)
+    )
+    if campus_ids is not None:
+        if campus_join is not None:
+            stmt = stmt.join(*campus_join)
+        stmt = stmt.where(campus_column.in_(campus_ids))
+
+    counts = {_as_date(row.bucket): row.count for row in db.session.execute(stmt)}
+
+    series = []
+    current = start_bucket
+    while current <= end_bucket:
+        series.append({
+            'bucket': current.isoformat(),
+            'label': current.strftime(LABEL_FORMATS[unit]),
+            'count': counts.get(current, 0),
+        })
+        current = bucket_shift(current, unit, 1)
+    return series
@@ -22,11 +22,54 @@ class Config:
     # Will be set based on environment at runtime
     SQLALCHEMY_DATABASE_URI = None
 
+    # Dashboard metrics cache: 'memory' (single worker), 'sqlite' (shared by all workers) or 'none'
+    DASHBOARD_CACHE_BACKEND = os.environ.get('DASHBOARD_CACHE_BACKEND', 'memory')
+    DASHBOARD_CACHE_TTL = int(os.environ.get('DASHBOARD_CACHE_TTL', 120))  # seconds
+    DASHBOARD_CACHE_MAX_ENTRIES = 256
+    DASHBOARD_CACHE_PATH = os.path.join(basedir, 'instance', 'dashboard_cache.sqlite')
+
+    # Total-row counts for paginated list pages (same backends as the dashboard cache)
+    LIST_COUNT_CACHE_BACKEND = os.environ.get('LIST_COUNT_CACHE_BACKEND', 'memory')
+    LIST_COUNT_CACHE_TTL = 300  # seconds
+    LIST_COUNT_CACHE_MAX_ENTRIES = 512
+    LIST_COUNT_CACHE_PATH = os.path.join(basedir, 'instance', 'list_count_cache.sqlite')
+
+    # Capturer presence: buffered heartbeats are written to the DB this often per worker,
+    # and a capturer seen within the online window counts as online (seconds)
+    PRESENCE_FLUSH_INTERVAL = int(os.environ.get('PRESENCE_FLUSH_INTERVAL', 30))
+    PRESENCE_ONLINE_WINDOW = int(os.environ.get('PRESENCE_ONLINE_WINDOW', 300))
+
+    # List pages declare a fixed SQL query budget (@query_budget); over-budget requests
+    # are logged, or raise when strict (set QUERY_BUDGET_STRICT=1 in tests/local runs)
+    QUERY_BUDGET_STRICT = os.environ.get('QUERY_BUDGET_STRICT') == '1'
+
+    # Report page: rows shown in the live preview, and the result size above which
+    # exports are handed to a background job instead of being built in the request
+    REPORT_PREVIEW_ROWS = int(os.environ.get('REPORT_PREVIEW_ROWS', 100))
+    REPORT_EXPORT_JOB_THRESHOLD = int(os.environ.get('REPORT_EXPORT_JOB_THRESHOLD', 20000))
+
+    # Background export jobs: worker processes, where finished files are kept,
+    # and how long they stay downloadable (seconds)
+    EXPORT_JOB_WORKERS = int(os.environ.get('EXPORT_JOB_WORKERS', 2))
+    EXPORT_DIR = os.environ.get('EXPORT_DIR', os.path.join(basedir, 'instance', 'exports'))
+    EXPORT_JOB_TTL = int(os.environ.get('EXPORT_JOB_TTL', 86400))
+    # A running job whose worker has not sent a heartbeat for this long is failed (seconds)
+    EXPORT_JOB_STALE_AFTER = int(os.environ.get('EXPORT_JOB_STALE_AFTER', 300))
+    # Finished export files kept for repeat downloads until the data changes;
+    # least recently downloaded files are removed above this size (0 = off)
+    EXPORT_CACHE_DIR = os.environ.get('EXPORT_CACHE_DIR', os.path.join(basedir, 'instance', 'export_cache'))
+    EXPORT_CACHE_MAX_BYTES = int(os.environ.get('EXPORT_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+    # Processes each background PDF export uses to lay out and render its pages
+    PDF_RENDER_WORKERS = int(os.environ.get('PDF_RENDER_WORKERS', 1))
+
 class DevelopmentConfig(Config):
     SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(basedir, 'instance', 'app.db')}"
 
 class ProductionConfig(Config):
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
+    # Several gunicorn workers: share cached dashboards and invalidations through one file
+    DASHBOARD_CACHE_BACKEND = os.environ.get('DASHBOARD_CACHE_BACKEND', 'sqlite')
+    LIST_COUNT_CACHE_BACKEND = os.environ.get('LIST_COUNT_CACHE_BACKEND', 'sqlite')
 
 # Choose config based on environment variable
 if os.environ.get('ENVIRONMENT') == 'production':
@@ -0,0 +1,81 @@
+"""
+Shared fixtures: an app on a throwaway SQLite database, seeded with a
+campus layout, one capturer and any number of items, and test clients
+logged in as the super admin or the capturer.
+"""
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app import create_app
+from app.models import db, Admin, DataCapturer, Campus, Room, Item, ItemStatus, ItemCategory
+from config import Config
+
+
+def make_config(tmp_path, **overrides):
+    settings = dict(
+        TESTING=True,
+        SECRET_KEY='test',
+        WTF_CSRF_ENABLED=False,
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'app.db'}",
+        EXPORT_DIR=str(tmp_path / 'exports'),
+        EXPORT_CACHE_DIR=str(tmp_path / 'export_cache'),
+        DASHBOARD_CACHE_PATH=str(tmp_path / 'dashboard_cache.sqlite'),
+        LIST_COUNT_CACHE_PATH=str(tmp_path / 'list_count_cache.sqlite'),
+    )
+    settings.update(overrides)
+    return type('TestConfig', (Config,), settings)
+
+
+def seed_items(count):
+    """A super admin, one capturer, two campuses and ``count`` items spread over their rooms."""
+    admin = Admin(username='super', is_super_admin=True)
+    admin.set_password('test')
+    campuses = [Campus(name='Steve Biko'), Campus(name='Ritson')]
+    db.session.add_all([admin] + campuses)
+    db.session.flush()
+
+    capturer = DataCapturer(full_name='Test Capturer', student_number='21000001', admin_id=admin.admin_id)
+    capturer.set_password('test')
+    capturer.assigned_campuses = campuses
+    # One room per few items, so rows point at many different rooms
+    rooms = [Room(name=f'Room {i}', campus_id=campuses[i % 2].campus_id, staff_name=f'Staff {i}',
+                  staff_number=f'{10000000 + i}')
+             for i in range(max(2, count // 4))]
+    db.session.add_all([capturer] + rooms)
+    db.session.flush()
+
+    statuses, categories = list(ItemStatus), list(ItemCategory)
+    today = date.today()
+    db.session.add_all([
+        Item(asset_number=f'A{i:06d}', serial_number=f'S{i}', name=f'Item {i % 7}', brand='Dell',
+             status=statuses[i % len(statuses)], category=categories[i % len(categories)],
+             cost=Decimal(100 + i), Procured_date=today - timedelta(days=i),
+             allocated_date=today - timedelta(days=i // 2),
+             capture_date=datetime.utcnow() - timedelta(hours=i),
+             room_id=rooms[i % len(rooms)].room_id, data_capturer_id=capturer.data_capturer_id)
+        for i in range(count)
+    ])
+    db.session.commit()
+    return admin.admin_id, capturer.data_capturer_id
+
+
+def login(app, user_id):
+    """Test client with a Flask-Login session for ``'A-<id>'`` / ``'D-<id>'``."""
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = user_id
+        session['_fresh'] = True
+    return client
+
+
+@pytest.fixture(scope='session')
+def seeded_app(tmp_path_factory):
+    """Factory: ``seeded_app(count, **config)`` -> (app, admin client, capturer client)."""
+    def build(count, **config):
+        app = create_app(make_config(tmp_path_factory.mktemp('app'), **config))
+        with app.app_context():
+            admin_id, capturer_id = seed_items(count)
+        return app, login(app, f'A-{admin_id}'), login(app, f'D-{capturer_id}')
+    return build
@@ -0,0 +1,57 @@
+"""Commits touching Item, Room or DataCapturer drop the cached dashboard; rollbacks do not."""
+from datetime import date
+
+import pytest
+
+from app.models import db, Item, Room, DataCapturer, ItemStatus
+from app.cache import ResultCache
+from app.dashboard_metrics import dashboard_cache, get_dashboard_metrics
+
+
+TODAY = date.today()
+KEY = ResultCache.make_key('super', 'all', TODAY.isoformat())
+
+
+def _cached():
+    return dashboard_cache.backend.get(dashboard_cache.namespace, KEY) is not None
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def app(request, seeded_app):
+    app, _, _ = seeded_app(8, DASHBOARD_CACHE_BACKEND=request.param)
+    with app.app_context():
+        yield app
+
+
+@pytest.mark.parametrize('change', [
+    lambda: setattr(db.session.get(Item, 1), 'status', ItemStatus.STOLEN),
+    lambda: setattr(db.session.get(Room, 1), 'is_active', False),
+    lambda: setattr(db.session.get(DataCapturer, 1), 'full_name', 'Renamed'),
+], ids=['item', 'room', 'capturer'])
+def test_commit_invalidates_dashboard(app, change):
+    get_dashboard_metrics(today=TODAY)
+    assert _cached()
+    change()
+    db.session.commit()
+    assert not _cached()
+
+
+def test_recomputed_after_commit(app):
+    before, _ = get_dashboard_metrics(today=TODAY)
+    item = db.session.get(Item, 1)
+    assert item.status != ItemStatus.STOLEN
+    item.status = ItemStatus.STOLEN
+    db.session.commit()
+    after, _ = get_dashboard_metrics(today=TODAY)
+    assert after.stolen_items == before.stolen_items + 1
+
+
+def test_rollback_keeps_dashboard(app):
+    get_dashboard_metrics(today=TODAY)
+    db.session.get(Item, 1).status = ItemStatus.STOLEN
+    db.session.flush()
+    db.session.rollback()
+    assert _cached()
+    # The discarded change must not invalidate on the next, unrelated commit
+    db.session.commit()
+    assert _cached()
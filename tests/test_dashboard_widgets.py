@@ -0,0 +1,40 @@
+"""Only unknown or forbidden widgets are a 404; a bug inside a builder is not hidden as one."""
+import pytest
+
+from app import dashboard_widgets
+from app.models import db, Admin
+from conftest import login
+
+
+@pytest.fixture(scope='module')
+def app_and_admin(seeded_app):
+    app, admin, capturer = seeded_app(5)
+    return app, admin
+
+
+def test_unknown_widget_is_404(app_and_admin):
+    app, admin = app_and_admin
+    assert admin.get('/admin/api/dashboard/nope').status_code == 404
+
+
+def test_super_only_widget_is_404_for_faculty_admin(app_and_admin):
+    app, admin = app_and_admin
+    with app.app_context():
+        faculty = Admin(username='faculty', is_super_admin=False)
+        faculty.set_password('test')
+        db.session.add(faculty)
+        db.session.commit()
+        faculty_client = login(app, f'A-{faculty.admin_id}')
+    assert faculty_client.get('/admin/api/dashboard/financial').status_code == 404
+    assert faculty_client.get('/admin/api/dashboard/operational').status_code == 200
+
+
+def test_builder_key_error_propagates(app_and_admin, monkeypatch):
+    app, admin = app_and_admin
+
+    def broken(admin, today):
+        return {}['missing']
+
+    monkeypatch.setitem(dashboard_widgets.WIDGETS, 'operational', (broken, 60, False))
+    with pytest.raises(KeyError):
+        admin.get('/admin/api/dashboard/operational')
@@ -0,0 +1,62 @@
+"""The SQL depreciation expressions agree with straight-line depreciation worked out by hand."""
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+
+from app.models import db, Item, Room, ItemStatus, ItemCategory
+from app.depreciation import depreciation_amount, years_owned, USEFUL_LIFE_YEARS, DAYS_PER_YEAR
+from app.exports import _net_book_value
+
+
+AS_OF = date(2024, 6, 30)
+
+# (cost, Procured_date)
+CASES = [
+    (Decimal('1000.00'), AS_OF),                          # bought today
+    (Decimal('1000.00'), AS_OF - timedelta(days=365)),    # part way
+    (Decimal('2500.50'), AS_OF - timedelta(days=1000)),
+    (Decimal('800.00'), AS_OF - timedelta(days=3000)),    # past its useful life
+    (Decimal('800.00'), AS_OF + timedelta(days=30)),      # procured after as_of
+    (Decimal('0.00'), AS_OF - timedelta(days=400)),
+    (None, AS_OF - timedelta(days=400)),
+]
+
+
+def _expected_depreciation(cost, procured):
+    if cost is None or cost <= 0:
+        return 0.0
+    years = min(max((AS_OF - procured).days / DAYS_PER_YEAR, 0.0), USEFUL_LIFE_YEARS)
+    return float(cost) * years / USEFUL_LIFE_YEARS
+
+
+def test_sql_depreciation_matches_straight_line(seeded_app, monkeypatch):
+    app, _, _ = seeded_app(1)
+    with app.app_context():
+        room_id = db.session.scalar(select(Room.room_id).limit(1))
+        items = [
+            Item(asset_number=f'DEP{i}', name='Depreciating', room_id=room_id, status=ItemStatus.ACTIVE,
+                 category=ItemCategory.COMMERCIAL, cost=cost, Procured_date=procured)
+            for i, (cost, procured) in enumerate(CASES)
+        ]
+        db.session.add_all(items)
+        db.session.commit()
+
+        # The export column reads "today"; pin it to AS_OF
+        monkeypatch.setattr('app.depreciation.date', type('FixedDate', (date,), {'today': staticmethod(lambda: AS_OF)}))
+
+        rows = db.session.execute(
+            select(Item.cost, Item.Procured_date, years_owned(as_of=AS_OF),
+                   depreciation_amount(as_of=AS_OF), _net_book_value())
+            .where(Item.asset_number.like('DEP%'))
+            .order_by(Item.item_id)
+        ).all()
+
+        assert len(rows) == len(CASES)
+        for cost, procured, years, depreciation, net_book_value in rows:
+            assert years == pytest.approx((AS_OF - procured).days / DAYS_PER_YEAR)
+            expected = _expected_depreciation(cost, procured)
+            assert float(depreciation) == pytest.approx(expected, abs=0.005)
+            assert float(net_book_value) == pytest.approx(
+                float(cost) - expected if cost and cost > 0 else 0.0, abs=0.005)
@@ -0,0 +1,137 @@
+"""Repeat exports come from the file cache, revalidate to a 304, go stale on commit and are evicted LRU."""
+import os
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+from sqlalchemy import select
+
+from app.models import db, Item
+from app.export_cache import ExportCache, export_cache
+
+
+URL = '/admin/items/export/csv?columns=asset_number&columns=name'
+
+
+@pytest.fixture(scope='module')
+def seeded(seeded_app):
+    return seeded_app(20)
+
+
+def _files(cache):
+    """Export files in the cache directory (not its index)."""
+    return sorted(name for name in os.listdir(cache.directory) if not name.startswith('index.sqlite'))
+
+
+def test_repeat_download_is_served_from_cache(seeded):
+    app, admin, _ = seeded
+    first = admin.get(URL)
+    assert first.status_code == 200
+    body = first.get_data()
+    # Streamed on the first request, cached once sent in full
+    assert first.headers.get('ETag') is None
+    assert len(_files(export_cache)) == 1
+
+    second = admin.get(URL)
+    assert second.status_code == 200
+    assert second.get_data() == body
+    assert second.headers['ETag']
+    assert 'private' in second.headers['Cache-Control']
+
+    third = admin.get(URL)
+    assert third.headers['ETag'] == second.headers['ETag']
+    assert len(_files(export_cache)) == 1
+
+
+def test_if_none_match_gets_304(seeded):
+    app, admin, _ = seeded
+    etag = admin.get(URL).headers['ETag']
+    response = admin.get(URL, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.get_data() == b''
+
+    response = admin.get(URL, headers={'If-None-Match': '"something-else"'})
+    assert response.status_code == 200
+
+
+def test_commit_invalidates_cached_file(seeded):
+    app, admin, _ = seeded
+    etag = admin.get(URL).headers['ETag']
+    with app.app_context():
+        version = export_cache.version()
+        db.session.scalars(select(Item).where(Item.asset_number == 'A000003')).one().name = 'Renamed Laptop'
+        db.session.commit()
+        assert export_cache.version() == version + 1
+
+    # Rebuilt from the new data, and the old ETag no longer matches
+    response = admin.get(URL, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert b'Renamed Laptop' in response.get_data()
+    cached = admin.get(URL)
+    assert cached.headers['ETag'] != etag
+    assert b'Renamed Laptop' in cached.get_data()
+
+
+def test_rollback_keeps_cached_file(seeded):
+    app, admin, _ = seeded
+    etag = admin.get(URL).headers['ETag']
+    with app.app_context():
+        version = export_cache.version()
+        db.session.scalars(select(Item).limit(1)).one().name = 'Never Saved'
+        db.session.flush()
+        db.session.rollback()
+        assert export_cache.version() == version
+    assert admin.get(URL, headers={'If-None-Match': etag}).status_code == 304
+
+
+# ----- Eviction -----
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    """A 250-byte cache with a clock that ticks once per read of it."""
+    ticks = iter(range(1, 10_000))
+    monkeypatch.setattr('app.export_cache.time', SimpleNamespace(time=lambda: float(next(ticks))))
+    app = Flask(__name__)
+    app.config.update(EXPORT_CACHE_DIR=str(tmp_path / 'cache'), EXPORT_CACHE_MAX_BYTES=250)
+    cache = ExportCache()
+    cache.init_app(app)
+    with app.app_context():
+        yield cache
+
+
+def _file(tmp_path, name, size=100):
+    path = tmp_path / name
+    path.write_bytes(b'x' * size)
+    return str(path)
+
+
+def test_least_recently_used_file_is_evicted(cache, tmp_path):
+    version = cache.version()
+    cache.put('a', version, _file(tmp_path, 'a'))
+    cache.put('b', version, _file(tmp_path, 'b'))
+    assert cache.get('a') is not None   # 'a' is now more recent than 'b'
+
+    cache.put('c', version, _file(tmp_path, 'c'))
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None
+    assert [name.split('.')[0] for name in _files(cache)] == ['a', 'c']
+
+
+def test_outdated_files_are_evicted_first(cache, tmp_path):
+    cache.put('old', cache.version(), _file(tmp_path, 'old'))
+    cache.invalidate()
+    assert cache.get('old') is None
+
+    version = cache.version()
+    cache.put('a', version, _file(tmp_path, 'a'))
+    cache.put('b', version, _file(tmp_path, 'b'))
+    assert cache.get('a') is not None and cache.get('b') is not None
+    assert [name.split('.')[0] for name in _files(cache)] == ['a', 'b']
+
+
+def test_file_larger_than_cache_is_not_kept(cache, tmp_path):
+    path = _file(tmp_path, 'big', size=300)
+    assert cache.put('big', cache.version(), path) is None
+    assert cache.get('big') is None
+    assert (tmp_path / 'big').exists()
+    assert _files(cache) == []
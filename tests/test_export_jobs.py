@@ -0,0 +1,122 @@
+"""Abandoned export jobs are judged by their heartbeat, not by how long they have run."""
+import json
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import export_jobs
+from app.export_jobs import purge_expired_exports
+from app.models import db, InventoryExport, ExportFormat, ExportStatus
+
+
+@pytest.fixture(scope='module')
+def app_and_admin(seeded_app):
+    app, admin, capturer = seeded_app(5, EXPORT_JOB_TTL=6 * 3600, EXPORT_JOB_STALE_AFTER=300)
+    return app, admin
+
+
+def add_job(status, requested_ago, heartbeat_ago=None):
+    now = datetime.utcnow()
+    export = InventoryExport(
+        export_format=ExportFormat.EXCEL, status=status, admin_id=1, row_count=0,
+        export_date=now - requested_ago,
+        heartbeat_at=now - heartbeat_ago if heartbeat_ago is not None else None,
+        parameters=json.dumps({'format': 'xlsx', 'total': 10}),
+    )
+    db.session.add(export)
+    db.session.commit()
+    return export.export_id
+
+
+def test_stale_jobs_are_failed_by_heartbeat(app_and_admin):
+    app, admin = app_and_admin
+    with app.app_context():
+        long_running = add_job(ExportStatus.RUNNING, timedelta(days=2), heartbeat_ago=timedelta(seconds=10))
+        orphaned = add_job(ExportStatus.RUNNING, timedelta(minutes=20), heartbeat_ago=timedelta(minutes=10))
+        waiting = add_job(ExportStatus.QUEUED, timedelta(minutes=20))
+        never_started = add_job(ExportStatus.QUEUED, timedelta(days=2))
+
+        purge_expired_exports()
+        status = {i: db.session.get(InventoryExport, i).status
+                  for i in (long_running, orphaned, waiting, never_started)}
+
+    assert status[long_running] == ExportStatus.RUNNING
+    assert status[orphaned] == ExportStatus.FAILED
+    assert status[waiting] == ExportStatus.QUEUED
+    assert status[never_started] == ExportStatus.FAILED
+
+
+def test_job_page_shows_configured_ttl(app_and_admin):
+    app, admin = app_and_admin
+    with app.app_context():
+        export_id = add_job(ExportStatus.RUNNING, timedelta(minutes=1), heartbeat_ago=timedelta(seconds=1))
+    page = admin.get(f'/admin/exports/{export_id}').get_data(as_text=True)
+    assert 'stays available here for 6 hours' in page
+
+
+def test_running_job_sends_heartbeats(app_and_admin, monkeypatch):
+    app, admin = app_and_admin
+    monkeypatch.setattr(export_jobs, 'HEARTBEAT_INTERVAL', 0.01)
+    real_batches = export_jobs.export_batches
+
+    def slow_batches(filters, columns):
+        # Long enough for several heartbeats while the job is fetching
+        for rows in real_batches(filters, columns):
+            time.sleep(0.2)
+            yield rows
+
+    monkeypatch.setattr(export_jobs, 'export_batches', slow_batches)
+    with app.app_context():
+        export_id = add_job(ExportStatus.QUEUED, timedelta(0))
+        export = db.session.get(InventoryExport, export_id)
+        export.parameters = json.dumps({'format': 'csv', 'columns': ['Asset No.'], 'summaries': ['status'],
+                                        'filters': {}, 'campus_ids': None, 'data_capturer_id': None, 'total': 5})
+        db.session.commit()
+        export_jobs.run_export(export_id)
+        export = db.session.get(InventoryExport, export_id)
+        assert export.status == ExportStatus.DONE
+        assert export.heartbeat_at > export.started_at
+
+
+def test_worker_app_skips_web_start_up(app_and_admin, monkeypatch):
+    app, admin = app_and_admin
+
+    def no_web_start_up(*args, **kwargs):
+        raise AssertionError('the worker ran web app start-up')
+
+    for target in ('app.create_app', 'app.schema.upgrade_schema', 'app.presence.presence.init_app',
+                   'app.search.ensure_search_index', 'app.rollups.ensure_rollups_populated'):
+        monkeypatch.setattr(target, no_web_start_up)
+    worker = export_jobs.create_worker_app(export_jobs.export_jobs._config)
+    assert worker.blueprints == {}
+    with worker.app_context():
+        export_id = add_job(ExportStatus.QUEUED, timedelta(0))
+        export = db.session.get(InventoryExport, export_id)
+        export.parameters = json.dumps({'format': 'csv', 'columns': ['Asset No.'], 'summaries': ['status'],
+                                        'filters': {}, 'campus_ids': None, 'data_capturer_id': None, 'total': 5})
+        db.session.commit()
+        export_jobs.run_export(export_id)
+        export = db.session.get(InventoryExport, export_id)
+        assert export.status == ExportStatus.DONE
+        assert export.row_count == 5
+
+
+def test_queued_export_runs_in_a_spawned_worker(app_and_admin):
+    app, admin = app_and_admin
+    try:
+        with app.test_request_context():
+            export = export_jobs.enqueue_export('csv', ['Asset No.', 'Name'], export_jobs.InventoryFilter())
+            export_id = export.export_id
+        deadline = time.monotonic() + 60
+        with app.app_context():
+            while time.monotonic() < deadline:
+                db.session.expire_all()
+                export = db.session.get(InventoryExport, export_id)
+                if export.status in (ExportStatus.DONE, ExportStatus.FAILED):
+                    break
+                time.sleep(0.1)
+            assert (export.status, export.error) == (ExportStatus.DONE, None)
+            assert export.row_count == 5
+    finally:
+        export_jobs.export_jobs.shutdown()
@@ -0,0 +1,112 @@
+"""InventoryFilter parsing, keys, cached lambda statements and summaries."""
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+from werkzeug.datastructures import MultiDict
+
+from app.models import db, Item, ItemStatus, ItemCategory
+from app.inventory_filter import InventoryFilter
+
+
+@pytest.fixture(scope='module')
+def app(seeded_app):
+    app, _, _ = seeded_app(60)
+    with app.app_context():
+        yield app
+
+
+def _ids(stmt):
+    return sorted(item.item_id for item in db.session.scalars(stmt))
+
+
+def _expected(predicate):
+    return sorted(item.item_id for item in db.session.scalars(select(Item)) if predicate(item))
+
+
+# ----- Parsing and keys -----
+
+def test_from_args_parses_and_reports_errors():
+    flt = InventoryFilter.from_args(MultiDict({
+        'status': 'Needs Repair', 'category': 'commercial', 'room_id': 'all', 'min_cost': '12.50',
+        'date_from': '2024-02-30', 'max_cost': 'lots', 'staff': '  Smith ', 'campus_id': '9',
+    }), campus_ids=[2, 1])
+    assert flt.status == ItemStatus.NEEDS_REPAIR
+    assert flt.category == ItemCategory.COMMERCIAL
+    assert flt.room_id is None
+    assert flt.min_cost == Decimal('12.50')
+    assert flt.staff == 'Smith'
+    # Outside the caller's campuses
+    assert flt.campus_id is None
+    assert flt.campus_ids == (1, 2)
+    assert flt.errors == ['Invalid maximum cost.', "Invalid 'From' procurement date."]
+
+    excluded = InventoryFilter.from_args(MultiDict({'status': 'disposed'}), excluded_statuses=(ItemStatus.DISPOSED,))
+    assert excluded.status is None and not excluded.has_filters
+
+
+def test_cache_key_is_normalized_and_scoped():
+    def key(args, **scope):
+        return InventoryFilter.from_args(MultiDict(args), **scope).cache_key('list')
+
+    assert key({'status': 'Needs Repair', 'min_cost': '5'}) == key({'min_cost': '5', 'status': 'NEEDS_REPAIR'})
+    assert key({'status': 'active'}) == key({'status': 'active', 'room_id': 'all', 'staff': ' '})
+    assert key({'status': 'active'}) != key({'status': 'inactive'})
+    assert key({'status': 'active'}) != key({'status': 'active'}, campus_ids=[1])
+    assert key({'status': 'active'}, campus_ids=[1]) != key({'status': 'active'}, campus_ids=[1, 2])
+    assert key({}, data_capturer_id=1) != key({}, data_capturer_id=2)
+    assert key({'status': 'active'}) != InventoryFilter.from_args(MultiDict({'status': 'active'})).cache_key('summary')
+
+
+# ----- Statements -----
+
+def test_cached_statements_bind_new_values(app):
+    today = date.today()
+    # Same filter shape every time, so the lambda statement comes from the cache
+    for campus_id, status, min_cost, days, name in [
+        (1, ItemStatus.ACTIVE, Decimal(100), 30, 'Item 1'),
+        (2, ItemStatus.ACTIVE, Decimal(100), 59, 'Item 5'),
+        (1, ItemStatus.STOLEN, Decimal(120), 59, 'item'),
+        (2, ItemStatus.NEEDS_REPAIR, Decimal(130), 50, 'tem'),
+    ]:
+        flt = InventoryFilter(campus_id=campus_id, status=status, min_cost=min_cost,
+                              date_from=today - timedelta(days=days), item_name=name)
+        expected = _expected(lambda i: (
+            i.campus_id == campus_id and i.status == status and i.cost >= min_cost
+            and i.Procured_date >= today - timedelta(days=days) and name.lower() in i.name.lower()))
+        assert expected
+        assert _ids(flt.statement()) == expected
+        assert db.session.execute(flt.count_statement()).scalar() == len(expected)
+
+
+def test_scope_and_search_bind_new_values(app):
+    for campus_ids, q in [((1,), 'item'), ((2,), 'item'), ((1, 2), 'A000011'), ((1,), 'dell')]:
+        flt = InventoryFilter(campus_ids=campus_ids, q=q)
+        expected = _expected(lambda i: i.campus_id in campus_ids and (
+            q.lower() in i.name.lower() or q.lower() in i.asset_number.lower() or q.lower() in i.brand.lower()))
+        assert expected
+        assert _ids(flt.statement()) == expected
+
+
+# ----- Summary -----
+
+def test_summary_matches_items_and_follows_commits(app):
+    def expected(campus_id):
+        items = [i for i in db.session.scalars(select(Item)) if i.campus_id == campus_id]
+        by_status = {}
+        for item in items:
+            by_status[item.status.name] = by_status.get(item.status.name, 0) + 1
+        return len(items), sum(i.cost or 0 for i in items), by_status
+
+    def actual(campus_id):
+        summary = InventoryFilter(campus_id=campus_id).summary()
+        return summary.total, summary.total_value, summary.by_status
+
+    assert actual(1) == expected(1)
+    assert actual(2) == expected(2)
+
+    item = db.session.scalars(select(Item).where(Item.campus_id == 1, Item.status != ItemStatus.STOLEN)).first()
+    item.status = ItemStatus.STOLEN
+    db.session.commit()
+    assert actual(1) == expected(1)
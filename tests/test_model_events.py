@@ -0,0 +1,45 @@
+"""Room counters, Item.campus_id and rollups follow an item moved by column or by relationship."""
+import pytest
+from sqlalchemy import select, func
+
+from app.models import db, Item, Room, InventoryRollup
+
+
+def _room_counts_from_items():
+    return dict(db.session.execute(select(Item.room_id, func.count()).group_by(Item.room_id)).all())
+
+
+def _rollup_counts():
+    return dict(db.session.execute(
+        select(InventoryRollup.room_id, func.sum(InventoryRollup.item_count)).group_by(InventoryRollup.room_id)
+    ).all())
+
+
+@pytest.mark.parametrize('how', ['column', 'relationship'])
+@pytest.mark.parametrize('expired', [False, True], ids=['loaded', 'expired'])
+def test_moved_item_keeps_denormalized_data_in_sync(seeded_app, how, expired):
+    app, _, _ = seeded_app(12)
+    with app.app_context():
+        item = db.session.get(Item, 1)
+        target = db.session.scalars(
+            select(Room).where(Room.campus_id != item.campus_id).order_by(Room.room_id)
+        ).first()
+        target_id, source_id = target.room_id, item.room_id
+        if expired:
+            # Nothing about the item is loaded when it is moved
+            db.session.commit()
+
+        if how == 'column':
+            item.room_id = target_id
+        else:
+            item.room = db.session.get(Room, target_id)
+        db.session.commit()
+        db.session.expire_all()
+
+        actual = _room_counts_from_items()
+        for room_id in (source_id, target_id):
+            assert db.session.get(Room, room_id).item_count == actual.get(room_id, 0)
+        item = db.session.get(Item, 1)
+        assert item.room_id == target_id
+        assert item.campus_id == item.room.campus_id
+        assert _rollup_counts() == actual
@@ -0,0 +1,79 @@
+"""Keyset paging walks every row exactly once both ways, and refuses tampered cursors."""
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select, func
+from itsdangerous import URLSafeSerializer
+
+from app.models import db, Item
+from app.pagination import keyset_paginate, reverse_keys, encode_cursor, decode_cursor
+
+
+PER_PAGE = 7
+# Nullable cost coalesced as in INVENTORY_SORTS, ties broken by item_id
+COST_SORT = [(func.coalesce(Item.cost, -1), False), (Item.item_id, False)]
+
+
+@pytest.fixture(scope='module')
+def app(seeded_app):
+    app, _, _ = seeded_app(30)
+    with app.app_context():
+        for item in db.session.scalars(select(Item)):
+            # NULL costs plus plenty of ties
+            item.cost = None if item.item_id % 3 == 0 else Decimal(item.item_id % 4 * 10)
+        db.session.commit()
+    return app
+
+
+def _expected_ids(descending):
+    items = db.session.scalars(select(Item)).all()
+    key = [(-1 if i.cost is None else i.cost, i.item_id) for i in items]
+    order = sorted(zip(key, (i.item_id for i in items)), reverse=descending)
+    return [item_id for _, item_id in order]
+
+
+def _walk(keys, sort_name):
+    """Page forwards to the end, then backwards to the start; return both id sequences."""
+    pages = [keyset_paginate(select(Item), sort_name, keys, per_page=PER_PAGE)]
+    assert not pages[0].has_prev
+    while pages[-1].has_next:
+        pages.append(keyset_paginate(select(Item), sort_name, keys, per_page=PER_PAGE,
+                                     after=pages[-1].next_cursor))
+    forward = [item.item_id for page in pages for item in page.items]
+
+    backward_pages = [pages[-1]]
+    while backward_pages[-1].has_prev:
+        backward_pages.append(keyset_paginate(select(Item), sort_name, keys, per_page=PER_PAGE,
+                                              before=backward_pages[-1].prev_cursor))
+    backward = [item.item_id for page in reversed(backward_pages) for item in page.items]
+    return pages, forward, backward
+
+
+@pytest.mark.parametrize('descending', [False, True], ids=['asc', 'desc'])
+def test_pages_cover_every_row_both_ways(app, descending):
+    keys = reverse_keys(COST_SORT) if descending else COST_SORT
+    with app.test_request_context():
+        pages, forward, backward = _walk(keys, f'cost:{"desc" if descending else "asc"}')
+        expected = _expected_ids(descending)
+        assert forward == expected
+        assert backward == expected
+        assert all(len(page.items) == PER_PAGE for page in pages[:-1])
+        assert not pages[-1].has_next
+
+
+def test_tampered_cursor_is_ignored(app):
+    with app.test_request_context():
+        first = keyset_paginate(select(Item), 'cost:asc', COST_SORT, per_page=PER_PAGE)
+        cursor = first.next_cursor
+        assert decode_cursor(cursor, 'cost:asc', COST_SORT) is not None
+
+        # Edited payload, foreign signing key, cursor from another sort
+        tampered = cursor[:-2] + ('AA' if not cursor.endswith('AA') else 'BB')
+        forged = URLSafeSerializer('not-the-secret', salt='keyset-cursor').dumps(['cost:asc', [['v', 0], ['v', 0]]])
+        other_sort = encode_cursor('cost:desc', [0, 0])
+        for bad in (tampered, forged, other_sort, 'garbage'):
+            assert decode_cursor(bad, 'cost:asc', COST_SORT) is None
+            page = keyset_paginate(select(Item), 'cost:asc', COST_SORT, per_page=PER_PAGE, after=bad)
+            # Falls back to the first page
+            assert [i.item_id for i in page.items] == [i.item_id for i in first.items]
+            assert not page.has_prev
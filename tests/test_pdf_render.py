@@ -0,0 +1,58 @@
+"""The fast PDF renderer writes a well-formed file with every row, on the expected number of pages."""
+import base64
+import math
+import re
+import zlib
+
+import pytest
+
+from app.exports import SummaryTable
+from app.pdf_render import render_listing, PAGE_HEIGHT, TOP_MARGIN, BOTTOM_MARGIN, CELL_PADDING
+
+
+COLUMNS = ['Asset Number', 'Item Name', 'Status']
+ROW_HEIGHT = 10 + 2 * CELL_PADDING       # one line at the detail table's leading
+HEADING_HEIGHT = 18 + 15
+
+
+def _read_pdf(path):
+    data = path.read_bytes()
+    assert data.startswith(b'%PDF-')
+    assert data.rstrip().endswith(b'%%EOF')
+    assert b'xref' in data and b'trailer' in data
+    pages = re.findall(rb'/Type /Page\b(?!s)', data)
+    # Content streams are ASCII85 over Flate
+    streams = [zlib.decompress(base64.a85decode(s)) for s in re.findall(rb'stream\r?\n(.*?)~>endstream', data, re.S)]
+    fonts = set(re.findall(rb'/(F\d+) \d+ 0 R', data))
+    return len(pages), b'\n'.join(streams), fonts
+
+
+def _expected_pages(rows):
+    """Title page, then the listing: a heading on its first page, the header row on every page."""
+    first = int((PAGE_HEIGHT - TOP_MARGIN - BOTTOM_MARGIN - HEADING_HEIGHT - ROW_HEIGHT) // ROW_HEIGHT)
+    per_page = int((PAGE_HEIGHT - TOP_MARGIN - BOTTOM_MARGIN - ROW_HEIGHT) // ROW_HEIGHT)
+    return 1 + 1 + math.ceil(max(rows - first, 0) / per_page)
+
+
+@pytest.mark.parametrize('count', [1, 150])
+@pytest.mark.parametrize('workers', [1, 2])
+def test_listing_pages_and_rows(tmp_path, count, workers):
+    rows = [[f'A{i:06d}', f'Item {i % 7}', 'Active'] for i in range(count)]
+    path = tmp_path / 'listing.pdf'
+    render_listing(str(path), COLUMNS, rows, [], workers=workers)
+
+    pages, content, fonts = _read_pdf(path)
+    assert pages == _expected_pages(count)
+    assert sorted(re.findall(rb'\((A\d{6})\) Tj', content)) == [row[0].encode() for row in rows]
+    # Every font the operators select is one of the document's font resources
+    assert set(re.findall(rb'/(F\d+) [\d.]+ Tf', content)) <= fonts
+
+
+def test_summary_only_report(tmp_path):
+    summary = SummaryTable('By Status', 'Status', ['Status', 'Items', 'Total Cost'], [('Active', 3, 450.0)])
+    path = tmp_path / 'summary.pdf'
+    render_listing(str(path), COLUMNS, None, [summary])
+
+    pages, content, _ = _read_pdf(path)
+    assert pages == 1
+    assert b'(Active) Tj' in content and b'(450.00) Tj' in content
@@ -0,0 +1,60 @@
+"""Buffered capturer heartbeats reach the database within one flush interval, and survive a failed flush."""
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.models import db, DataCapturer
+from app.presence import presence, online_capturers_count
+
+
+def test_heartbeat_is_flushed_without_further_requests(seeded_app):
+    app, admin, capturer = seeded_app(1, PRESENCE_FLUSH_INTERVAL=0.2)
+    assert capturer.get('/capturer/my-items').status_code == 200
+    # Buffered: the worker gets no capturer request after this one
+    second_seen = datetime.utcnow()
+    assert capturer.get('/capturer/my-items').status_code == 200
+
+    deadline = time.monotonic() + 5
+    with app.app_context():
+        while time.monotonic() < deadline:
+            last_seen = db.session.scalar(db.select(DataCapturer.last_seen))
+            if last_seen is not None and last_seen >= second_seen:
+                break
+            time.sleep(0.05)
+        assert last_seen >= second_seen
+        assert online_capturers_count() == 1
+
+
+class _LockedEngine:
+    def begin(self):
+        raise OperationalError('UPDATE data_capturer', {}, Exception('database is locked'))
+
+
+def test_failed_flush_keeps_heartbeats(seeded_app, monkeypatch):
+    app, _, _ = seeded_app(1, PRESENCE_FLUSH_INTERVAL=3600)
+    with app.app_context():
+        capturer_id = db.session.scalar(db.select(DataCapturer.data_capturer_id))
+        presence.touch(capturer_id)
+        first_seen = presence._pending[capturer_id]
+
+        with monkeypatch.context() as m:
+            m.setattr(type(db), 'engine', property(lambda self: _LockedEngine()))
+            with pytest.raises(OperationalError):
+                presence.flush()
+        assert presence._pending == {capturer_id: first_seen}
+
+        # A newer heartbeat buffered meanwhile wins over the requeued one
+        newer = first_seen + timedelta(seconds=5)
+        presence._pending[capturer_id] = newer
+        presence._requeue({capturer_id: first_seen})
+        assert presence._pending[capturer_id] == newer
+
+        assert presence.flush() == 1
+        db.session.expire_all()
+        assert db.session.get(DataCapturer, capturer_id).last_seen == newer
+
+        # The requeue armed a retry timer; don't leave it to later tests
+        presence._timer.cancel()
+        presence._timer = None
@@ -0,0 +1,30 @@
+"""None of the hot queries falls back to a full table scan on the seeded database."""
+import pytest
+from sqlalchemy import text
+
+from app.models import db
+from app.query_plans import HOT_QUERIES, check_query_plans
+
+
+@pytest.fixture(scope='module')
+def plans(seeded_app):
+    app, _, _ = seeded_app(200)
+    with app.app_context():
+        db.session.execute(text('ANALYZE'))
+        db.session.commit()
+        return {name: (full, steps) for name, full, steps in check_query_plans()}, app
+
+
+@pytest.mark.parametrize('name', list(HOT_QUERIES))
+def test_hot_query_uses_an_index(plans, name):
+    full, steps = plans[0][name]
+    assert full == [], f'{name}: {"; ".join(steps)}'
+
+
+def test_dropped_index_is_reported(plans):
+    app = plans[1]
+    with app.app_context():
+        db.session.execute(text('DROP INDEX ix_item_allocated_date'))
+        db.session.commit()
+        results = {name: full for name, full, _ in check_query_plans()}
+    assert results['allocated date range'] == ['SCAN item']
@@ -0,0 +1,110 @@
+"""Incremental rollups match a direct aggregate over ``item``; dashboard age buckets use exact dates."""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from sqlalchemy import select, func
+
+from app.models import db, Item, Room, InventoryRollup, ItemStatus, ItemCategory
+from app.rollups import month_start, rebuild_rollups
+from app.dashboard_metrics import compute_dashboard_metrics, _age_boundaries
+
+
+def _rollup_table():
+    rows = db.session.execute(select(
+        InventoryRollup.campus_id, InventoryRollup.room_id, InventoryRollup.category,
+        InventoryRollup.status, InventoryRollup.procured_month,
+        InventoryRollup.item_count, InventoryRollup.total_cost,
+    )).all()
+    return {tuple(row[:5]): (row[5], Decimal(row[6])) for row in rows if row[5]}
+
+
+def _aggregate_items():
+    rows = db.session.execute(
+        select(Room.campus_id, Item.room_id, Item.category, Item.status, Item.Procured_date,
+               Item.cost)
+        .join(Room, Item.room_id == Room.room_id)
+    ).all()
+    totals = {}
+    for campus_id, room_id, category, status, procured, cost in rows:
+        key = (campus_id, room_id, category, status, month_start(procured))
+        count, total = totals.get(key, (0, Decimal(0)))
+        totals[key] = (count + 1, total + Decimal(cost or 0))
+    return totals
+
+
+def test_rollups_follow_adds_edits_status_changes_and_deletes(seeded_app):
+    app, _, _ = seeded_app(40)
+    with app.app_context():
+        assert _rollup_table() == _aggregate_items()
+        rooms = db.session.scalars(select(Room).order_by(Room.room_id)).all()
+
+        db.session.add(Item(asset_number='NEW1', name='New', room_id=rooms[0].room_id,
+                            status=ItemStatus.ACTIVE, category=ItemCategory.COMMERCIAL,
+                            cost=Decimal('999.99'), Procured_date=date(2019, 3, 4)))
+        db.session.commit()
+        assert _rollup_table() == _aggregate_items()
+
+        item = db.session.get(Item, 2)
+        item.cost = Decimal('1.50')
+        item.category = ItemCategory.PROJECTS_RESEARCH
+        item.Procured_date = date(2015, 1, 31)
+        db.session.commit()
+        assert _rollup_table() == _aggregate_items()
+
+        db.session.get(Item, 3).status = ItemStatus.STOLEN
+        db.session.get(Item, 4).cost = None
+        db.session.commit()
+        assert _rollup_table() == _aggregate_items()
+
+        db.session.delete(db.session.get(Item, 5))
+        db.session.commit()
+        assert _rollup_table() == _aggregate_items()
+
+        # A room moved to another campus takes its rollup rows along
+        rooms[1].campus_id = rooms[0].campus_id
+        db.session.commit()
+        assert _rollup_table() == _aggregate_items()
+
+        expected = _rollup_table()
+        db.session.execute(InventoryRollup.__table__.delete())
+        db.session.commit()
+        assert rebuild_rollups() == len(expected)
+        assert _rollup_table() == expected
+
+
+def test_age_buckets_use_exact_procurement_dates(seeded_app):
+    app, _, _ = seeded_app(4)
+    today = date.today()
+    with app.app_context():
+        room_id = db.session.scalar(select(Room.room_id).limit(1))
+        db.session.execute(Item.__table__.delete())
+        db.session.commit()
+        rebuild_rollups()
+
+        # Either side of each cut-off, usually within the same procurement month
+        procured = []
+        for cutoff in _age_boundaries(today).values():
+            procured += [cutoff, cutoff + timedelta(days=1)]
+        db.session.add_all([
+            Item(asset_number=f'AGE{i}', name='Aged', room_id=room_id, status=ItemStatus.ACTIVE,
+                 category=ItemCategory.COMMERCIAL, cost=Decimal(10 ** i), Procured_date=day)
+            for i, day in enumerate(procured)
+        ])
+        db.session.commit()
+
+        metrics = compute_dashboard_metrics(today=today)
+        b = _age_boundaries(today)
+
+        def expected(condition):
+            count, value = db.session.execute(
+                select(func.count(), func.coalesce(func.sum(Item.cost), 0)).where(condition)).one()
+            return count, float(value)
+
+        assert (metrics.fully_depreciated_count, metrics.fully_depreciated_value) == \
+            expected(Item.Procured_date <= b['five_years_ago'])
+        assert (metrics.at_risk_count, metrics.at_risk_value) == expected(
+            (Item.Procured_date > b['five_years_ago']) & (Item.Procured_date <= b['four_years_ago']))
+        assert (metrics.replacement_needed_count, metrics.replacement_needed_value) == expected(
+            (Item.Procured_date > b['four_years_ago']) & (Item.Procured_date <= b['three_years_ago']))
+        assert metrics.fully_depreciated_count == 1
+        assert metrics.at_risk_count == metrics.replacement_needed_count == 2
@@ -0,0 +1,66 @@
+"""The full-text index follows item inserts, updates and deletes, and ``q`` filters the list pages."""
+import re
+
+import pytest
+from sqlalchemy import select
+
+from app.models import db, Item, Room, ItemStatus, ItemCategory
+from app.search import search_hits
+
+
+def _matches(q):
+    hits = search_hits(q)
+    return set(db.session.scalars(select(hits.c.item_id)))
+
+
+@pytest.fixture(scope='module')
+def seeded(seeded_app):
+    app, admin, capturer = seeded_app(30)
+    with app.app_context():
+        db.session.scalars(select(Item).where(Item.asset_number == 'A000007')).one().name = 'Zebracorn Projector'
+        db.session.commit()
+    return app, admin, capturer
+
+
+def test_index_follows_insert_update_and_delete(seeded):
+    app, _, _ = seeded
+    with app.app_context():
+        room = db.session.scalars(select(Room).order_by(Room.room_id)).first()
+        item = Item(asset_number='FTS1', name='Quokka Scanner', room_id=room.room_id,
+                    status=ItemStatus.ACTIVE, category=ItemCategory.COMMERCIAL)
+        db.session.add(item)
+        db.session.commit()
+        assert _matches('quokka') == _matches('quok') == _matches('scanner quokka') == {item.item_id}
+
+        item.name = 'Wombat Scanner'
+        db.session.commit()
+        assert _matches('quokka') == set()
+        assert _matches('wombat') == {item.item_id}
+
+        # Room fields are part of every document in the room
+        room.name = 'Platypus Lab'
+        db.session.commit()
+        in_room = set(db.session.scalars(select(Item.item_id).where(Item.room_id == room.room_id)))
+        assert _matches('platypus') == in_room
+
+        db.session.delete(item)
+        db.session.commit()
+        assert _matches('wombat') == set()
+
+
+@pytest.mark.parametrize('url', [
+    '/admin/inventory?q={q}',
+    '/admin/reports?q={q}',
+    '/capturer/my-items?q={q}',
+])
+@pytest.mark.parametrize('q', ['zebracorn', 'zebra', 'Projector+Zebracorn'])
+def test_q_filters_list_pages(seeded, url, q):
+    _, admin, capturer = seeded
+    client = capturer if url.startswith('/capturer') else admin
+    response = client.get(url.format(q=q))
+    assert response.status_code == 200
+    assert set(re.findall(r'A\d{6}', response.get_data(as_text=True))) == {'A000007'}
+
+    response = client.get(url.format(q='nosuchthing'))
+    assert response.status_code == 200
+    assert re.findall(r'A\d{6}', response.get_data(as_text=True)) == []
@@ -0,0 +1,67 @@
+"""n-gram assisted ``contains()`` finds exactly the rows plain ILIKE finds."""
+import pytest
+from sqlalchemy import select
+
+from app.models import db, Item, Room
+from app.substring import contains, rebuild_substring_index, substring_gram, ensure_substring_index
+
+
+BRANDS = ['Dell', 'HP', 'Hewlett-Packard', 'Lenovo ThinkPad', 'dell inc.', 'ACER', '50%_Off', None]
+COLORS = ['Black', 'Matte black', 'Red', 'rEd/White', None, 'Blue']
+
+TERMS = [
+    'd', 'hp', 'de', 'DEL', 'dell', 'Dell Inc', 'ThinkPad', 'hinkp', 'LENOVO THINKPAD', 'packard',
+    'black', 'BLACK', 'e b', 'red', '/wh', 'ed/', '50%', '%_o', 'none', 'xyz', '',
+]
+
+
+def _ilike(column, term):
+    # '%' and '_' are literal characters for contains(), so escape them here too
+    escaped = term.replace('%', '\\%').replace('_', '\\_')
+    return set(db.session.scalars(select(Item.item_id).where(column.ilike(f'%{escaped}%', escape='\\'))))
+
+
+@pytest.fixture(scope='module')
+def app(seeded_app):
+    app, _, _ = seeded_app(24)
+    with app.app_context():
+        for item in db.session.scalars(select(Item)):
+            item.brand = BRANDS[item.item_id % len(BRANDS)]
+            item.color = COLORS[item.item_id % len(COLORS)]
+        db.session.commit()
+    return app
+
+
+@pytest.mark.parametrize('term', TERMS)
+@pytest.mark.parametrize('column', [Item.brand, Item.color, Item.name, Item.asset_number],
+                         ids=['brand', 'color', 'name', 'asset_number'])
+def test_contains_matches_plain_ilike(app, column, term):
+    with app.app_context():
+        found = set(db.session.scalars(select(Item.item_id).where(contains(column, term))))
+        assert found == _ilike(column, term)
+
+
+def test_room_columns_after_rebuild(app):
+    with app.app_context():
+        assert rebuild_substring_index() > 0
+        for term in ('room 1', 'OOM', 'staff 2', '1000000'):
+            for column in (Room.name, Room.staff_name, Room.staff_number):
+                found = set(db.session.scalars(select(Room.room_id).where(contains(column, term))))
+                expected = set(db.session.scalars(select(Room.room_id).where(column.ilike(f'%{term}%'))))
+                assert found == expected
+
+
+def test_new_column_is_indexed_on_start_up(app):
+    with app.app_context():
+        db.session.execute(substring_gram.delete().where(substring_gram.c.column_key == 'item.color'))
+        db.session.commit()
+        ensure_substring_index()
+        assert db.session.execute(
+            select(substring_gram.c.row_id).where(substring_gram.c.column_key == 'item.color').limit(1)
+        ).first() is not None
+
+
+def test_autocomplete_uses_substring_match(app):
+    client = app.test_client()
+    assert sorted(client.get('/capturer/autocomplete/brands?q=DELL').get_json()) == ['Dell', 'dell inc.']
+    assert sorted(client.get('/capturer/autocomplete/colors?q=ed').get_json()) == ['Red', 'rEd/White']
@@ -0,0 +1,28 @@
+"""The time-series API bounds its window and answers bad windows with a 400."""
+import pytest
+
+
+@pytest.fixture(scope='module')
+def admin(seeded_app):
+    app, admin, capturer = seeded_app(5)
+    return admin
+
+
+@pytest.mark.parametrize('query', [
+    'unit=day&start=1900-01-01',
+    'unit=week&start=1900-01-01&end=2000-01-01',
+    'unit=day&start=0001-01-01&end=9999-12-31',
+    'unit=year&start=0001-01-01&end=9999-12-31',
+    'unit=month&end=9999-12-31',
+    'unit=year&periods=50&end=0010-01-01',
+])
+def test_window_out_of_bounds_is_rejected(admin, query):
+    response = admin.get(f'/admin/api/timeseries?{query}')
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def test_window_up_to_max_periods(admin):
+    response = admin.get('/admin/api/timeseries?unit=day&start=2020-01-01&end=2022-09-26')
+    assert response.status_code == 200
+    assert len(response.get_json()['series']) == 1000